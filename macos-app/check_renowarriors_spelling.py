@@ -2,9 +2,9 @@
 """
 Check and fix US to AU spelling in Reno Warriors content
 """
-import re
 from wpbm_manager_v2 import WPBulkManagerV2
 from wpbm.api.client import WPBMClient
+from wpbm.operations.replace_rules import ReplaceRuleSet
 
 # US to AU spelling mappings (abbreviated for checking)
 US_TO_AU_SPELLINGS = {
@@ -66,24 +66,23 @@ US_TO_AU_SPELLINGS = {
     'molding': 'moulding'
 }
 
+# All spellings compiled once and matched in a single scan of each text
+SPELLING_RULES = ReplaceRuleSet.from_mapping(US_TO_AU_SPELLINGS, whole_word=True, ignore_case=True)
+
 def check_spelling_in_text(text):
     """Check for US spellings in text"""
     issues = []
     
-    for us_spelling, au_spelling in US_TO_AU_SPELLINGS.items():
-        pattern = re.compile(r'\b' + re.escape(us_spelling) + r'\b', re.IGNORECASE)
-        matches = pattern.finditer(text)
-        
-        for match in matches:
-            start = max(0, match.start() - 30)
-            end = min(len(text), match.end() + 30)
-            context = text[start:end]
-            issues.append({
-                'us': us_spelling,
-                'au': au_spelling,
-                'context': context.replace('\n', ' ').strip(),
-                'position': match.start()
-            })
+    for match_start, match_end, rule in SPELLING_RULES.finditer(text):
+        start = max(0, match_start - 30)
+        end = min(len(text), match_end + 30)
+        context = text[start:end]
+        issues.append({
+            'us': rule.search,
+            'au': rule.replace,
+            'context': context.replace('\n', ' ').strip(),
+            'position': match_start
+        })
     
     return issues
 
@@ -2,10 +2,10 @@
 """
 Fix US to AU spelling in Reno Warriors content
 """
-import re
 from wpbm_manager_v2 import WPBulkManagerV2
 from wpbm.api.client import WPBMClient
 from wpbm.operations.content import ContentOperations
+from wpbm.operations.replace_rules import ReplaceRuleSet
 
 # US to AU spelling mappings
 US_TO_AU_SPELLINGS = {
@@ -73,31 +73,18 @@ US_TO_AU_SPELLINGS = {
     'smolder': 'smoulder'
 }
 
+# Whole words, any case, replaced keeping the original case pattern
+SPELLING_RULES = ReplaceRuleSet.from_mapping(
+    US_TO_AU_SPELLINGS, whole_word=True, ignore_case=True, preserve_case=True
+)
+
 def fix_spelling_in_text(text):
     """Fix US to AU spelling in text while preserving case"""
     if not text:
         return text, 0
         
-    changes = 0
-    for us_spelling, au_spelling in US_TO_AU_SPELLINGS.items():
-        # Create case-insensitive pattern but preserve original case
-        pattern = re.compile(r'\b' + re.escape(us_spelling) + r'\b', re.IGNORECASE)
-        
-        def replace_with_case(match):
-            nonlocal changes
-            original = match.group()
-            changes += 1
-            # Preserve the case pattern
-            if original.isupper():
-                return au_spelling.upper()
-            elif original[0].isupper():
-                return au_spelling.capitalize()
-            else:
-                return au_spelling
-                
-        text = pattern.sub(replace_with_case, text)
-        
-    return text, changes
+    text, counts = SPELLING_RULES.apply(text)
+    return text, sum(counts.values())
 
 def main():
     # Initialize manager
@@ -119,43 +106,34 @@ def main():
     total_fixes = 0
     pages_fixed = 0
     
-    # Check each spelling one by one
-    for us_spelling, au_spelling in US_TO_AU_SPELLINGS.items():
-        print(f"Checking for '{us_spelling}'...")
+    # Check every spelling in one pass over the pages
+    result = content_ops.apply_replace_rules(SPELLING_RULES, post_types=['page'], dry_run=True)
+    
+    if result['changes']:
+        print(f"Found {result['total_replacements']} instances in {len(result['changes'])} pages")
         
-        result = content_ops.search_replace_content(
-            search=us_spelling,
-            replace=au_spelling,
-            post_types=['page'],
-            dry_run=True
-        )
+        # Show counts per spelling
+        for us_spelling, count in sorted(result['rule_matches'].items(), key=lambda item: -item[1]):
+            print(f"  - '{us_spelling}' → '{US_TO_AU_SPELLINGS[us_spelling]}': {count}")
         
-        if result['changes']:
-            print(f"  Found {result['total_replacements']} instances in {len(result['changes'])} pages")
-            
-            # Show affected pages
-            for change in result['changes']:
-                print(f"    - Page {change['id']}: {change['title']} ({change['content_replacements']} in content, {change['title_replacements']} in title)")
-            
-            # Ask for confirmation
-            confirm = input(f"\nReplace '{us_spelling}' with '{au_spelling}'? (y/n): ")
+        # Show affected pages
+        for change in result['changes']:
+            print(f"    - Page {change['id']}: {change['title']} ({change['content_replacements']} in content, {change['title_replacements']} in title)")
+        
+        # Ask for confirmation
+        confirm = input("\nApply all spelling fixes? (y/n): ")
+        
+        if confirm.lower() == 'y':
+            # Apply the changes
+            actual_result = content_ops.apply_replace_rules(SPELLING_RULES, post_types=['page'], dry_run=False)
             
-            if confirm.lower() == 'y':
-                # Apply the changes
-                actual_result = content_ops.search_replace_content(
-                    search=us_spelling,
-                    replace=au_spelling,
-                    post_types=['page'],
-                    dry_run=False
-                )
-                
-                print(f"  ✓ Replaced {actual_result['total_replacements']} instances")
-                total_fixes += actual_result['total_replacements']
-                pages_fixed += actual_result['posts_modified']
-            else:
-                print("  Skipped")
+            print(f"  ✓ Replaced {actual_result['total_replacements']} instances")
+            total_fixes += actual_result['total_replacements']
+            pages_fixed += actual_result['posts_modified']
         else:
-            print(f"  No instances found")
+            print("  Skipped")
+    else:
+        print("No instances found")
     
     print(f"\n=== Summary ===")
     print(f"Total spelling fixes applied: {total_fixes}")
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test that whole-library media operations see more than one page of media
+
+Runs without a WordPress site: media files are served from a temporary
+directory by a local HTTP server and the API is a small in-memory stand-in.
+Run with pytest, or directly with python.
+"""
+import functools
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the wpbm package to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from wpbm.operations.media import MediaOperations
+
+MEDIA_COUNT = 250  # more than the 100-item default page size
+DUPLICATE_EVERY = 50  # every 50th item is a copy of the one before it
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class LibraryClient:
+    """In-memory stand-in for WPBMClient's media and content reads"""
+    
+    max_workers = 4
+    site_url = 'http://library.test'
+    
+    def __init__(self, base_url: str):
+        self.media = [
+            {
+                'id': media_id,
+                'source_url': f'{base_url}/file{media_id}.bin',
+                'media_details': {}
+            }
+            for media_id in range(1, MEDIA_COUNT + 1)
+        ]
+        self.requests = []
+        
+    def get(self, endpoint, params=None, use_cache=True, revalidate=False):
+        self.requests.append(endpoint)
+        if endpoint == '/media':
+            params = params or {}
+            limit = params.get('limit', 100)
+            page = params.get('page', 1)
+            return {
+                'media': self.media[(page - 1) * limit:page * limit],
+                'total': len(self.media),
+                'pages': -(-len(self.media) // limit)
+            }
+        media_id = int(endpoint.rsplit('/', 1)[1])
+        return next(item for item in self.media if item['id'] == media_id)
+        
+    def iter_media(self, limit=100, use_cache=True, **kwargs):
+        page = 1
+        while True:
+            response = self.get('/media', params={'limit': limit, 'page': page, **kwargs})
+            yield from response['media']
+            if page >= response['pages']:
+                break
+            page += 1
+            
+    def iter_content(self, content_type='page', **kwargs):
+        # Every item is referenced by one post, so clusters carry references
+        if content_type == 'post':
+            for item in self.media:
+                yield {'id': 10000 + item['id'], 'content': f'<img class="wp-image-{item["id"]}">'}
+
+
+def _serve(directory):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(QuietHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+
+def _write_files(directory):
+    for media_id in range(1, MEDIA_COUNT + 1):
+        # Copies of the previous item's bytes, so they are exact duplicates
+        source = media_id - 1 if media_id % DUPLICATE_EVERY == 0 else media_id
+        with open(os.path.join(directory, f'file{media_id}.bin'), 'wb') as f:
+            f.write(f'media file {source}\n'.encode() * 64)
+
+
+def test_whole_library_is_downloaded_and_checked_for_duplicates():
+    served = tempfile.mkdtemp()
+    downloads = tempfile.mkdtemp()
+    server, base_url = _serve(served)
+    try:
+        _write_files(served)
+        client = LibraryClient(base_url)
+        ops = MediaOperations(client)
+        
+        results = ops.bulk_download_media(output_dir=downloads, max_workers=8)
+        assert results['total'] == MEDIA_COUNT
+        assert results['downloaded'] == MEDIA_COUNT
+        assert len(results['files']) == MEDIA_COUNT
+        
+        # Second pass reuses the downloads and finds the copies past the first page
+        duplicates = ops.find_duplicate_media(download_dir=downloads, max_distance=0, max_workers=2)
+        assert duplicates['total'] == MEDIA_COUNT
+        assert duplicates['duplicates'] == MEDIA_COUNT // DUPLICATE_EVERY
+        clustered = sorted(copy['media_id'] for cluster in duplicates['clusters'] for copy in cluster['copies'])
+        expected = sorted(media_id + offset for media_id in range(DUPLICATE_EVERY, MEDIA_COUNT + 1, DUPLICATE_EVERY)
+                          for offset in (-1, 0))
+        assert clustered == expected
+        assert all(copy['references'] == [10000 + copy['media_id']]
+                   for cluster in duplicates['clusters'] for copy in cluster['copies'])
+    finally:
+        server.shutdown()
+        shutil.rmtree(served)
+        shutil.rmtree(downloads)
+
+
+def test_explicit_ids_are_fetched_without_a_listing():
+    client = LibraryClient('http://127.0.0.1:9')
+    ops = MediaOperations(client)
+    
+    fetched = dict(ops._fetch_media([3, 140, 999]))
+    assert fetched[3]['id'] == 3
+    assert fetched[140]['id'] == 140
+    assert fetched[999] is None
+
+
+if __name__ == '__main__':
+    test_whole_library_is_downloaded_and_checked_for_duplicates()
+    test_explicit_ids_are_fetched_without_a_listing()
+    print("✅ Whole-library media operations cover all media items")
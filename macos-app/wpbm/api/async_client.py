@@ -0,0 +1,328 @@
+"""
+Asyncio API client for WP Bulk Manager
+"""
+import asyncio
+import inspect
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Union
+from urllib.parse import urljoin
+
+import aiohttp
+
+from ..utils.cache import CacheManager
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def create_shared_session(limit: int = 100, limit_per_host: int = 6,
+                          timeout: int = 30) -> aiohttp.ClientSession:
+    """
+    Create a connection pool that can be shared by clients for many sites
+
+    Args:
+        limit: Maximum open connections across all sites
+        limit_per_host: Maximum open connections to any one site
+        timeout: Total timeout per request in seconds
+
+    Must be called from inside a running event loop.
+    """
+    connector = aiohttp.TCPConnector(limit=limit, limit_per_host=limit_per_host)
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=timeout)
+    )
+
+
+class AsyncWPBMClient:
+    """
+    Asyncio counterpart of WPBMClient with the same request surface
+
+    Cache reads and writes may touch disk, so they run in worker threads
+    to keep the event loop free while requests are in flight.
+    """
+
+    def __init__(self, site_url: str, api_key: str,
+                 session: Optional[aiohttp.ClientSession] = None,
+                 cache_enabled: bool = True, cache_ttl: int = 300,
+                 max_retries: int = 3):
+        """
+        Initialize async client
+
+        Args:
+            site_url: WordPress site URL
+            api_key: API key from the client plugin
+            session: Shared session from create_shared_session() (default: private pool)
+            cache_enabled: Cache GET responses
+            cache_ttl: Cache time to live in seconds
+            max_retries: Attempts per request before giving up
+        """
+        self.site_url = site_url.rstrip('/')
+        self.api_key = api_key
+        self.cache_enabled = cache_enabled
+        self.cache = CacheManager(ttl=cache_ttl) if cache_enabled else None
+        self.max_retries = max_retries
+        self.headers = {
+            'X-API-Key': api_key,
+            'Content-Type': 'application/json'
+        }
+        self._session = session
+        self._owns_session = session is None
+
+    async def __aenter__(self) -> 'AsyncWPBMClient':
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Session used for requests, created lazily inside the event loop"""
+        if self._session is None or self._session.closed:
+            self._session = create_shared_session()
+            self._owns_session = True
+        return self._session
+
+    async def close(self):
+        """Close the session if this client created it"""
+        if self._owns_session and self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    def _build_url(self, endpoint: str) -> str:
+        """Build full API URL"""
+        base = f"{self.site_url}/wp-json/wpbm/v1"
+        return urljoin(base + '/', endpoint.lstrip('/'))
+
+    async def _make_request(self, method: str, endpoint: str, **kwargs) -> Any:
+        """Make HTTP request with retries and return the decoded JSON body"""
+        url = self._build_url(endpoint)
+
+        for attempt in range(self.max_retries):
+            try:
+                logger.debug(f"{method} {url} (attempt {attempt + 1}/{self.max_retries})")
+                async with self.session.request(method, url, headers=self.headers,
+                                                **kwargs) as response:
+                    response.raise_for_status()
+                    return await response.json(content_type=None)
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(f"Request failed (attempt {attempt + 1}): {e}")
+                if attempt < self.max_retries - 1:
+                    await asyncio.sleep(2 ** attempt)  # Exponential backoff
+                else:
+                    raise
+
+    async def get(self, endpoint: str, params: Optional[Dict] = None,
+                  use_cache: bool = True) -> Dict[str, Any]:
+        """GET request with optional caching"""
+        cache_key = None
+
+        if self.cache and use_cache:
+            cache_key = self.cache.resource_key(self.site_url, endpoint, params)
+            cached = await asyncio.to_thread(self.cache.get, cache_key)
+            if cached is not None:
+                logger.debug(f"Cache hit for {endpoint}")
+                return cached
+
+        data = await self._make_request('GET', endpoint, params=params)
+
+        if cache_key and self.cache:
+            await asyncio.to_thread(self.cache.set, cache_key, data)
+
+        return data
+
+    async def post(self, endpoint: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """POST request"""
+        try:
+            return await self._make_request('POST', endpoint, json=data)
+        finally:
+            if not data.get('dry_run'):
+                await self._invalidate('POST', endpoint)
+
+    async def put(self, endpoint: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """PUT request"""
+        try:
+            return await self._make_request('PUT', endpoint, json=data)
+        finally:
+            await self._invalidate('PUT', endpoint)
+
+    async def delete(self, endpoint: str) -> Dict[str, Any]:
+        """DELETE request"""
+        try:
+            return await self._make_request('DELETE', endpoint)
+        finally:
+            await self._invalidate('DELETE', endpoint)
+
+    async def _invalidate(self, method: str, endpoint: str):
+        """Drop cached responses a write may have made stale"""
+        if self.cache:
+            await asyncio.to_thread(self.cache.invalidate_after_write, self.site_url, method, endpoint)
+
+    async def get_content(self, content_type: str = 'page', limit: int = 100,
+                          status: str = 'any', **kwargs) -> List[Dict]:
+        """
+        Get content with pagination support
+
+        The first page reports how many pages there are; the rest are then
+        fetched concurrently (bounded by the session's per-host limit).
+        """
+        def params(page: int) -> Dict[str, Any]:
+            return {
+                'type': content_type,
+                'limit': limit,
+                'page': page,
+                'status': status,
+                **kwargs
+            }
+
+        first = await self.get('/content', params=params(1))
+        all_content = list(first.get('posts', []))
+        pages = first.get('pages')
+
+        if isinstance(pages, int):
+            responses = await asyncio.gather(
+                *(self.get('/content', params=params(page)) for page in range(2, pages + 1))
+            )
+            for response in responses:
+                all_content.extend(response.get('posts', []))
+            return all_content
+
+        # Servers that don't report page counts: page until a short page
+        page = 1
+        posts = all_content
+        while posts and len(posts) >= limit:
+            page += 1
+            response = await self.get('/content', params=params(page))
+            posts = response.get('posts', [])
+            all_content.extend(posts)
+
+        return all_content
+
+    async def iter_pages(self, endpoint: str, items_key: str, params: Optional[Dict] = None,
+                         limit: int = 100, use_cache: bool = True) -> AsyncIterator[List[Dict]]:
+        """
+        Yield every page of a listing endpoint, one list of items per page
+
+        Pages after the first are requested together once the first
+        reports the page count, and yielded in the order they arrive.
+        """
+        def page_params(page: int) -> Dict[str, Any]:
+            return {**(params or {}), 'limit': limit, 'page': page}
+
+        def items(response: Any) -> List[Dict]:
+            return response if isinstance(response, list) else response.get(items_key, [])
+
+        first = await self.get(endpoint, params=page_params(1), use_cache=use_cache)
+        yield items(first)
+        pages = None if isinstance(first, list) else first.get('pages')
+
+        if isinstance(pages, int):
+            tasks = [asyncio.ensure_future(self.get(endpoint, params=page_params(page), use_cache=use_cache))
+                     for page in range(2, pages + 1)]
+            try:
+                for next_page in asyncio.as_completed(tasks):
+                    yield items(await next_page)
+            finally:
+                for task in tasks:
+                    task.cancel()
+            return
+
+        # Servers that don't report page counts: page until a short page
+        page, page_items = 1, items(first)
+        while len(page_items) >= limit:
+            page += 1
+            page_items = items(await self.get(endpoint, params=page_params(page), use_cache=use_cache))
+            yield page_items
+
+    async def get_content_by_id(self, content_id: int, use_cache: bool = True) -> Dict[str, Any]:
+        """Get single content item (use_cache=False for a live copy)"""
+        return await self.get(f'/content/{content_id}', use_cache=use_cache)
+
+    async def update_content(self, content_id: int, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Update content"""
+        return await self.put(f'/content/{content_id}', data)
+
+    async def create_content(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create new content"""
+        return await self.post('/content', data)
+
+    async def delete_content(self, content_id: int) -> Dict[str, Any]:
+        """Delete content"""
+        return await self.delete(f'/content/{content_id}')
+
+    async def search_replace(self, search: str, replace: str, post_types: List[str] = None,
+                             dry_run: bool = True) -> Dict[str, Any]:
+        """Search and replace across content"""
+        data = {
+            'search': search,
+            'replace': replace,
+            'post_types': post_types or ['post', 'page'],
+            'dry_run': dry_run
+        }
+        return await self.post('/search-replace', data)
+
+    async def get_media(self, limit: int = 100, **kwargs) -> List[Dict]:
+        """Get media items"""
+        response = await self.get('/media', params={'limit': limit, **kwargs})
+        return response if isinstance(response, list) else response.get('media', [])
+
+    async def list_plugins(self) -> List[Dict]:
+        """List plugins installed on the site"""
+        result = await self.get('/plugins')
+        if isinstance(result, dict) and 'plugins' in result:
+            return result['plugins']
+        return result if isinstance(result, list) else []
+
+    async def backup_content(self, post_ids: List[int] = None) -> Dict[str, Any]:
+        """Create backup before bulk operations"""
+        data = {'post_ids': post_ids} if post_ids else {}
+        return await self.post('/backup', data)
+
+    async def get_revisions(self, content_id: int) -> List[Dict]:
+        """Get content revisions"""
+        return await self.get(f'/content/{content_id}/revisions')
+
+    async def restore_revision(self, content_id: int, revision_id: int) -> Dict[str, Any]:
+        """Restore content to specific revision"""
+        return await self.post(f'/content/{content_id}/revisions/{revision_id}/restore', {})
+
+
+async def run_on_sites(clients: Iterable[Any],
+                       operation: Callable[[Any], Union[Awaitable[Any], Any]],
+                       concurrency: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Run an operation against many sites at once
+
+    With AsyncWPBMClient instances every site runs on the event loop:
+    the operation is a coroutine function, or a plain function returning
+    an awaitable, e.g. lambda client: AsyncContentOperations(client)
+    .search_replace_content('old', 'new', dry_run=False). Blocking
+    WPBMClient instances are still accepted; their operations (the sync
+    *Operations classes) run in worker threads instead.
+
+    Args:
+        clients: AsyncWPBMClient (or WPBMClient) instances, one per site
+        operation: Called with each client
+        concurrency: Maximum sites in flight (default: all)
+
+    Returns:
+        Dictionary keyed by site URL with 'success' and 'result' or 'error'
+    """
+    clients = list(clients)
+    semaphore = asyncio.Semaphore(concurrency or max(len(clients), 1))
+
+    async def run_one(client) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                if isinstance(client, AsyncWPBMClient):
+                    result = operation(client)
+                else:
+                    result = await asyncio.to_thread(operation, client)
+                if inspect.isawaitable(result):
+                    result = await result
+                return {'success': True, 'result': result}
+            except Exception as e:
+                logger.error(f"Operation failed for {client.site_url}: {e}")
+                return {'success': False, 'error': str(e)}
+
+    outcomes = await asyncio.gather(*(run_one(client) for client in clients))
+    return {client.site_url: outcome for client, outcome in zip(clients, outcomes)}
@@ -3,11 +3,17 @@ Base API client for WordPress Bulk Manager
 """
 import requests
 import json
+import math
+import os
 import time
-from typing import Dict, List, Optional, Union, Any
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Union, Any
 from urllib.parse import urljoin
 import logging
 
+from requests.adapters import HTTPAdapter
+
 from ..utils.cache import CacheManager
 from ..utils.logger import get_logger
 from .auth import APIKeyManager
@@ -19,18 +25,54 @@ class WPBMClient:
     """Base API client with caching, retries, and error handling"""
     
     def __init__(self, site_url: str, api_key: str, cache_enabled: bool = True, 
-                 cache_ttl: int = 300, max_retries: int = 3):
+                 cache_ttl: int = 300, max_retries: int = 3, max_workers: int = 4,
+                 cache_backend: str = 'file', cache_stale_ttl: int = 0,
+                 stale_while_revalidate: int = 0):
+        """
+        Initialize client
+        
+        Args:
+            site_url: WordPress site URL
+            api_key: API key from the client plugin
+            cache_enabled: Cache GET responses
+            cache_ttl: Seconds a cached response is used without asking the site
+            max_retries: Attempts per request before giving up
+            max_workers: Concurrent requests for paged fetches
+            cache_backend: 'file' or 'sqlite'
+            cache_stale_ttl: Seconds expired responses are kept so they can be
+                revalidated with a conditional request (0 = drop on expiry).
+                Kept copies are never returned without asking the site,
+                unless stale_while_revalidate allows it.
+            stale_while_revalidate: Opt in to returning an expired response
+                up to this many seconds old immediately while it is refreshed
+                in the background (0 = always wait for fresh data). Expired
+                entries are kept at least this long.
+        """
         self.site_url = site_url.rstrip('/')
         self.api_key = api_key
         self.cache_enabled = cache_enabled
-        self.cache = CacheManager(ttl=cache_ttl) if cache_enabled else None
+        self.cache = CacheManager(ttl=cache_ttl, backend=cache_backend,
+                                  stale_ttl=max(cache_stale_ttl, stale_while_revalidate)
+                                  ) if cache_enabled else None
         self.max_retries = max_retries
+        self.max_workers = max_workers
+        self.stale_while_revalidate = stale_while_revalidate
+        
+        # Identical GETs in flight share one fetch (single-flight)
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+        self._refresh_executor = None
         self.session = requests.Session()
         self.session.headers.update({
             'X-API-Key': api_key,
             'Content-Type': 'application/json'
         })
         
+        # Keep enough pooled connections for concurrent page fetches
+        adapter = HTTPAdapter(pool_maxsize=max(max_workers, 10))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
     def _build_url(self, endpoint: str) -> str:
         """Build full API URL"""
         base = f"{self.site_url}/wp-json/wpbm/v1"
@@ -55,73 +97,359 @@ class WPBMClient:
                     raise
                     
     def get(self, endpoint: str, params: Optional[Dict] = None, 
-            use_cache: bool = True) -> Dict[str, Any]:
-        """GET request with optional caching"""
+            use_cache: bool = True, revalidate: bool = False) -> Dict[str, Any]:
+        """
+        GET request with optional caching
+        
+        Concurrent calls for the same endpoint and params share a single
+        request. Expired entries that were stored with an ETag or
+        Last-Modified are revalidated with a conditional request; a 304
+        reply refreshes the cached copy without transferring the body again.
+        Within the stale_while_revalidate window an expired entry is returned
+        immediately and refreshed in the background instead. With revalidate,
+        even a fresh entry is checked with the site before it is used.
+        """
         cache_key = None
+        stale = None
+        meta = {}
         
         if self.cache and use_cache:
-            cache_key = self.cache.generate_key(endpoint, params)
-            cached = self.cache.get(cache_key)
-            if cached is not None:
-                logger.debug(f"Cache hit for {endpoint}")
-                return cached
+            cache_key = self.cache.resource_key(self.site_url, endpoint, params)
+            entry = self.cache.get_entry(cache_key, use_memory=not revalidate)
+            if entry is not None:
+                cached, meta, fresh = entry
+                if fresh and not revalidate:
+                    logger.debug(f"Cache hit for {endpoint}")
+                    return cached
+                stale = cached
                 
-        response = self._make_request('GET', endpoint, params=params)
+                stale_for = time.time() - meta.get('fetched_at', 0) - self.cache.ttl
+                if (self.stale_while_revalidate and not revalidate
+                        and stale_for <= self.stale_while_revalidate):
+                    logger.debug(f"Serving stale {endpoint} while revalidating")
+                    self._refresh_in_background(endpoint, params, cache_key, stale, meta)
+                    return stale
+                    
+        flight_key = json.dumps([endpoint, params, use_cache, revalidate], sort_keys=True, default=str)
+        return self._single_flight(
+            flight_key, lambda: self._fetch(endpoint, params, cache_key, stale, meta)
+        )
+    
+    def _fetch(self, endpoint: str, params: Optional[Dict], cache_key: Optional[str],
+               stale: Any, meta: Dict[str, Any]) -> Dict[str, Any]:
+        """Fetch from the site, revalidating a stale copy when validators allow"""
+        headers = {}
+        if stale is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+                
+        response = self._make_request('GET', endpoint, params=params, headers=headers)
+        
+        if response.status_code == 304 and stale is not None:
+            logger.debug(f"Not modified: {endpoint}")
+            # Record the revalidation time so the stale window restarts
+            self.cache.touch(cache_key, stale, meta={**meta, 'fetched_at': time.time()})
+            return stale
+            
         data = response.json()
         
         if cache_key and self.cache:
-            self.cache.set(cache_key, data)
+            meta = {'fetched_at': time.time()}
+            if response.headers.get('ETag'):
+                meta['etag'] = response.headers['ETag']
+            if response.headers.get('Last-Modified'):
+                meta['last_modified'] = response.headers['Last-Modified']
+            self.cache.set(cache_key, data, meta=meta)
             
         return data
     
+    def _single_flight(self, key: str, fetch) -> Any:
+        """Run fetch, or wait for an identical fetch already in flight"""
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+                
+        if not leader:
+            logger.debug("Joining in-flight request")
+            return future.result()
+            
+        try:
+            result = fetch()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+    
+    def _refresh_in_background(self, endpoint: str, params: Optional[Dict],
+                               cache_key: str, stale: Any, meta: Dict[str, Any]):
+        """Refresh a stale entry off the caller's thread, once per key"""
+        flight_key = json.dumps([endpoint, params, True, False], sort_keys=True, default=str)
+        with self._inflight_lock:
+            if flight_key in self._inflight:
+                return
+            if self._refresh_executor is None:
+                self._refresh_executor = ThreadPoolExecutor(
+                    max_workers=2, thread_name_prefix='wpbm-refresh'
+                )
+                
+        def refresh():
+            try:
+                self._single_flight(
+                    flight_key, lambda: self._fetch(endpoint, params, cache_key, stale, meta)
+                )
+            except Exception as e:
+                logger.warning(f"Background refresh of {endpoint} failed: {e}")
+                
+        self._refresh_executor.submit(refresh)
+    
     def post(self, endpoint: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """POST request"""
-        response = self._make_request('POST', endpoint, json=data)
+        try:
+            response = self._make_request('POST', endpoint, json=data)
+        finally:
+            # Dry runs change nothing; failed writes may still have applied
+            if not data.get('dry_run'):
+                self._invalidate('POST', endpoint)
         return response.json()
     
     def put(self, endpoint: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """PUT request"""
-        response = self._make_request('PUT', endpoint, json=data)
+        try:
+            response = self._make_request('PUT', endpoint, json=data)
+        finally:
+            self._invalidate('PUT', endpoint)
         return response.json()
     
     def delete(self, endpoint: str) -> Dict[str, Any]:
         """DELETE request"""
-        response = self._make_request('DELETE', endpoint)
+        try:
+            response = self._make_request('DELETE', endpoint)
+        finally:
+            self._invalidate('DELETE', endpoint)
         return response.json()
     
+    def _invalidate(self, method: str, endpoint: str):
+        """Drop cached responses a write may have made stale"""
+        if self.cache:
+            self.cache.invalidate_after_write(self.site_url, method, endpoint)
+    
     def get_content(self, content_type: str = 'page', limit: int = 100, 
-                    status: str = 'any', **kwargs) -> List[Dict]:
-        """Get content with pagination support"""
-        all_content = []
-        page = 1
+                    status: str = 'any', concurrency: Optional[int] = None,
+                    **kwargs) -> List[Dict]:
+        """
+        Get content with pagination support
         
-        while True:
-            params = {
-                'type': content_type,
-                'limit': limit,
-                'page': page,
-                'status': status,
-                **kwargs
-            }
+        The first page is fetched on its own to learn the page count, then
+        the remaining pages are fetched concurrently and returned in order.
+        If the response carries no total, pages are read ahead speculatively
+        one window at a time until a short page comes back.
+        
+        Args:
+            content_type: Post type to list
+            limit: Items per page
+            status: Post status filter
+            concurrency: Pages in flight at once (default: max_workers, 1 = sequential)
+        """
+        params = {
+            'type': content_type,
+            'limit': limit,
+            'status': status,
+            **kwargs
+        }
+        concurrency = concurrency or self.max_workers
+        
+        def fetch_page(page: int) -> List[Dict]:
+            return self.get('/content', params={**params, 'page': page}).get('posts', [])
+        
+        first = self.get('/content', params={**params, 'page': 1})
+        all_content = list(first.get('posts', []))
+        
+        if len(all_content) < limit:
+            return all_content
             
-            response = self.get('/content', params=params)
+        total_pages = self._total_pages(first, limit)
+        
+        if concurrency <= 1:
+            page = 2
+            while total_pages is None or page <= total_pages:
+                posts = fetch_page(page)
+                all_content.extend(posts)
+                if len(posts) < limit:
+                    break
+                page += 1
+            return all_content
+            
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            if total_pages is not None:
+                # Known page count: the pool bounds the window, map keeps order
+                for posts in executor.map(fetch_page, range(2, total_pages + 1)):
+                    all_content.extend(posts)
+            else:
+                # Unknown page count: read ahead a window at a time
+                page = 2
+                done = False
+                while not done:
+                    window = [executor.submit(fetch_page, p) 
+                              for p in range(page, page + concurrency)]
+                    for future in window:
+                        if done:
+                            future.cancel()
+                            continue
+                        posts = future.result()
+                        all_content.extend(posts)
+                        if len(posts) < limit:
+                            done = True
+                    page += concurrency
+                    
+        return all_content
+    
+    def iter_content_pages(self, content_type: str = 'page', limit: int = 100,
+                           status: str = 'any', prefetch: bool = True,
+                           use_cache: bool = True, start_page: int = 1,
+                           **kwargs) -> Iterator[Dict[str, Any]]:
+        """
+        Yield /content listing responses one page at a time
+        
+        While the caller works through a page, the next one is fetched in a
+        background thread, so at most two pages are held in memory.
+        
+        Args:
+            content_type: Post type to list
+            limit: Items per page
+            status: Post status filter
+            prefetch: Fetch the next page while the current one is consumed
+            use_cache: Serve pages from the cache when possible
+            start_page: First page to fetch, e.g. to resume a scan
+        """
+        params = {
+            'type': content_type,
+            'limit': limit,
+            'status': status,
+            **kwargs
+        }
+        
+        def fetch_page(page: int) -> Dict[str, Any]:
+            return self.get('/content', params={**params, 'page': page}, use_cache=use_cache)
+        
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        try:
+            page = start_page
+            total_pages = None
+            response = fetch_page(page)
+            
+            while True:
+                posts = response.get('posts', [])
+                if not posts:
+                    break
+                    
+                if total_pages is None:
+                    total_pages = self._total_pages(response, limit)
+                has_more = len(posts) >= limit and (total_pages is None or page < total_pages)
+                
+                future = executor.submit(fetch_page, page + 1) if has_more and executor else None
+                yield response
+                
+                if not has_more:
+                    break
+                    
+                page += 1
+                response = future.result() if future else fetch_page(page)
+        finally:
+            if executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+                
+    def iter_content_after(self, content_type: str = 'page', after_id: int = 0,
+                           limit: int = 100, status: str = 'any', use_cache: bool = True,
+                           **kwargs) -> Iterator[Dict[str, Any]]:
+        """
+        Yield /content listing responses in ID order, paging by keyset
+        
+        Each request asks for the posts after the last ID seen rather than
+        for a page number, so posts deleted or changing status in the
+        meantime (or between runs, when resuming from a saved ID) can't
+        shift later posts out of view. Sites whose plugin ignores after_id
+        are paged through by number instead, dropping posts up to after_id.
+        
+        Args:
+            content_type: Post type to list
+            after_id: Only posts with a higher ID
+            limit: Items per page
+            status: Post status filter
+            use_cache: Serve pages from the cache when possible
+        """
+        params = {
+            'type': content_type,
+            'limit': limit,
+            'status': status,
+            'orderby': 'id',
+            'order': 'ASC',
+            **kwargs
+        }
+        
+        while True:
+            response = self.get('/content', params={**params, 'after_id': after_id}, use_cache=use_cache)
             posts = response.get('posts', [])
             
+            if posts and after_id and int(posts[0]['id']) <= after_id:
+                logger.info(f"{self.site_url} ignores after_id, paging by number instead")
+                for page in self.iter_content_pages(content_type, limit, status, use_cache=use_cache, **kwargs):
+                    remaining = [post for post in page.get('posts', []) if int(post['id']) > after_id]
+                    if remaining:
+                        yield {**page, 'posts': remaining}
+                return
+                
             if not posts:
                 break
-                
-            all_content.extend(posts)
-            
+            yield response
             if len(posts) < limit:
                 break
-                
-            page += 1
+            after_id = int(posts[-1]['id'])
             
-        return all_content
+    def iter_content(self, content_type: str = 'page', limit: int = 100,
+                     status: str = 'any', prefetch: bool = True,
+                     **kwargs) -> Iterator[Dict]:
+        """Yield content items one by one, streaming pages with prefetch"""
+        for response in self.iter_content_pages(content_type, limit, status,
+                                                prefetch=prefetch, **kwargs):
+            yield from response.get('posts', [])
+            
+    @staticmethod
+    def _total_pages(response: Dict[str, Any], limit: int) -> Optional[int]:
+        """Read the page count from a listing response, if the server sent one"""
+        try:
+            if response.get('pages'):
+                return int(response['pages'])
+            if response.get('total'):
+                return math.ceil(int(response['total']) / limit)
+        except (TypeError, ValueError):
+            pass
+        return None
     
-    def get_content_by_id(self, content_id: int) -> Dict[str, Any]:
-        """Get single content item"""
-        return self.get(f'/content/{content_id}')
+    def get_content_manifest(self, content_type: str = 'page',
+                             status: str = 'any') -> List[List[Any]]:
+        """
+        Get [id, modified_gmt] for every item of a content type
+        
+        Much smaller than a listing, so sync can detect deletions and
+        missed changes without downloading content. Always revalidated,
+        so an unchanged manifest costs only a 304.
+        """
+        response = self.get('/content/manifest', params={'type': content_type, 'status': status},
+                            revalidate=True)
+        return response.get('items', [])
+    
+    def get_content_by_id(self, content_id: int, use_cache: bool = True) -> Dict[str, Any]:
+        """Get single content item (use_cache=False for a live copy)"""
+        return self.get(f'/content/{content_id}', use_cache=use_cache)
     
     def update_content(self, content_id: int, data: Dict[str, Any]) -> Dict[str, Any]:
         """Update content"""
@@ -148,7 +476,40 @@ class WPBMClient:
     
     def get_media(self, limit: int = 100, **kwargs) -> List[Dict]:
         """Get media items"""
-        return self.get('/media', params={'limit': limit, **kwargs})
+        response = self.get('/media', params={'limit': limit, **kwargs})
+        return response if isinstance(response, list) else response.get('media', [])
+    
+    def iter_media(self, limit: int = 100, use_cache: bool = True, **kwargs) -> Iterator[Dict]:
+        """Yield every media item, a page at a time"""
+        page = 1
+        while True:
+            response = self.get('/media', params={'limit': limit, 'page': page, **kwargs},
+                                use_cache=use_cache)
+            items = response if isinstance(response, list) else response.get('media', [])
+            yield from items
+            
+            total_pages = None if isinstance(response, list) else self._total_pages(response, limit)
+            if len(items) < limit or (total_pages is not None and page >= total_pages):
+                break
+            page += 1
+    
+    def upload_media(self, path: str, title: Optional[str] = None,
+                     mime_type: str = 'application/octet-stream') -> Dict[str, Any]:
+        """Upload a file to the media library as a new attachment"""
+        filename = os.path.basename(path)
+        with open(path, 'rb') as f:
+            body = f.read()
+            
+        headers = {
+            'Content-Type': mime_type,
+            'Content-Disposition': f'attachment; filename="{filename}"'
+        }
+        try:
+            response = self._make_request('POST', '/media', data=body, headers=headers,
+                                          params={'title': title} if title else None)
+        finally:
+            self._invalidate('POST', '/media')
+        return response.json()
     
     def backup_content(self, post_ids: List[int] = None) -> Dict[str, Any]:
         """Create backup before bulk operations"""
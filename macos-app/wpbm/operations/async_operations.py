@@ -0,0 +1,504 @@
+"""
+Asyncio content, media and plugin operations for WP Bulk Manager
+
+Counterparts of ContentOperations, MediaOperations and PluginOperations
+written against AsyncWPBMClient, so run_on_sites() can drive every site
+of a fleet from one event loop over one shared connection pool.
+"""
+import asyncio
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import aiohttp
+
+from ..api.async_client import AsyncWPBMClient
+from ..utils.logger import get_logger
+from .batch_writer import MAX_BULK_ITEMS, BatchWriter
+from .content import ContentOperations
+from .downloader import PART_SUFFIX, DownloadError, MediaDownloader
+from .replace_rules import ReplaceRule, ReplaceRuleSet
+
+logger = get_logger(__name__)
+
+# Request errors that fail one operation rather than the whole run
+REQUEST_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError)
+
+# Media files can be large: bound connecting and each read, not the whole transfer
+DOWNLOAD_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=60)
+
+
+class AsyncContentOperations:
+    """Search and replace across a site's content on an AsyncWPBMClient"""
+    
+    def __init__(self, client: AsyncWPBMClient):
+        self.client = client
+        
+    async def search_replace_content(self, search: str, replace: str,
+                                     post_types: List[str] = None,
+                                     dry_run: bool = True,
+                                     progress_callback: Optional[Callable] = None,
+                                     write_concurrency: int = 4,
+                                     batch_size: int = 50) -> Dict:
+        """
+        Search and replace across content
+        
+        Args:
+            search: Text to search for
+            replace: Replacement text
+            post_types: Post types to search (default: post, page)
+            dry_run: Preview changes without applying
+            progress_callback: Callback for progress updates
+            write_concurrency: Write requests in flight at once
+            batch_size: Updates per /bulk/content request (0 = one PUT per post)
+            
+        Returns:
+            Dictionary with results
+        """
+        rules = ReplaceRuleSet([ReplaceRule(search, replace)])
+        return await self.apply_replace_rules(rules, post_types, dry_run, progress_callback,
+                                              write_concurrency, batch_size)
+                                              
+    async def apply_replace_rules(self, rules: ReplaceRuleSet,
+                                  post_types: List[str] = None,
+                                  dry_run: bool = True,
+                                  progress_callback: Optional[Callable] = None,
+                                  write_concurrency: int = 4,
+                                  batch_size: int = 50) -> Dict:
+        """
+        Apply a whole rule set to each post, like ContentOperations.apply_replace_rules
+        
+        Pages of full, uncached content are requested together and scanned
+        as they arrive. Each page's updates are sent while later pages are
+        still being scanned, at most write_concurrency requests at a time.
+        Jobs that must survive an interruption (journal, backup store)
+        need the sync ContentOperations.
+        
+        Args:
+            rules: Search/replace rules, e.g. ReplaceRuleSet.from_mapping(spellings)
+            post_types: Post types to search (default: post, page)
+            dry_run: Preview changes without applying
+            progress_callback: Callback for progress updates
+            write_concurrency: Write requests in flight at once
+            batch_size: Updates per /bulk/content request (0 = one PUT per post)
+            
+        Returns:
+            Dictionary with results, including match counts per rule
+        """
+        post_types = post_types or ['post', 'page']
+        results = {
+            'total_posts': 0,
+            'posts_modified': 0,
+            'total_replacements': 0,
+            'rule_matches': {},
+            'changes': [],
+            'errors': []
+        }
+        rules.compile()
+        slots = asyncio.Semaphore(write_concurrency)
+        batch_size = min(batch_size, MAX_BULK_ITEMS)
+        writes = []
+        processed = 0
+        
+        try:
+            for post_type in post_types:
+                params = {'type': post_type, 'status': 'any', 'full': 1}
+                async for posts in self.client.iter_pages('/content', 'posts', params, use_cache=False):
+                    results['total_posts'] += len(posts)
+                    updates = []
+                    
+                    for post in posts:
+                        processed += 1
+                        if progress_callback:
+                            progress_callback(processed, results['total_posts'], f"Processing {post['title']}")
+                            
+                        update_data = ContentOperations._search_replace_post(post, rules, results)
+                        if update_data and not dry_run:
+                            updates.append((post['id'], update_data))
+                            
+                    if batch_size:
+                        writes.extend(
+                            asyncio.ensure_future(self._write_batch(updates[start:start + batch_size], slots, results))
+                            for start in range(0, len(updates), batch_size)
+                        )
+                    else:
+                        writes.extend(
+                            asyncio.ensure_future(self._put(post_id, update_data, slots, results))
+                            for post_id, update_data in updates
+                        )
+        finally:
+            # Let updates already started finish so results are complete on return
+            if writes:
+                await asyncio.gather(*writes, return_exceptions=True)
+                
+        return results
+        
+    async def _write_batch(self, updates: List[Tuple[int, Dict]], slots: asyncio.Semaphore,
+                           results: Dict):
+        """Send one batch to /bulk/content, falling back to a PUT per post"""
+        site_endpoint = (self.client.site_url, '/bulk/content')
+        
+        if site_endpoint not in BatchWriter._unsupported:
+            try:
+                async with slots:
+                    response = await self.client.post('/bulk/content', {
+                        'updates': [{**update_data, 'id': post_id} for post_id, update_data in updates]
+                    })
+            except aiohttp.ClientResponseError as e:
+                if e.status not in (404, 405):
+                    self._record_all(updates, e, results)
+                    return
+                logger.info(f"{self.client.site_url} has no /bulk/content, using per-item requests")
+                BatchWriter._unsupported.add(site_endpoint)
+            except REQUEST_ERRORS as e:
+                self._record_all(updates, e, results)
+                return
+            else:
+                items = response.get('results') if isinstance(response, dict) else None
+                if isinstance(items, list) and len(items) == len(updates):
+                    for (post_id, _), item in zip(updates, items):
+                        self._record(post_id, None if item.get('success') else
+                                     item.get('error') or 'Update failed', results)
+                    return
+                if isinstance(response, dict) and not response.get('failed'):
+                    # Older servers only return counts; with no failures every item applied
+                    for post_id, _ in updates:
+                        self._record(post_id, None, results)
+                    return
+                # Failures we can't attribute: updates by ID are safe to resend individually
+                logger.warning(f"/bulk/content reported {response.get('failed')} failures without per-item results")
+                
+        await asyncio.gather(*(self._put(post_id, update_data, slots, results)
+                               for post_id, update_data in updates))
+                               
+    async def _put(self, post_id: int, update_data: Dict, slots: asyncio.Semaphore, results: Dict):
+        """PUT one update"""
+        try:
+            async with slots:
+                await self.client.update_content(post_id, update_data)
+        except REQUEST_ERRORS as e:
+            logger.error(f"Error updating post {post_id}: {e}")
+            self._record(post_id, e, results)
+        else:
+            self._record(post_id, None, results)
+            
+    @staticmethod
+    def _record(post_id: int, error: Any, results: Dict):
+        """Count a finished update or record its error"""
+        if error is None:
+            results['posts_modified'] += 1
+        else:
+            results['errors'].append({
+                'post_id': post_id,
+                'error': str(error)
+            })
+            
+    def _record_all(self, updates: List[Tuple[int, Dict]], error: Exception, results: Dict):
+        """Fail every update of a batch whose request failed"""
+        logger.error(f"Bulk request to /bulk/content failed: {error}")
+        for post_id, _ in updates:
+            self._record(post_id, error, results)
+
+
+class AsyncMediaOperations:
+    """Media library listing and downloads on an AsyncWPBMClient"""
+    
+    def __init__(self, client: AsyncWPBMClient):
+        self.client = client
+        
+    async def list_media(self) -> List[Dict]:
+        """Every media item, with pages after the first requested together"""
+        media = []
+        async for items in self.client.iter_pages('/media', 'media'):
+            media.extend(items)
+        return media
+        
+    async def bulk_download_media(self, media_ids: List[int] = None,
+                                  output_dir: str = './media_downloads',
+                                  progress_callback: Optional[Callable] = None,
+                                  max_concurrency: int = 8,
+                                  chunk_size: int = 1024 * 1024) -> Dict:
+        """
+        Bulk download media files, like MediaOperations.bulk_download_media
+        
+        Files stream to disk over the client's session: files already in
+        output_dir with the right size are skipped, and partial files left
+        by an interrupted run (by either downloader) are resumed.
+        
+        Args:
+            media_ids: Specific media IDs to download (None for all)
+            output_dir: Directory to save files
+            progress_callback: Progress callback function
+            max_concurrency: Downloads in flight at once
+            chunk_size: Bytes read from the network per write
+            
+        Returns:
+            Download results
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        
+        results = {
+            'total': 0,
+            'downloaded': 0,
+            'resumed': 0,
+            'skipped': 0,
+            'failed': 0,
+            'bytes': 0,
+            'files': [],
+            'errors': []
+        }
+        
+        if media_ids:
+            media_items = []
+            for media_id, item in await asyncio.gather(*(self._get_media(media_id) for media_id in media_ids)):
+                if item is None:
+                    results['errors'].append({
+                        'media_id': media_id,
+                        'error': 'Media not found'
+                    })
+                else:
+                    media_items.append(item)
+        else:
+            media_items = await self.list_media()
+            
+        results['total'] = len(media_items)
+        
+        files = []
+        items_by_path = {}
+        for item in media_items:
+            media_url = item.get('source_url') or item.get('guid', {}).get('rendered')
+            
+            if not media_url:
+                results['failed'] += 1
+                results['errors'].append({
+                    'media_id': item['id'],
+                    'title': item.get('title', 'Unknown'),
+                    'error': 'No media URL found'
+                })
+                continue
+                
+            # Determine filename; uploads from different months can share one
+            filename = os.path.basename(urlparse(media_url).path)
+            if not filename:
+                filename = f"media_{item['id']}"
+            filepath = os.path.join(output_dir, filename)
+            if filepath in items_by_path:
+                filepath = os.path.join(output_dir, f"{item['id']}_{filename}")
+                
+            items_by_path[filepath] = item
+            expected_size = (item.get('media_details') or {}).get('filesize') or None
+            files.append((media_url, filepath, expected_size))
+            
+        slots = asyncio.Semaphore(max_concurrency)
+        
+        async def fetch(entry: Tuple[str, str, Optional[int]]) -> Tuple[Tuple, Dict]:
+            async with slots:
+                try:
+                    return entry, await self._download(*entry, chunk_size=chunk_size)
+                except (OSError, DownloadError, *REQUEST_ERRORS) as e:
+                    logger.error(f"Error downloading {entry[0]}: {e}")
+                    return entry, {'path': entry[1], 'status': 'failed', 'bytes': 0, 'error': str(e)}
+                    
+        for done, next_file in enumerate(asyncio.as_completed([fetch(entry) for entry in files]), 1):
+            (_, filepath, _), result = await next_file
+            item = items_by_path[filepath]
+            if progress_callback:
+                progress_callback(done, len(files), f"{result['status'].capitalize()} {os.path.basename(filepath)}")
+                
+            if result['status'] == 'failed':
+                results['failed'] += 1
+                results['errors'].append({
+                    'media_id': item['id'],
+                    'title': item.get('title', 'Unknown'),
+                    'error': result['error']
+                })
+                continue
+                
+            results[result['status']] += 1
+            results['bytes'] += result['bytes']
+            results['files'].append({'media_id': item['id'], 'path': filepath})
+            if result['status'] != 'skipped':
+                logger.info(f"Downloaded: {filepath}")
+                
+        return results
+        
+    async def _get_media(self, media_id: int) -> Tuple[int, Optional[Dict]]:
+        """A media item by ID, or None if it can't be fetched"""
+        try:
+            return media_id, await self.client.get(f'/media/{media_id}')
+        except REQUEST_ERRORS as e:
+            logger.error(f"Error fetching media {media_id}: {e}")
+            return media_id, None
+            
+    async def _download(self, url: str, dest: str, expected_size: Optional[int],
+                        chunk_size: int = 1024 * 1024) -> Dict[str, Any]:
+        """Download one file, skipping or resuming where possible (see MediaDownloader.download)"""
+        session = self.client.session
+        
+        if os.path.exists(dest):
+            if expected_size is None:
+                expected_size = await self._remote_size(url)
+            if expected_size is not None and os.path.getsize(dest) == expected_size:
+                return {'path': dest, 'status': 'skipped', 'bytes': 0}
+                
+        part_path = dest + PART_SUFFIX
+        meta_path = part_path + '.json'
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        # Byte ranges and lengths must refer to the file itself, not a compressed body
+        headers = {'Accept-Encoding': 'identity'}
+        
+        if offset:
+            validator = MediaDownloader._read_validator(meta_path)
+            if validator:
+                headers['Range'] = f'bytes={offset}-'
+                headers['If-Range'] = validator
+            else:
+                # No validator to prove the file is unchanged: start over
+                offset = 0
+                
+        async with session.get(url, headers=headers, timeout=DOWNLOAD_TIMEOUT) as response:
+            if response.status == 416 and offset:
+                # Nothing left to fetch: the part file is already complete
+                transferred = 0
+            else:
+                response.raise_for_status()
+                if response.status != 206:
+                    offset = 0  # Server sent the whole file
+                if expected_size is None:
+                    # Catch connections that close early
+                    expected_size = self._total_size(response)
+                MediaDownloader._write_validator(meta_path, response)
+                transferred = await self._write(response, part_path, offset > 0, chunk_size)
+                
+        if expected_size is not None and os.path.getsize(part_path) != expected_size:
+            # Don't resume from a bad file next time
+            os.unlink(part_path)
+            MediaDownloader._remove(meta_path)
+            raise DownloadError(f"{url} does not match its expected size")
+            
+        os.replace(part_path, dest)
+        MediaDownloader._remove(meta_path)
+        
+        return {'path': dest, 'status': 'resumed' if offset else 'downloaded', 'bytes': transferred}
+        
+    @staticmethod
+    async def _write(response: aiohttp.ClientResponse, part_path: str, append: bool,
+                     chunk_size: int) -> int:
+        """Stream a response body into the part file, writing from a worker thread"""
+        transferred = 0
+        f = await asyncio.to_thread(open, part_path, 'ab' if append else 'wb')
+        try:
+            async for chunk in response.content.iter_chunked(chunk_size):
+                await asyncio.to_thread(f.write, chunk)
+                transferred += len(chunk)
+        finally:
+            await asyncio.to_thread(f.close)
+        return transferred
+        
+    async def _remote_size(self, url: str) -> Optional[int]:
+        """Content-Length from a HEAD request, if the server gives one"""
+        try:
+            async with self.client.session.head(url, allow_redirects=True,
+                                                timeout=DOWNLOAD_TIMEOUT) as response:
+                if response.status < 400:
+                    return response.content_length
+        except REQUEST_ERRORS as e:
+            logger.debug(f"HEAD {url} failed: {e}")
+        return None
+        
+    @staticmethod
+    def _total_size(response: aiohttp.ClientResponse) -> Optional[int]:
+        """Full file size from Content-Range (206) or Content-Length (200)"""
+        if response.status == 206:
+            total = response.headers.get('Content-Range', '').rpartition('/')[2]
+            return int(total) if total.isdigit() else None
+        return response.content_length
+
+
+class AsyncPluginOperations:
+    """Plugin listing and updates on an AsyncWPBMClient"""
+    
+    def __init__(self, client: AsyncWPBMClient):
+        self.client = client
+        
+    async def list_plugins(self) -> List[Dict]:
+        """
+        List all plugins on the site
+        
+        Returns:
+            List of plugin information
+        """
+        try:
+            return await self.client.list_plugins()
+        except REQUEST_ERRORS as e:
+            logger.error(f"Error listing plugins: {e}")
+            return []
+            
+    async def get_plugins_with_updates(self) -> List[Dict]:
+        """
+        Get list of plugins that have updates available
+        
+        Returns:
+            List of plugins with updates
+        """
+        try:
+            result = await self.client.get('/plugins', {'force_update_check': 1})
+            all_plugins = result['plugins'] if isinstance(result, dict) and 'plugins' in result else \
+                result if isinstance(result, list) else []
+        except REQUEST_ERRORS as e:
+            logger.error(f"Error checking for plugin updates: {e}")
+            all_plugins = await self.list_plugins()
+            
+        return [p for p in all_plugins if p.get('update_available', False)]
+        
+    async def update_plugin(self, plugin_file: str) -> Dict:
+        """
+        Update a plugin to latest version
+        
+        Args:
+            plugin_file: Plugin file
+            
+        Returns:
+            Update result
+        """
+        logger.info(f"Updating plugin: {plugin_file}")
+        return await self.client.post('/plugins/update', {'plugin_file': plugin_file})
+        
+    async def update_all_plugins(self, progress_callback: Optional[Callable] = None) -> Dict:
+        """
+        Update all plugins that have updates available
+        
+        A site's plugins are updated one after another (WordPress's
+        upgrader isn't safe to run twice at once on one site); run this
+        on many sites with run_on_sites() to update them side by side.
+        
+        Args:
+            progress_callback: Callback for progress updates
+            
+        Returns:
+            Update results
+        """
+        plugins_to_update = await self.get_plugins_with_updates()
+        results = {
+            'total': len(plugins_to_update),
+            'success': 0,
+            'failed': 0,
+            'results': []
+        }
+        
+        for i, plugin in enumerate(plugins_to_update):
+            if progress_callback:
+                progress_callback(i + 1, len(plugins_to_update), f"Updating {plugin.get('name', 'Unknown')}")
+                
+            try:
+                result = await self.update_plugin(plugin['plugin_file'])
+            except REQUEST_ERRORS as e:
+                logger.error(f"Error updating plugin {plugin.get('name')}: {e}")
+                results['failed'] += 1
+                results['results'].append({'plugin': plugin.get('name'), 'error': str(e)})
+                continue
+                
+            results['success' if result.get('success') else 'failed'] += 1
+            results['results'].append({'plugin': plugin.get('name'), 'result': result})
+            
+        return results
@@ -0,0 +1,236 @@
+"""
+Batched write-back to the bulk endpoints for WP Bulk Manager
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import json
+import threading
+
+import requests
+
+from ..api.client import WPBMClient
+from ..utils.logger import get_logger
+from .writer import SiteLimiter
+
+logger = get_logger(__name__)
+
+# Bulk endpoint, per-item fallback endpoint and the key item data is sent
+# under in a bulk request (None = merged into the item next to 'id')
+BULK_ENDPOINTS = {
+    'content': ('/bulk/content', '/content/{id}', None),
+    'seo': ('/seo/bulk', '/seo/{id}', 'seo'),
+    'media': ('/media/bulk', '/media/{id}', None),
+}
+
+# Server-side cap on items per bulk request (MAX_BULK_ITEMS in the plugin)
+MAX_BULK_ITEMS = 100
+
+
+class BatchItemError(Exception):
+    """An item the server rejected inside an otherwise successful batch"""
+
+
+class BatchWriter:
+    """
+    Collect updates and send them to a bulk endpoint in bounded batches
+    
+    A batch is flushed once it holds max_items updates or max_bytes of
+    JSON, and batches are sent concurrently within the site's limits.
+    Per-item results from the server are mapped back to each update's
+    callback, so one bad item doesn't fail its whole batch. Sites whose
+    plugin has no bulk endpoint get one PUT per item instead, sent
+    concurrently within the same limits.
+    
+    Has the same submit/close interface as ParallelWriter.
+    """
+    
+    # (site URL, bulk endpoint) pairs known to be missing
+    _unsupported = set()
+    
+    def __init__(self, client: WPBMClient, kind: str = 'content', max_items: int = 50,
+                 max_bytes: int = 512 * 1024, max_concurrency: Optional[int] = None,
+                 rate_limit: float = 0):
+        """
+        Initialize batch writer
+        
+        Args:
+            client: API client for the site
+            kind: 'content', 'seo' or 'media'
+            max_items: Updates per bulk request (capped at MAX_BULK_ITEMS)
+            max_bytes: Approximate JSON body size per bulk request
+            max_concurrency: Requests in flight at once (default: client.max_workers)
+            rate_limit: Maximum requests started per second (0 = unlimited)
+        """
+        if kind not in BULK_ENDPOINTS:
+            raise ValueError(f"Unknown batch kind: {kind}")
+            
+        self.client = client
+        self.kind = kind
+        self.bulk_endpoint, self.item_endpoint, self.item_field = BULK_ENDPOINTS[kind]
+        self.max_items = max(1, min(max_items, MAX_BULK_ITEMS))
+        self.max_bytes = max_bytes
+        
+        max_concurrency = max_concurrency or client.max_workers
+        self.max_concurrency = max_concurrency
+        self.limiter = SiteLimiter.for_site(client.site_url, max_concurrency, rate_limit)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix='wpbm-batch'
+        )
+        # Bound the batches waiting to be sent so memory stays bounded
+        self._pending = threading.BoundedSemaphore(max_concurrency * 2)
+        self._callback_lock = threading.Lock()
+        self._batch: List[Tuple[Any, Dict, Dict, Optional[Callable]]] = []
+        self._batch_bytes = 0
+        
+        self.stats = {
+            'submitted': 0,
+            'bulk_requests': 0,
+            'item_requests': 0
+        }
+        
+    @property
+    def bulk_supported(self) -> bool:
+        """Whether the site is still believed to have the bulk endpoint"""
+        return (self.client.site_url, self.bulk_endpoint) not in self._unsupported
+        
+    def submit(self, item_id: Any, data: Dict[str, Any],
+               callback: Optional[Callable[[Any, Optional[Dict], Optional[Exception]], None]] = None):
+        """
+        Queue an update, flushing the batch when it is full
+        
+        Args:
+            item_id: Post or media ID
+            data: Fields to update
+            callback: Called as callback(item_id, result, error) when done
+        """
+        item = {'id': item_id, self.item_field: data} if self.item_field else {**data, 'id': item_id}
+        size = len(json.dumps(item))
+        
+        if self._batch and self._batch_bytes + size > self.max_bytes:
+            self.flush()
+            
+        self._batch.append((item_id, data, item, callback))
+        self._batch_bytes += size
+        self.stats['submitted'] += 1
+        
+        if len(self._batch) >= self.max_items:
+            self.flush()
+            
+    def flush(self):
+        """Send the current batch in the background"""
+        if not self._batch:
+            return
+            
+        batch, self._batch, self._batch_bytes = self._batch, [], 0
+        self._pending.acquire()
+        self._executor.submit(self._send_batch, batch)
+        
+    def close(self):
+        """Flush the last batch and wait for every request to finish"""
+        self.flush()
+        self._executor.shutdown(wait=True)
+        self.limiter.release()
+        
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, *exc):
+        self.close()
+        return False
+        
+    def _send_batch(self, batch: List[Tuple]):
+        """Worker: send one batch, falling back to per-item requests"""
+        try:
+            if self.bulk_supported:
+                try:
+                    with self.limiter:
+                        self._count('bulk_requests')
+                        response = self.client.post(self.bulk_endpoint, {'updates': [entry[2] for entry in batch]})
+                except requests.exceptions.HTTPError as e:
+                    status = e.response.status_code if e.response is not None else None
+                    if status not in (404, 405):
+                        self._report_all(batch, e)
+                        return
+                    logger.info(f"{self.client.site_url} has no {self.bulk_endpoint}, using per-item requests")
+                    self._unsupported.add((self.client.site_url, self.bulk_endpoint))
+                except Exception as e:
+                    self._report_all(batch, e)
+                    return
+                else:
+                    if self._report_bulk(batch, response):
+                        return
+                        
+            self._send_items(batch)
+        finally:
+            self._pending.release()
+            
+    def _report_bulk(self, batch: List[Tuple], response: Dict) -> bool:
+        """Map per-item results back to callbacks; False if they can't be mapped"""
+        results = response.get('results')
+        
+        if isinstance(results, list) and len(results) == len(batch):
+            for (item_id, _, _, callback), result in zip(batch, results):
+                if result.get('success'):
+                    self._report(callback, item_id, result, None)
+                else:
+                    self._report(callback, item_id, result,
+                                 BatchItemError(result.get('error') or 'Update failed'))
+            return True
+            
+        if not response.get('failed'):
+            # Older servers only return counts; with no failures every item applied
+            for item_id, _, _, callback in batch:
+                self._report(callback, item_id, {'id': item_id, 'success': True}, None)
+            return True
+            
+        # Failures we can't attribute: resend individually to find them
+        logger.warning(f"{self.bulk_endpoint} reported {response.get('failed')} failures without per-item results")
+        return False
+        
+    def _send_items(self, batch: List[Tuple]):
+        """PUT each update on its own, several at once"""
+        if len(batch) == 1 or self.max_concurrency == 1:
+            for entry in batch:
+                self._send_item(entry)
+            return
+            
+        # The site limiter still bounds requests across all batches
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(batch)),
+                                thread_name_prefix='wpbm-batch-item') as executor:
+            list(executor.map(self._send_item, batch))
+            
+    def _send_item(self, entry: Tuple):
+        """PUT one update"""
+        item_id, data, _, callback = entry
+        try:
+            with self.limiter:
+                self._count('item_requests')
+                result = self.client.put(self.item_endpoint.format(id=item_id), data)
+        except Exception as e:
+            logger.error(f"Error updating {self.kind} {item_id}: {e}")
+            self._report(callback, item_id, None, e)
+        else:
+            self._report(callback, item_id, result, None)
+                
+    def _report_all(self, batch: List[Tuple], error: Exception):
+        """Fail every item of a batch whose request failed"""
+        logger.error(f"Bulk request to {self.bulk_endpoint} failed: {error}")
+        for item_id, _, _, callback in batch:
+            self._report(callback, item_id, None, error)
+            
+    def _count(self, stat: str):
+        """Increment a stat from a worker thread"""
+        with self._callback_lock:
+            self.stats[stat] += 1
+            
+    def _report(self, callback: Optional[Callable], item_id: Any,
+                result: Optional[Dict], error: Optional[Exception]):
+        """Run a callback, one at a time"""
+        if not callback:
+            return
+            
+        with self._callback_lock:
+            try:
+                callback(item_id, result, error)
+            except Exception as e:
+                logger.error(f"Batch callback failed for {self.kind} {item_id}: {e}")
@@ -1,13 +1,16 @@
 """
 Content operations for WP Bulk Manager
 """
-from typing import Dict, List, Optional, Callable
-import re
+from typing import Dict, Iterator, List, Optional, Callable
 import time
-from datetime import datetime
 
 from ..api.client import WPBMClient
+from ..utils.backup_store import BackupStore
 from ..utils.logger import get_logger
+from .replace_rules import ReplaceRule, ReplaceRuleSet
+from .batch_writer import BatchWriter
+from .journal import Job, JobJournal
+from .writer import ParallelWriter
 
 logger = get_logger(__name__)
 
@@ -21,7 +24,12 @@ class ContentOperations:
     def search_replace_content(self, search: str, replace: str, 
                               post_types: List[str] = None,
                               dry_run: bool = True,
-                              progress_callback: Optional[Callable] = None) -> Dict:
+                              progress_callback: Optional[Callable] = None,
+                              write_concurrency: Optional[int] = None,
+                              rate_limit: float = 0,
+                              batch_size: int = 50,
+                              journal: Optional[JobJournal] = None,
+                              backup_store: Optional[BackupStore] = None) -> Dict:
         """
         Search and replace across content
         
@@ -31,121 +39,325 @@ class ContentOperations:
             post_types: Post types to search (default: post, page)
             dry_run: Preview changes without applying
             progress_callback: Callback for progress updates
+            write_concurrency: Requests in flight at once (default: client.max_workers)
+            rate_limit: Maximum requests started per second (0 = unlimited)
+            batch_size: Updates per /bulk/content request (0 = one PUT per post)
+            journal: Record the job so an interrupted run can be resumed
+            backup_store: Record the original values of changed fields here first
             
         Returns:
             Dictionary with results
         """
+        rules = ReplaceRuleSet([ReplaceRule(search, replace)])
+        return self.apply_replace_rules(rules, post_types, dry_run, progress_callback,
+                                        write_concurrency, rate_limit, batch_size, journal,
+                                        backup_store)
+        
+    def apply_replace_rules(self, rules: ReplaceRuleSet,
+                            post_types: List[str] = None,
+                            dry_run: bool = True,
+                            progress_callback: Optional[Callable] = None,
+                            write_concurrency: Optional[int] = None,
+                            rate_limit: float = 0,
+                            batch_size: int = 50,
+                            journal: Optional[JobJournal] = None,
+                            backup_store: Optional[BackupStore] = None) -> Dict:
+        """
+        Apply a whole rule set to each post in a single pass over the content
+        
+        Updates are handed to a BatchWriter (or a ParallelWriter when
+        batch_size is 0), so the scan keeps going while earlier matches
+        are written concurrently.
+        
+        Content is scanned in ID order by keyset (posts after the last ID
+        seen). With a journal, every update is recorded before it is sent
+        and the last scanned ID is checkpointed per page. Rerunning the
+        same rules against the same site resumes the interrupted job:
+        unconfirmed or failed updates are resent as recorded (the full new
+        text, so resending can't apply a rule twice) and the scan continues
+        after the checkpointed ID, however many posts were deleted or
+        changed status in between. If the interrupted job had finished its
+        scan, only its outstanding updates are resent; it is then closed
+        and the content scanned afresh under a new job. A job whose scan
+        completes is closed (as failed if any update failed), so failures
+        never pin later runs to an old checkpoint.
+        
+        With a backup_store, the original title/content of each matched post
+        is recorded in a change-set and flushed before the page's updates
+        are sent, so the backup covers exactly the posts being changed.
+        
+        Args:
+            rules: Search/replace rules, e.g. ReplaceRuleSet.from_mapping(spellings)
+            post_types: Post types to search (default: post, page)
+            dry_run: Preview changes without applying
+            progress_callback: Callback for progress updates
+            write_concurrency: Requests in flight at once (default: client.max_workers)
+            rate_limit: Maximum requests started per second (0 = unlimited)
+            batch_size: Updates per /bulk/content request (0 = one PUT per post)
+            journal: Record the job so an interrupted run can be resumed
+            backup_store: Record the original values of changed fields here first
+            
+        Returns:
+            Dictionary with results, including match counts per rule
+        """
         post_types = post_types or ['post', 'page']
         results = {
             'total_posts': 0,
             'posts_modified': 0,
             'total_replacements': 0,
+            'rule_matches': {},
             'changes': [],
             'errors': []
         }
-        
-        # Get all content
-        for post_type in post_types:
-            posts = self.client.get_content(content_type=post_type)
-            results['total_posts'] += len(posts)
+        rules.compile()
+        writer = None
+        if not dry_run and batch_size:
+            writer = BatchWriter(self.client, 'content', max_items=batch_size,
+                                 max_concurrency=write_concurrency, rate_limit=rate_limit)
+        elif not dry_run:
+            writer = ParallelWriter(self.client, write_concurrency, rate_limit)
             
-            for i, post in enumerate(posts):
-                if progress_callback:
-                    progress_callback(i + 1, len(posts), f"Processing {post['title']}")
-                    
-                try:
-                    # Check content for matches
-                    content = post.get('content', '')
-                    title = post.get('title', '')
-                    
-                    # Count replacements
-                    content_matches = len(re.findall(re.escape(search), content))
-                    title_matches = len(re.findall(re.escape(search), title))
+        job = None
+        retry_job = None
+        checkpoint = None
+        if writer and journal:
+            params = {'rules': rules.describe(), 'post_types': post_types}
+            job = journal.resume_or_start('search_replace', self.client.site_url, params)
+            if job.resumed and job.scan_complete:
+                # Nothing left to scan for the old job: retry its updates, scan afresh
+                retry_job = job
+                job = journal.start('search_replace', self.client.site_url, retry_job.data['params'])
+                results['retried_job_id'] = retry_job.id
+            checkpoint = job.checkpoint
+            results['job_id'] = job.id
+            results['resumed_items'] = 0
+            results['skipped_posts'] = 0
+            
+        changeset = None
+        if writer and backup_store:
+            changeset = backup_store.changeset(self.client.site_url, label='search_replace')
+            results['changeset_id'] = changeset.changeset_id
+            
+        def recorder(target: Optional[Job]):
+            return lambda post_id, response, error: self._record_write(post_id, error, results, target)
+            
+        record = recorder(job)
+        resumed_ids = set()
+        
+        try:
+            resume_from = retry_job or (job if job and job.resumed else None)
+            if resume_from:
+                # Updates planned before the interruption that weren't confirmed
+                resumed = [(int(key), update_data) for key, update_data, _ in resume_from.unfinished()]
+                resume_from.mark_many((post_id for post_id, _ in resumed), 'running')
+                for post_id, update_data in resumed:
+                    writer.submit(post_id, update_data, recorder(resume_from))
+                    resumed_ids.add(post_id)
+                    results['resumed_items'] += 1
                     
-                    if content_matches > 0 or title_matches > 0:
-                        # Prepare replacement
-                        new_content = content.replace(search, replace)
-                        new_title = title.replace(search, replace)
-                        
-                        change = {
-                            'id': post['id'],
-                            'title': post['title'],
-                            'url': post.get('link', ''),
-                            'content_replacements': content_matches,
-                            'title_replacements': title_matches,
-                            'preview': {
-                                'before': content[:200] + '...' if len(content) > 200 else content,
-                                'after': new_content[:200] + '...' if len(new_content) > 200 else new_content
-                            }
-                        }
+            # Stream content page by page so memory is bounded by the page size
+            for type_index, post_type in enumerate(post_types):
+                processed = 0
+                total = 0
+                after_id = 0
+                if checkpoint:
+                    if type_index < checkpoint['type']:
+                        continue
+                    if type_index == checkpoint['type']:
+                        # Checkpoints from before keyset scans rescan the type;
+                        # journaled posts are skipped below
+                        after_id = checkpoint.get('after_id', 0)
                         
-                        results['changes'].append(change)
-                        results['total_replacements'] += content_matches + title_matches
-                        
-                        # Apply changes if not dry run
-                        if not dry_run:
-                            update_data = {}
-                            if content_matches > 0:
-                                update_data['content'] = new_content
-                            if title_matches > 0:
-                                update_data['title'] = new_title
-                                
-                            self.client.update_content(post['id'], update_data)
-                            results['posts_modified'] += 1
-                            
-                except Exception as e:
-                    logger.error(f"Error processing post {post['id']}: {e}")
-                    results['errors'].append({
-                        'post_id': post['id'],
-                        'error': str(e)
-                    })
+                # Full content, read live: a write pass must not work from a cached listing
+                pages = self.client.iter_content_after(content_type=post_type, after_id=after_id,
+                                                       use_cache=False, full=1)
+                
+                for page in pages:
+                    posts = page.get('posts', [])
+                    results['total_posts'] += len(posts)
+                    # With a cursor the server counts the posts after it
+                    total = total or processed + int(page.get('total') or len(posts))
+                    total = max(total, processed + len(posts))
+                    updates = []
                     
+                    for post in posts:
+                        processed += 1
+                        if progress_callback:
+                            progress_callback(processed, total, f"Processing {post['title']}")
+                            
+                        if post['id'] in resumed_ids or (job and job.state(post['id']) is not None):
+                            # Already journaled by an earlier run; its update is handled there
+                            results['skipped_posts'] += 1
+                            continue
+                            
+                        update_data = self._search_replace_post(post, rules, results)
+                        if update_data and writer:
+                            updates.append((post['id'], update_data))
+                            if changeset:
+                                changeset.record(post, update_data.keys())
+                                
+                    # Back up and journal the page's updates before any of them is sent
+                    if changeset and updates:
+                        changeset.flush()
+                    if job:
+                        job.plan(updates)
+                        job.mark_many((post_id for post_id, _ in updates), 'running')
+                    for post_id, update_data in updates:
+                        writer.submit(post_id, update_data, record)
+                    if job and posts:
+                        job.set_checkpoint({'type': type_index, 'after_id': int(posts[-1]['id'])})
+                        
+            if job:
+                job.set_scan_complete()
+        finally:
+            # Wait for queued writes so results are complete on return
+            if writer:
+                writer.close()
+            if changeset:
+                changeset.close()
+                
+        if retry_job:
+            retry_job.finish()
+        if job:
+            job.finish()
+            
         return results
         
-    def backup_before_bulk_operation(self, post_ids: List[int] = None) -> Dict:
+    @staticmethod
+    def _search_replace_post(post: Dict, rules: ReplaceRuleSet, results: Dict) -> Optional[Dict]:
+        """Apply a rule set to one post, record the change and return the update to send"""
+        try:
+            content = post.get('content', '')
+            title = post.get('title', '')
+            
+            # One scan per field finds and replaces every rule's matches
+            new_content, content_counts = rules.apply(content)
+            new_title, title_counts = rules.apply(title)
+            content_matches = sum(content_counts.values())
+            title_matches = sum(title_counts.values())
+            
+            if content_matches > 0 or title_matches > 0:
+                rule_matches = dict(content_counts)
+                for name, count in title_counts.items():
+                    rule_matches[name] = rule_matches.get(name, 0) + count
+                for name, count in rule_matches.items():
+                    results['rule_matches'][name] = results['rule_matches'].get(name, 0) + count
+                    
+                change = {
+                    'id': post['id'],
+                    'title': post['title'],
+                    'url': post.get('link', ''),
+                    'content_replacements': content_matches,
+                    'title_replacements': title_matches,
+                    'rule_matches': rule_matches,
+                    'preview': {
+                        'before': content[:200] + '...' if len(content) > 200 else content,
+                        'after': new_content[:200] + '...' if len(new_content) > 200 else new_content
+                    }
+                }
+                
+                results['changes'].append(change)
+                results['total_replacements'] += content_matches + title_matches
+                
+                update_data = {}
+                if content_matches > 0:
+                    update_data['content'] = new_content
+                if title_matches > 0:
+                    update_data['title'] = new_title
+                return update_data
+                
+        except Exception as e:
+            logger.error(f"Error processing post {post['id']}: {e}")
+            results['errors'].append({
+                'post_id': post['id'],
+                'error': str(e)
+            })
+        return None
+        
+    def _record_write(self, post_id: int, error: Optional[Exception], results: Dict,
+                      job: Optional[Job] = None):
+        """Writer callback: count a finished update or record its error"""
+        if job:
+            job.mark(post_id, 'done' if error is None else 'failed',
+                     error=str(error) if error else None)
+            
+        if error is None:
+            results['posts_modified'] += 1
+        else:
+            results['errors'].append({
+                'post_id': post_id,
+                'error': str(error)
+            })
+            
+    def backup_before_bulk_operation(self, post_ids: List[int] = None,
+                                     store: Optional[BackupStore] = None,
+                                     label: Optional[str] = None) -> Dict:
         """
         Create backup before bulk operations
         
+        Posts are streamed into a snapshot as they are fetched; only posts
+        that changed since an earlier snapshot in the store add new data.
+        
         Args:
             post_ids: Specific post IDs to backup (None for all)
+            store: Backup store to write to (default: ~/.wpbm/backups)
+            label: Optional note saved with the snapshot
             
         Returns:
-            Backup information
+            Backup information; backup_file is the snapshot manifest
         """
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        backup_data = {
-            'timestamp': timestamp,
-            'posts': []
-        }
+        store = store or BackupStore()
         
         if post_ids:
             # Backup specific posts
-            for post_id in post_ids:
-                try:
-                    post = self.client.get_content_by_id(post_id)
-                    backup_data['posts'].append(post)
-                except Exception as e:
-                    logger.error(f"Error backing up post {post_id}: {e}")
+            posts = self._iter_posts_by_id(post_ids)
         else:
-            # Backup all content
-            for post_type in ['post', 'page']:
-                posts = self.client.get_content(content_type=post_type)
-                backup_data['posts'].extend(posts)
-                
-        # Save backup locally
-        import json
-        backup_file = f"backup_{timestamp}.json"
-        with open(backup_file, 'w') as f:
-            json.dump(backup_data, f, indent=2)
+            # Backup all content with meta and SEO fields, streamed page by page
+            posts = (post for post_type in ['post', 'page']
+                     for post in self.client.iter_content(content_type=post_type, use_cache=False, full=1))
             
-        logger.info(f"Created backup with {len(backup_data['posts'])} posts: {backup_file}")
+        snapshot = store.snapshot(self.client.site_url, posts, label=label)
         
         return {
-            'backup_file': backup_file,
-            'post_count': len(backup_data['posts']),
-            'timestamp': timestamp
+            'backup_file': snapshot['manifest'],
+            **snapshot
         }
         
+    def backup_changes(self, post_fields: Dict[int, List[str]],
+                       store: Optional[BackupStore] = None,
+                       label: Optional[str] = None) -> Dict:
+        """
+        Back up only the fields a planned bulk operation will change
+        
+        Use with a dry run's plan, e.g. {change['id']: ['content', 'title']
+        for change in preview['changes']}, instead of a full-site backup.
+        
+        Args:
+            post_fields: Fields about to change, by post ID
+            store: Backup store to write to (default: ~/.wpbm/backups)
+            label: Optional note saved with the change-set
+            
+        Returns:
+            Change-set information
+        """
+        store = store or BackupStore()
+        changeset = store.changeset(self.client.site_url, label=label)
+        
+        with changeset:
+            for post in self._iter_posts_by_id(list(post_fields)):
+                changeset.record(post, post_fields[post['id']])
+                
+        return changeset.close()
+        
+    def _iter_posts_by_id(self, post_ids: List[int]) -> Iterator[Dict]:
+        """Fetch live copies of posts one at a time, skipping any that fail"""
+        for post_id in post_ids:
+            try:
+                # Backups record what is on the site now, never a cached copy
+                yield self.client.get_content_by_id(post_id, use_cache=False)
+            except Exception as e:
+                logger.error(f"Error backing up post {post_id}: {e}")
+                
     def get_revision_history(self, post_id: int) -> List[Dict]:
         """Get revision history for a post"""
         try:
@@ -0,0 +1,243 @@
+"""
+Concurrent, resumable file downloads for WP Bulk Manager
+"""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+from urllib.parse import urlparse
+import hashlib
+import json
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PART_SUFFIX = '.part'
+
+
+class DownloadError(Exception):
+    """A download that finished but doesn't match its expected size or checksum"""
+
+
+class MediaDownloader:
+    """
+    Download many files at once, resuming partial downloads
+    
+    Files download into a .part file next to the destination and are
+    renamed into place once complete and verified. An interrupted
+    download resumes with an HTTP Range request, guarded by If-Range
+    with the validator saved at its start, so a file that changed on the
+    server is fetched again instead of being spliced. Files already on
+    disk with the expected size (and checksum, if given) are skipped.
+    Each host gets one keep-alive session sized to the worker pool.
+    """
+    
+    def __init__(self, max_workers: int = 8, chunk_size: int = 1024 * 1024,
+                 timeout: Tuple[float, float] = (10, 60)):
+        """
+        Initialize downloader
+        
+        Args:
+            max_workers: Downloads in flight at once
+            chunk_size: Bytes read from the network per write
+            timeout: (connect, read) timeout in seconds
+        """
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+        
+    def session(self, url: str) -> requests.Session:
+        """Keep-alive session for the URL's host"""
+        host = urlparse(url).netloc
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._sessions[host] = session
+            return session
+            
+    def download(self, url: str, dest: str, expected_size: Optional[int] = None,
+                 expected_sha256: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Download one file, skipping or resuming where possible
+        
+        Args:
+            url: File URL
+            dest: Destination path
+            expected_size: Size in bytes, if known (saves a HEAD request when skipping)
+            expected_sha256: Hex SHA-256 the file must have, if known
+            
+        Returns:
+            Dictionary with path, status ('skipped', 'downloaded' or 'resumed') and bytes transferred
+        """
+        session = self.session(url)
+        
+        if os.path.exists(dest):
+            if expected_size is None and expected_sha256 is None:
+                expected_size = self._remote_size(session, url)
+            if (expected_size is not None or expected_sha256 is not None) and \
+                    self._matches(dest, expected_size, expected_sha256):
+                return {'path': dest, 'status': 'skipped', 'bytes': 0}
+                
+        part_path = dest + PART_SUFFIX
+        meta_path = part_path + '.json'
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        # Byte ranges and lengths must refer to the file itself, not a compressed body
+        headers = {'Accept-Encoding': 'identity'}
+        
+        if offset:
+            validator = self._read_validator(meta_path)
+            if validator:
+                headers['Range'] = f'bytes={offset}-'
+                headers['If-Range'] = validator
+            else:
+                # No validator to prove the file is unchanged: start over
+                offset = 0
+                
+        with session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+            if response.status_code == 416 and offset:
+                # Nothing left to fetch: the part file is already complete
+                transferred = 0
+            else:
+                response.raise_for_status()
+                if response.status_code != 206:
+                    offset = 0  # Server sent the whole file
+                if expected_size is None:
+                    # Catch connections that close early
+                    expected_size = self._total_size(response)
+                self._write_validator(meta_path, response)
+                transferred = self._write(response, part_path, append=offset > 0)
+                
+        if not self._matches(part_path, expected_size, expected_sha256):
+            # Don't resume from a bad file next time
+            os.unlink(part_path)
+            self._remove(meta_path)
+            raise DownloadError(f"{url} does not match its expected size or checksum")
+            
+        os.replace(part_path, dest)
+        self._remove(meta_path)
+        
+        return {'path': dest, 'status': 'resumed' if offset else 'downloaded', 'bytes': transferred}
+        
+    def download_all(self, files: Iterable[Tuple[str, str, Optional[int], Optional[str]]],
+                     progress_callback: Optional[Callable] = None) -> Iterator[Tuple[Tuple, Dict]]:
+        """
+        Download many files concurrently, yielding each as it finishes
+        
+        Args:
+            files: (url, dest, expected_size, expected_sha256) tuples
+            progress_callback: Callback for progress updates
+            
+        Yields:
+            (file tuple, result) where result has an 'error' key on failure
+        """
+        files = list(files)
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='wpbm-download') as executor:
+            futures = {executor.submit(self.download, *entry): entry for entry in files}
+            
+            for done, future in enumerate(as_completed(futures), 1):
+                entry = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Error downloading {entry[0]}: {e}")
+                    result = {'path': entry[1], 'status': 'failed', 'bytes': 0, 'error': str(e)}
+                    
+                if progress_callback:
+                    progress_callback(done, len(files), f"{result['status'].capitalize()} {os.path.basename(entry[1])}")
+                yield entry, result
+                
+    def close(self):
+        """Close every host session"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+            
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, *exc):
+        self.close()
+        return False
+        
+    def _write(self, response: requests.Response, part_path: str, append: bool) -> int:
+        """Stream a response body into the part file"""
+        transferred = 0
+        with open(part_path, 'ab' if append else 'wb') as f:
+            for chunk in response.iter_content(chunk_size=self.chunk_size):
+                f.write(chunk)
+                transferred += len(chunk)
+        return transferred
+        
+    def _remote_size(self, session: requests.Session, url: str) -> Optional[int]:
+        """Content-Length from a HEAD request, if the server gives one"""
+        try:
+            response = session.head(url, allow_redirects=True, timeout=self.timeout)
+            if response.ok and response.headers.get('Content-Length'):
+                return int(response.headers['Content-Length'])
+        except (requests.RequestException, ValueError) as e:
+            logger.debug(f"HEAD {url} failed: {e}")
+        return None
+        
+    @staticmethod
+    def _total_size(response: requests.Response) -> Optional[int]:
+        """Full file size from Content-Range (206) or Content-Length (200)"""
+        try:
+            if response.status_code == 206:
+                total = response.headers.get('Content-Range', '').rpartition('/')[2]
+                return int(total) if total and total != '*' else None
+            if response.headers.get('Content-Length'):
+                return int(response.headers['Content-Length'])
+        except ValueError:
+            pass
+        return None
+        
+    def _matches(self, path: str, expected_size: Optional[int],
+                 expected_sha256: Optional[str]) -> bool:
+        """Whether a file has the expected size and checksum, where known"""
+        if expected_size is not None and os.path.getsize(path) != expected_size:
+            return False
+        if expected_sha256 is not None and self._sha256(path) != expected_sha256.lower():
+            return False
+        return True
+        
+    def _sha256(self, path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(self.chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+        
+    @staticmethod
+    def _read_validator(meta_path: str) -> Optional[str]:
+        try:
+            with open(meta_path) as f:
+                return json.load(f).get('validator')
+        except (OSError, ValueError):
+            return None
+            
+    @staticmethod
+    def _write_validator(meta_path: str, response: requests.Response):
+        """Save the ETag (or Last-Modified) so a later resume can use If-Range"""
+        etag = response.headers.get('ETag')
+        validator = etag if etag and not etag.startswith('W/') else response.headers.get('Last-Modified')
+        if validator:
+            with open(meta_path, 'w') as f:
+                json.dump({'validator': validator}, f)
+        elif os.path.exists(meta_path):
+            os.unlink(meta_path)
+            
+    @staticmethod
+    def _remove(path: str):
+        if os.path.exists(path):
+            os.unlink(path)
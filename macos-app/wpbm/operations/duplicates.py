@@ -0,0 +1,245 @@
+"""
+Duplicate media detection for WP Bulk Manager
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import hashlib
+import os
+
+try:
+    from PIL import Image
+except ImportError:  # Optional: pip install Pillow
+    Image = None
+
+from ..utils.logger import get_logger
+from .image_optimizer import available_cores
+
+logger = get_logger(__name__)
+
+# dHash grid: 8x8 = 64-bit perceptual hashes
+HASH_SIZE = 8
+
+# Near duplicates must also have about the same shape, so a crop or a
+# blank image doesn't match everything with a similar gradient
+MAX_ASPECT_DIFFERENCE = 0.1
+
+
+def hamming(a: int, b: int) -> int:
+    """Number of differing bits between two hashes"""
+    return bin(a ^ b).count('1')
+
+
+def file_hashes(path: str, chunk_size: int = 1024 * 1024) -> Dict:
+    """
+    Exact and perceptual hash of one file
+    
+    Runs in a worker process. The perceptual hash is a 64-bit difference
+    hash (dHash) of the image shrunk to 9x8 greyscale, which survives
+    resizing, recompression and format changes. Files Pillow can't read
+    (or any file, without Pillow) only get the exact hash.
+    
+    Returns:
+        Dictionary with path, bytes, sha256, phash (or None), width and height
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+            
+    result = {
+        'path': path,
+        'bytes': os.path.getsize(path),
+        'sha256': digest.hexdigest(),
+        'phash': None,
+        'width': None,
+        'height': None
+    }
+    
+    if Image is None:
+        return result
+        
+    try:
+        with Image.open(path) as image:
+            result['width'], result['height'] = image.size
+            # Let the JPEG decoder scale down while decoding; far faster than a full decode
+            image.draft('L', (HASH_SIZE * 8, HASH_SIZE * 8))
+            pixels = list(image.convert('L').resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.BOX).getdata())
+    except Exception as e:
+        logger.debug(f"No perceptual hash for {path}: {e}")
+        return result
+        
+    phash = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for column in range(HASH_SIZE):
+            phash = (phash << 1) | (pixels[offset + column] > pixels[offset + column + 1])
+    result['phash'] = phash
+    return result
+
+
+class HashIndex:
+    """
+    Multi-index hash table for Hamming-distance lookups
+    
+    Each 64-bit hash is split into max_distance + 1 chunks, with one
+    table per chunk. Two hashes within max_distance bits of each other
+    must agree exactly on at least one chunk (pigeonhole), so a lookup
+    only compares against the few hashes sharing a chunk instead of
+    every hash in the index.
+    """
+    
+    def __init__(self, max_distance: int = 5, bits: int = HASH_SIZE * HASH_SIZE):
+        """
+        Initialize index
+        
+        Args:
+            max_distance: Largest Hamming distance lookups must find
+            bits: Hash length in bits
+        """
+        self.max_distance = max_distance
+        chunks = max_distance + 1
+        widths = [bits // chunks + (1 if i < bits % chunks else 0) for i in range(chunks)]
+        self._chunks: List[Tuple[int, int]] = []
+        shift = bits
+        for width in widths:
+            shift -= width
+            self._chunks.append((shift, (1 << width) - 1))
+        self._tables: List[Dict[int, List[Tuple[int, object]]]] = [{} for _ in widths]
+        self.size = 0
+        
+    def add(self, value: int, key: object):
+        """Index a hash under a key"""
+        for table, (shift, mask) in zip(self._tables, self._chunks):
+            table.setdefault((value >> shift) & mask, []).append((value, key))
+        self.size += 1
+        
+    def near(self, value: int) -> Iterator[Tuple[object, int]]:
+        """Yield (key, distance) for every indexed hash within max_distance"""
+        seen = set()
+        for table, (shift, mask) in zip(self._tables, self._chunks):
+            for candidate, key in table.get((value >> shift) & mask, ()):
+                # Only matches can share more than one chunk, so only they need de-duplicating
+                distance = hamming(value, candidate)
+                if distance <= self.max_distance and key not in seen:
+                    seen.add(key)
+                    yield key, distance
+
+
+class DuplicateDetector:
+    """
+    Group files that are the same image, byte for byte or visually
+    
+    Files are hashed in worker processes. Byte-identical files share a
+    SHA-256; near-identical ones (resized, recompressed, converted) have
+    perceptual hashes within max_distance bits, found through a HashIndex
+    so 50k images take one lookup each rather than comparing every pair.
+    """
+    
+    def __init__(self, max_distance: int = 5, max_workers: Optional[int] = None):
+        """
+        Initialize detector
+        
+        Args:
+            max_distance: Largest perceptual hash distance counted as a duplicate (0 = exact only)
+            max_workers: Worker processes for hashing (default: available cores)
+        """
+        if Image is None and max_distance:
+            logger.warning("Pillow is not installed: only byte-identical duplicates will be found")
+        self.max_distance = max_distance
+        self.max_workers = max_workers or available_cores()
+        
+    def hash_all(self, paths: Iterable[str],
+                 progress_callback: Optional[Callable] = None) -> Iterator[Dict]:
+        """
+        Hash many files in worker processes
+        
+        Args:
+            paths: Files to hash
+            progress_callback: Callback for progress updates
+            
+        Yields:
+            file_hashes() results; unreadable files get an 'error' key instead
+        """
+        paths = list(paths)
+        if not paths:
+            return
+            
+        with ProcessPoolExecutor(max_workers=min(self.max_workers, len(paths))) as executor:
+            # Small tasks: send them in chunks to keep inter-process overhead down
+            chunksize = max(1, min(64, len(paths) // (self.max_workers * 4)))
+            results = executor.map(_safe_file_hashes, paths, chunksize=chunksize)
+            for done, result in enumerate(results, 1):
+                if progress_callback:
+                    progress_callback(done, len(paths), f"Hashed {os.path.basename(result['path'])}")
+                yield result
+                
+    def clusters(self, hashes: Iterable[Dict]) -> List[Dict]:
+        """
+        Group hashed files into duplicate clusters
+        
+        Args:
+            hashes: file_hashes() results (error results are skipped)
+            
+        Returns:
+            Clusters of two or more files, each {'kind': 'exact' or 'near',
+            'files': [hash result with 'distance' to the cluster's first file]}
+        """
+        # Byte-identical files collapse into one node up front
+        nodes: Dict[str, List[Dict]] = {}
+        for entry in hashes:
+            if not entry.get('error'):
+                nodes.setdefault(entry['sha256'], []).append(entry)
+                
+        parent = {sha: sha for sha in nodes}
+        
+        def find(sha: str) -> str:
+            while parent[sha] != sha:
+                parent[sha] = parent[parent[sha]]
+                sha = parent[sha]
+            return sha
+            
+        if self.max_distance:
+            index = HashIndex(self.max_distance)
+            for sha, entries in nodes.items():
+                entry = entries[0]
+                if entry['phash'] is None:
+                    continue
+                for other, _ in index.near(entry['phash']):
+                    if self._same_shape(entry, nodes[other][0]):
+                        parent[find(other)] = find(sha)
+                index.add(entry['phash'], sha)
+                
+        groups: Dict[str, List[str]] = {}
+        for sha in nodes:
+            groups.setdefault(find(sha), []).append(sha)
+            
+        clusters = []
+        for shas in groups.values():
+            files = [entry for sha in shas for entry in nodes[sha]]
+            if len(files) < 2:
+                continue
+            first = files[0]['phash']
+            for entry in files:
+                entry['distance'] = hamming(first, entry['phash']) \
+                    if first is not None and entry['phash'] is not None else 0
+            clusters.append({'kind': 'exact' if len(shas) == 1 else 'near', 'files': files})
+            
+        logger.info(f"Found {len(clusters)} duplicate clusters among {len(nodes)} distinct files")
+        return clusters
+        
+    @staticmethod
+    def _same_shape(a: Dict, b: Dict) -> bool:
+        """Whether two images have about the same aspect ratio"""
+        if not a['width'] or not a['height'] or not b['width'] or not b['height']:
+            return True
+        ratio_a = a['width'] / a['height']
+        ratio_b = b['width'] / b['height']
+        return abs(ratio_a - ratio_b) <= MAX_ASPECT_DIFFERENCE * max(ratio_a, ratio_b)
+
+
+def _safe_file_hashes(path: str) -> Dict:
+    """file_hashes() that reports errors instead of raising across the pool"""
+    try:
+        return file_hashes(path)
+    except OSError as e:
+        return {'path': path, 'error': str(e)}
@@ -0,0 +1,270 @@
+"""
+Local image optimisation for WP Bulk Manager
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import os
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Optional: pip install Pillow
+    Image = ImageOps = None
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Files that are recompressed in their own format, by extension
+OPTIMIZABLE = {'.jpg': 'JPEG', '.jpeg': 'JPEG', '.png': 'PNG'}
+
+# Modern-format variants, written next to the file as photo.jpg.webp
+# (the naming LiteSpeed Cache and most image CDNs look for)
+VARIANT_FORMATS = {'webp': 'WEBP', 'avif': 'AVIF'}
+
+# Content types for uploading each output
+MIME_TYPES = {'jpeg': 'image/jpeg', 'png': 'image/png', 'webp': 'image/webp', 'avif': 'image/avif'}
+
+
+def available_formats() -> List[str]:
+    """Variant formats the installed Pillow can write"""
+    if Image is None:
+        return []
+    Image.init()
+    return [name for name, pil_format in VARIANT_FORMATS.items() if pil_format in Image.SAVE]
+
+
+def available_cores() -> int:
+    """CPU cores this process may run on (respects container and affinity limits)"""
+    try:
+        return len(os.sched_getaffinity(0)) or 1
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def optimize_image(source: str, output_dir: str, formats: Tuple[str, ...] = ('webp', 'avif'),
+                   jpeg_quality: int = 82, webp_quality: int = 80, avif_quality: int = 60,
+                   strip_metadata: bool = True) -> Dict:
+    """
+    Recompress one JPEG/PNG and write its WebP/AVIF variants
+    
+    Runs in a worker process. Outputs that are up to date with the source
+    are not redone; a recompressed copy that isn't smaller than the
+    original is discarded.
+    
+    Args:
+        source: Image file to optimise
+        output_dir: Directory for the optimised copy and variants
+        formats: Variant formats to generate ('webp', 'avif')
+        jpeg_quality: Quality for recompressed JPEGs
+        webp_quality: Quality for WebP variants
+        avif_quality: Quality for AVIF variants
+        strip_metadata: Drop EXIF/XMP/comments (orientation is applied and
+            the ICC profile kept so images look the same)
+            
+    Returns:
+        Dictionary with source, original_bytes and each output's path,
+        bytes and saved_bytes under 'variants'
+    """
+    name = os.path.basename(source)
+    source_format = OPTIMIZABLE.get(os.path.splitext(name)[1].lower())
+    original_bytes = os.path.getsize(source)
+    source_mtime = os.path.getmtime(source)
+    
+    outputs = {}
+    if source_format:
+        outputs[source_format.lower()] = (source_format, os.path.join(output_dir, name))
+    for variant in formats:
+        outputs[variant] = (VARIANT_FORMATS[variant], os.path.join(output_dir, f"{name}.{variant}"))
+        
+    result = {
+        'source': source,
+        'original_bytes': original_bytes,
+        'status': 'skipped',
+        'variants': {}
+    }
+    
+    todo = {}
+    for key, (pil_format, dest) in outputs.items():
+        if os.path.exists(dest) and os.path.getmtime(dest) >= source_mtime:
+            result['variants'][key] = _variant(dest, original_bytes)
+        else:
+            todo[key] = (pil_format, dest)
+            
+    own_format = (source_format or '').lower()
+    if not todo or (list(todo) == [own_format] and result['variants']):
+        # A recompressed copy missing beside up-to-date variants was discarded last time
+        return result
+        
+    os.makedirs(output_dir, exist_ok=True)
+    result['status'] = 'optimized'
+    
+    with Image.open(source) as image:
+        image.load()
+        save_options = {}
+        if image.info.get('icc_profile'):
+            save_options['icc_profile'] = image.info['icc_profile']
+        if strip_metadata:
+            # Rotate the pixels so orientation survives losing the EXIF tag
+            image = ImageOps.exif_transpose(image)
+        elif image.info.get('exif'):
+            save_options['exif'] = image.info['exif']
+            
+        for key, (pil_format, dest) in todo.items():
+            _save(image, pil_format, dest, save_options, {
+                'JPEG': {'quality': jpeg_quality, 'optimize': True, 'progressive': True},
+                'PNG': {'optimize': True},
+                'WEBP': {'quality': webp_quality, 'method': 6},
+                'AVIF': {'quality': avif_quality, 'speed': 6},
+            }[pil_format])
+            
+            if key == own_format and os.path.getsize(dest) >= original_bytes:
+                # The original was already well compressed
+                os.unlink(dest)
+                continue
+            result['variants'][key] = _variant(dest, original_bytes)
+            
+    return result
+
+
+def _save(image, pil_format: str, dest: str, save_options: Dict, format_options: Dict):
+    """Write an image atomically in a format, converting modes it can't store"""
+    has_alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+    if pil_format == 'JPEG':
+        if image.mode not in ('RGB', 'L', 'CMYK'):
+            image = image.convert('RGB')
+    elif pil_format in ('WEBP', 'AVIF'):
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if has_alpha else 'RGB')
+            
+    temp_path = dest + '.tmp'
+    image.save(temp_path, format=pil_format, **save_options, **format_options)
+    os.replace(temp_path, dest)
+
+
+def _variant(path: str, original_bytes: int) -> Dict:
+    size = os.path.getsize(path)
+    return {
+        'path': path,
+        'bytes': size,
+        'saved_bytes': original_bytes - size,
+        'saved_percent': round(100.0 * (original_bytes - size) / original_bytes, 1) if original_bytes else 0.0
+    }
+
+
+class ImageOptimizer:
+    """
+    Optimise many local images in parallel worker processes
+    
+    Image encoding is CPU bound, so the work is spread over a process
+    pool sized to the cores available. Everything runs locally with
+    Pillow; nothing is sent anywhere.
+    """
+    
+    def __init__(self, output_dir: str, formats: Optional[Iterable[str]] = None,
+                 max_workers: Optional[int] = None, jpeg_quality: int = 82,
+                 webp_quality: int = 80, avif_quality: int = 60,
+                 strip_metadata: bool = True):
+        """
+        Initialize optimizer
+        
+        Args:
+            output_dir: Directory for optimised copies and variants
+            formats: Variant formats to generate (default: whichever of
+                WebP and AVIF the installed Pillow supports)
+            max_workers: Worker processes (default: available cores)
+            jpeg_quality: Quality for recompressed JPEGs
+            webp_quality: Quality for WebP variants
+            avif_quality: Quality for AVIF variants
+            strip_metadata: Drop EXIF/XMP/comments from every output
+        """
+        if Image is None:
+            raise ImportError("Image optimisation needs Pillow: pip install Pillow")
+            
+        supported = available_formats()
+        if formats is None:
+            formats = supported
+        unsupported = [name for name in formats if name not in supported]
+        if unsupported:
+            raise ValueError(f"Pillow can't write: {', '.join(unsupported)}")
+            
+        self.output_dir = output_dir
+        self.max_workers = max_workers or available_cores()
+        self._optimize = partial(
+            optimize_image, output_dir=output_dir, formats=tuple(formats),
+            jpeg_quality=jpeg_quality, webp_quality=webp_quality,
+            avif_quality=avif_quality, strip_metadata=strip_metadata
+        )
+        
+    def optimize(self, source: str) -> Dict:
+        """Optimise one image in this process"""
+        return self._optimize(source)
+        
+    def optimize_all(self, sources: Iterable[str],
+                     progress_callback: Optional[Callable] = None) -> Iterator[Tuple[str, Dict]]:
+        """
+        Optimise many images in worker processes, yielding each as it finishes
+        
+        Args:
+            sources: Image paths
+            progress_callback: Callback for progress updates
+            
+        Yields:
+            (source, result) where result has an 'error' key on failure
+        """
+        sources = list(sources)
+        if not sources:
+            return
+            
+        with ProcessPoolExecutor(max_workers=min(self.max_workers, len(sources))) as executor:
+            futures = {executor.submit(self._optimize, source): source for source in sources}
+            
+            for done, future in enumerate(as_completed(futures), 1):
+                source = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Error optimising {source}: {e}")
+                    result = {'source': source, 'status': 'failed', 'variants': {}, 'error': str(e)}
+                    
+                if progress_callback:
+                    progress_callback(done, len(sources), f"{result['status'].capitalize()} {os.path.basename(source)}")
+                yield source, result
+                
+    @staticmethod
+    def summarize(results: Iterable[Dict]) -> Dict:
+        """
+        Total before/after bytes over optimisation results
+        
+        optimized_bytes counts the smallest output of each image (or the
+        original, if nothing beat it), i.e. what a browser that accepts
+        every generated format would download.
+        """
+        totals = {
+            'images': 0,
+            'original_bytes': 0,
+            'optimized_bytes': 0,
+            'saved_bytes': 0,
+            'formats': {}
+        }
+        
+        for result in results:
+            if result.get('error'):
+                continue
+            totals['images'] += 1
+            totals['original_bytes'] += result['original_bytes']
+            
+            best = result['original_bytes']
+            for key, variant in result['variants'].items():
+                per_format = totals['formats'].setdefault(key, {'images': 0, 'bytes': 0, 'original_bytes': 0})
+                per_format['images'] += 1
+                per_format['bytes'] += variant['bytes']
+                per_format['original_bytes'] += result['original_bytes']
+                best = min(best, variant['bytes'])
+            totals['optimized_bytes'] += best
+            
+        totals['saved_bytes'] = totals['original_bytes'] - totals['optimized_bytes']
+        totals['saved_percent'] = round(
+            100.0 * totals['saved_bytes'] / totals['original_bytes'], 1
+        ) if totals['original_bytes'] else 0.0
+        return totals
@@ -0,0 +1,336 @@
+"""
+Job journal for resumable bulk operations
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import json
+import os
+import sqlite3
+import threading
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# The WPBulkManager sites database, whose operations table holds the jobs
+DEFAULT_JOURNAL_PATH = "~/Library/Application Support/WPBulkManager/sites.db"
+
+# Item states; 'running' items were sent but not confirmed when a run stopped
+ITEM_STATES = ('pending', 'running', 'done', 'failed')
+
+
+def _dumps(value: Any) -> Optional[str]:
+    return None if value is None else json.dumps(value)
+
+
+def _loads(value: Optional[str]) -> Any:
+    return None if value is None else json.loads(value)
+
+
+class JobJournal:
+    """
+    Record bulk jobs and their items so an interrupted job can resume
+    
+    Each job is a row in the sites database's operations table, with its
+    site, parameters and scan checkpoint in the data column. Its items
+    (posts, plugins, ...) live in operation_items with their planned
+    change, state and result, and each state change is committed as it
+    happens, so a crash or Ctrl-C loses at most the items in flight.
+    """
+    
+    SCHEMA = [
+        '''
+        CREATE TABLE IF NOT EXISTS operations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            site_id INTEGER,
+            type TEXT NOT NULL,
+            status TEXT DEFAULT 'pending',
+            data TEXT,
+            error TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            completed_at DATETIME,
+            FOREIGN KEY (site_id) REFERENCES sites(id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS operation_items (
+            operation_id INTEGER NOT NULL,
+            item_key TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            data TEXT,
+            result TEXT,
+            error TEXT,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (operation_id, item_key),
+            FOREIGN KEY (operation_id) REFERENCES operations(id)
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_operation_items_status ON operation_items(operation_id, status, seq)',
+    ]
+    
+    def __init__(self, db_path: str = DEFAULT_JOURNAL_PATH):
+        self.db_path = os.path.expanduser(db_path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        with self._lock:
+            for statement in self.SCHEMA:
+                self._conn.execute(statement)
+                
+    def start(self, job_type: str, site_url: str, params: Dict[str, Any],
+              site_id: Optional[int] = None) -> 'Job':
+        """Create a new running job"""
+        data = {'site_url': site_url.rstrip('/'), 'params': params, 'checkpoint': None}
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO operations (site_id, type, status, data) VALUES (?, ?, 'running', ?)",
+                (site_id, job_type, json.dumps(data))
+            )
+        logger.info(f"Started {job_type} job {cursor.lastrowid} for {site_url}")
+        return Job(self, cursor.lastrowid, job_type, data)
+        
+    def find_unfinished(self, job_type: str, site_url: str,
+                        params: Dict[str, Any]) -> Optional['Job']:
+        """Most recent interrupted job with the same type, site and parameters"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, data FROM operations WHERE type = ? AND status = 'running' ORDER BY id DESC",
+                (job_type,)
+            ).fetchall()
+            
+        for job_id, data in rows:
+            data = _loads(data) or {}
+            if data.get('site_url') == site_url.rstrip('/') and data.get('params') == params:
+                return Job(self, job_id, job_type, data)
+        return None
+        
+    def resume_or_start(self, job_type: str, site_url: str, params: Dict[str, Any],
+                        site_id: Optional[int] = None) -> 'Job':
+        """Resume the matching interrupted job, or start a new one"""
+        # Round-trip through JSON so tuples etc. compare equal to stored params
+        params = json.loads(json.dumps(params))
+        job = self.find_unfinished(job_type, site_url, params)
+        if job:
+            logger.info(f"Resuming {job_type} job {job.id}: {job.summary()}")
+            job.resumed = True
+            return job
+        return self.start(job_type, site_url, params, site_id)
+        
+    def get_job(self, job_id: int) -> Optional['Job']:
+        """Load a job by ID"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT type, data FROM operations WHERE id = ?', (job_id,)
+            ).fetchone()
+        return Job(self, job_id, row[0], _loads(row[1]) or {}) if row else None
+        
+    def list_jobs(self, status: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        """Recent jobs with their item counts"""
+        sql = 'SELECT id, type, status, data, error, created_at, completed_at FROM operations'
+        args: Tuple = ()
+        if status:
+            sql += ' WHERE status = ?'
+            args = (status,)
+        with self._lock:
+            rows = self._conn.execute(sql + ' ORDER BY id DESC LIMIT ?', args + (limit,)).fetchall()
+            
+        jobs = []
+        for job_id, job_type, job_status, data, error, created_at, completed_at in rows:
+            data = _loads(data) or {}
+            jobs.append({
+                'id': job_id,
+                'type': job_type,
+                'status': job_status,
+                'site_url': data.get('site_url'),
+                'items': self._counts(job_id),
+                'error': error,
+                'created_at': created_at,
+                'completed_at': completed_at
+            })
+        return jobs
+        
+    def _counts(self, job_id: int) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT status, COUNT(*) FROM operation_items WHERE operation_id = ? GROUP BY status',
+                (job_id,)
+            ).fetchall()
+        return dict(rows)
+        
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class Job:
+    """One journaled job; see JobJournal"""
+    
+    def __init__(self, journal: JobJournal, job_id: int, job_type: str, data: Dict[str, Any]):
+        self.journal = journal
+        self.id = job_id
+        self.type = job_type
+        self.data = data
+        self.resumed = False
+        
+    @property
+    def checkpoint(self) -> Any:
+        """Where the job's scan had got to, as saved by set_checkpoint()"""
+        return self.data.get('checkpoint')
+        
+    def set_checkpoint(self, checkpoint: Any):
+        """Save scan progress; items planned before it are already journaled"""
+        self.data['checkpoint'] = checkpoint
+        self._execute('UPDATE operations SET data = ? WHERE id = ?', (json.dumps(self.data), self.id))
+        
+    @property
+    def scan_complete(self) -> bool:
+        """Whether every item the job will ever have has been planned"""
+        return bool(self.data.get('scan_complete'))
+        
+    def set_scan_complete(self):
+        """Record that planning finished; only outstanding writes can resume now"""
+        self.data['scan_complete'] = True
+        self._execute('UPDATE operations SET data = ? WHERE id = ?', (json.dumps(self.data), self.id))
+        
+    def plan(self, items: Iterable[Tuple[Any, Any]]) -> int:
+        """
+        Record items as pending, in one transaction
+        
+        Items already in the journal keep their state, so replanning after
+        a resume doesn't repeat finished work.
+        
+        Args:
+            items: (key, data) pairs; data is what's needed to apply the item
+            
+        Returns:
+            Number of new items
+        """
+        items = list(items)
+        if not items:
+            return 0
+            
+        with self.journal._lock:
+            conn = self.journal._conn
+            conn.execute('BEGIN')
+            try:
+                seq = conn.execute(
+                    'SELECT COALESCE(MAX(seq), 0) FROM operation_items WHERE operation_id = ?', (self.id,)
+                ).fetchone()[0]
+                cursor = conn.executemany(
+                    'INSERT OR IGNORE INTO operation_items (operation_id, item_key, seq, data) VALUES (?, ?, ?, ?)',
+                    [(self.id, str(key), seq + offset, _dumps(data)) for offset, (key, data) in enumerate(items, 1)]
+                )
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+        return cursor.rowcount
+        
+    def mark_many(self, keys: Iterable[Any], status: str):
+        """Record the same new state for many items, in one transaction"""
+        if status not in ITEM_STATES:
+            raise ValueError(f"Unknown item state: {status}")
+        rows = [(status, self.id, str(key)) for key in keys]
+        if not rows:
+            return
+            
+        with self.journal._lock:
+            conn = self.journal._conn
+            conn.execute('BEGIN')
+            try:
+                conn.executemany(
+                    'UPDATE operation_items SET status = ?, updated_at = CURRENT_TIMESTAMP '
+                    'WHERE operation_id = ? AND item_key = ?',
+                    rows
+                )
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+            
+    def mark(self, key: Any, status: str, result: Any = None, error: Optional[str] = None):
+        """Record an item's new state (and its result or error)"""
+        if status not in ITEM_STATES:
+            raise ValueError(f"Unknown item state: {status}")
+        self._execute(
+            'UPDATE operation_items SET status = ?, result = ?, error = ?, updated_at = CURRENT_TIMESTAMP '
+            'WHERE operation_id = ? AND item_key = ?',
+            (status, _dumps(result), error, self.id, str(key))
+        )
+        
+    def state(self, key: Any) -> Optional[str]:
+        """An item's state, or None if it was never planned"""
+        row = self._query(
+            'SELECT status FROM operation_items WHERE operation_id = ? AND item_key = ?',
+            (self.id, str(key))
+        )
+        return row[0][0] if row else None
+        
+    def unfinished(self, retry_failed: bool = True) -> Iterator[Tuple[str, Any, str]]:
+        """Planned items not yet done (or failed, if retry_failed), in plan order: (key, data, state)"""
+        states = ('pending', 'running', 'failed') if retry_failed else ('pending', 'running')
+        rows = self._query(
+            f"SELECT item_key, data, status FROM operation_items "
+            f"WHERE operation_id = ? AND status IN ({', '.join('?' * len(states))}) ORDER BY seq",
+            (self.id, *states)
+        )
+        for key, data, status in rows:
+            yield key, _loads(data), status
+            
+    def items(self, status: Optional[str] = None) -> List[Dict]:
+        """Every item with its state, data, result and error"""
+        sql = 'SELECT item_key, status, data, result, error FROM operation_items WHERE operation_id = ?'
+        args: Tuple = (self.id,)
+        if status:
+            sql += ' AND status = ?'
+            args += (status,)
+        return [{
+            'key': key,
+            'status': item_status,
+            'data': _loads(data),
+            'result': _loads(result),
+            'error': error
+        } for key, item_status, data, result, error in self._query(sql + ' ORDER BY seq', args)]
+        
+    def summary(self) -> Dict[str, int]:
+        """Item counts by state"""
+        return self.journal._counts(self.id)
+        
+    def finish(self) -> bool:
+        """
+        Close the job once its scan completed and no item is in flight
+        
+        A job whose scan didn't complete, or with pending or running items,
+        stays open so the next run with the same parameters resumes it.
+        Otherwise it is closed, as failed if any item failed: a later run
+        scans afresh rather than resuming from this job's checkpoint.
+        
+        Returns:
+            Whether the job completed with every item done
+        """
+        counts = self.summary()
+        in_flight = {state: counts[state] for state in ('pending', 'running') if counts.get(state)}
+        if in_flight or not self.scan_complete:
+            logger.warning(f"{self.type} job {self.id} left open to resume: {counts}")
+            return False
+        failed = counts.get('failed', 0)
+        self.complete(f"{failed} items failed" if failed else None)
+        return not failed
+        
+    def complete(self, error: Optional[str] = None):
+        """Close the job: completed, or failed with an error"""
+        self._execute(
+            'UPDATE operations SET status = ?, error = ?, completed_at = ? WHERE id = ?',
+            ('failed' if error else 'completed', error, datetime.now().isoformat(), self.id)
+        )
+        logger.info(f"{self.type} job {self.id} {'failed' if error else 'completed'}: {self.summary()}")
+        
+    def _execute(self, sql: str, args: Tuple):
+        with self.journal._lock:
+            self.journal._conn.execute(sql, args)
+            
+    def _query(self, sql: str, args: Tuple) -> List[Tuple]:
+        with self.journal._lock:
+            return self.journal._conn.execute(sql, args).fetchall()
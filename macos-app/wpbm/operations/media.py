@@ -1,16 +1,30 @@
 """
 Media operations for WP Bulk Manager
 """
-from typing import Dict, List, Optional, Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Callable
+import json
+import math
 import os
-import requests
 from urllib.parse import urlparse
 
 from ..api.client import WPBMClient
 from ..utils.logger import get_logger
+from .batch_writer import BatchWriter
+from .downloader import MediaDownloader
+from .duplicates import DuplicateDetector
+from .image_optimizer import MIME_TYPES, OPTIMIZABLE, ImageOptimizer
+from .media_index import MediaReferenceIndex
 
 logger = get_logger(__name__)
 
+# Attachment fields /media/{id} and /media/bulk can write
+MEDIA_FIELDS = ('title', 'caption', 'description', 'alt_text')
+
+# Written beside each uploaded variant so reruns don't upload it again
+UPLOAD_RECORD_SUFFIX = '.upload.json'
+
 
 class MediaOperations:
     """Handle media/attachment operations"""
@@ -19,18 +33,29 @@ class MediaOperations:
         self.client = client
         
     def list_media(self, media_type: Optional[str] = None, 
-                   limit: int = 100) -> List[Dict]:
+                   limit: Optional[int] = 100) -> List[Dict]:
         """
         List media items
         
         Args:
             media_type: Filter by mime type (e.g., 'image', 'video')
-            limit: Number of items to retrieve
+            limit: Number of items to retrieve (None for the whole library)
             
         Returns:
             List of media items
         """
-        params = {'limit': limit}
+        return list(self.iter_media(media_type, limit))
+        
+    def iter_media(self, media_type: Optional[str] = None,
+                   limit: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Yield media items a page at a time
+        
+        Args:
+            media_type: Filter by mime type (e.g., 'image', 'video')
+            limit: Stop after this many items (None for the whole library)
+        """
+        params = {}
         
         if media_type:
             # Convert simple type to mime type pattern
@@ -47,18 +72,29 @@ class MediaOperations:
             else:
                 params['mime_type'] = media_type
                 
-        return self.client.get_media(**params)
+        for count, item in enumerate(self.client.iter_media(limit=min(limit or 100, 100), **params), 1):
+            yield item
+            if limit and count >= limit:
+                break
         
     def bulk_download_media(self, media_ids: List[int] = None,
                            output_dir: str = './media_downloads',
-                           progress_callback: Optional[Callable] = None) -> Dict:
+                           progress_callback: Optional[Callable] = None,
+                           max_workers: int = 8,
+                           chunk_size: int = 1024 * 1024) -> Dict:
         """
         Bulk download media files
         
+        Files are fetched concurrently by a MediaDownloader: files already
+        in output_dir with the right size are skipped, and partial files
+        left by an interrupted run are resumed.
+        
         Args:
             media_ids: Specific media IDs to download (None for all)
             output_dir: Directory to save files
             progress_callback: Progress callback function
+            max_workers: Downloads in flight at once
+            chunk_size: Bytes read from the network per write
             
         Returns:
             Download results
@@ -68,77 +104,245 @@ class MediaOperations:
         results = {
             'total': 0,
             'downloaded': 0,
+            'resumed': 0,
+            'skipped': 0,
             'failed': 0,
+            'bytes': 0,
+            'files': [],
             'errors': []
         }
         
         # Get media items
         if media_ids:
             media_items = []
-            for media_id in media_ids:
-                try:
-                    item = self.client.get(f'/media/{media_id}')
-                    media_items.append(item)
-                except Exception as e:
-                    logger.error(f"Error fetching media {media_id}: {e}")
+            for media_id, item in self._fetch_media(list(media_ids)):
+                if item is None:
                     results['errors'].append({
                         'media_id': media_id,
-                        'error': str(e)
+                        'error': 'Media not found'
                     })
+                else:
+                    media_items.append(item)
         else:
-            media_items = self.list_media()
+            media_items = self.list_media(limit=None)
             
         results['total'] = len(media_items)
         
-        # Download each item
-        for i, item in enumerate(media_items):
-            if progress_callback:
-                progress_callback(i + 1, len(media_items), 
-                                f"Downloading {item.get('title', 'Untitled')}")
+        files = []
+        items_by_path = {}
+        for item in media_items:
+            # Get the media URL
+            media_url = item.get('source_url') or item.get('guid', {}).get('rendered')
+            
+            if not media_url:
+                results['failed'] += 1
+                results['errors'].append({
+                    'media_id': item['id'],
+                    'title': item.get('title', 'Unknown'),
+                    'error': 'No media URL found'
+                })
+                continue
                 
-            try:
-                # Get the media URL
-                media_url = item.get('source_url') or item.get('guid', {}).get('rendered')
+            # Determine filename; uploads from different months can share one
+            filename = os.path.basename(urlparse(media_url).path)
+            if not filename:
+                filename = f"media_{item['id']}"
+            filepath = os.path.join(output_dir, filename)
+            if filepath in items_by_path:
+                filepath = os.path.join(output_dir, f"{item['id']}_{filename}")
                 
-                if not media_url:
-                    raise ValueError("No media URL found")
+            items_by_path[filepath] = item
+            expected_size = (item.get('media_details') or {}).get('filesize') or None
+            files.append((media_url, filepath, expected_size, None))
+            
+        with MediaDownloader(max_workers=max_workers, chunk_size=chunk_size) as downloader:
+            for (_, filepath, _, _), result in downloader.download_all(files, progress_callback):
+                item = items_by_path[filepath]
+                
+                if result['status'] == 'failed':
+                    results['failed'] += 1
+                    results['errors'].append({
+                        'media_id': item['id'],
+                        'title': item.get('title', 'Unknown'),
+                        'error': result['error']
+                    })
+                    continue
                     
-                # Download file
-                response = requests.get(media_url, stream=True)
-                response.raise_for_status()
-                
-                # Determine filename
-                filename = os.path.basename(urlparse(media_url).path)
-                if not filename:
-                    filename = f"media_{item['id']}"
+                results[result['status']] += 1
+                results['bytes'] += result['bytes']
+                results['files'].append({'media_id': item['id'], 'path': filepath})
+                if result['status'] != 'skipped':
+                    logger.info(f"Downloaded: {filepath}")
                     
-                filepath = os.path.join(output_dir, filename)
+        return results
+        
+    def optimize_media(self, media_ids: List[int] = None,
+                       download_dir: str = './media_downloads',
+                       output_dir: Optional[str] = None,
+                       formats: Optional[List[str]] = None,
+                       upload: bool = False,
+                       report_path: Optional[str] = None,
+                       progress_callback: Optional[Callable] = None,
+                       max_workers: Optional[int] = None) -> Dict:
+        """
+        Recompress downloaded images and generate WebP/AVIF variants
+        
+        Media is downloaded (or reused from download_dir) with
+        bulk_download_media, then every JPEG and PNG is optimised locally
+        in worker processes. Needs Pillow; nothing leaves the machine
+        unless upload is set. Each uploaded variant gets a record beside it
+        in output_dir, so rerunning with upload only uploads new outputs.
+        
+        Args:
+            media_ids: Specific media IDs to optimise (None for all)
+            download_dir: Directory holding the downloaded originals
+            output_dir: Directory for optimised files (default: download_dir/optimized)
+            formats: Variant formats to generate (default: all Pillow supports)
+            upload: Upload the outputs that beat the original as new attachments
+            report_path: Also write the report to this JSON file
+            progress_callback: Callback for progress updates
+            max_workers: Worker processes (default: available cores)
+            
+        Returns:
+            Report with before/after bytes per item and in total
+        """
+        output_dir = output_dir or os.path.join(download_dir, 'optimized')
+        optimizer = ImageOptimizer(output_dir, formats=formats, max_workers=max_workers)
+        
+        downloads = self.bulk_download_media(media_ids, download_dir, progress_callback)
+        media_by_path = {entry['path']: entry['media_id'] for entry in downloads['files']
+                         if os.path.splitext(entry['path'])[1].lower() in OPTIMIZABLE}
+        
+        results = {
+            'total': len(media_by_path),
+            'optimized': 0,
+            'skipped': 0,
+            'failed': downloads['failed'],
+            'uploaded': 0,
+            'already_uploaded': 0,
+            'items': [],
+            'errors': list(downloads['errors'])
+        }
+        
+        optimized = []
+        for path, result in optimizer.optimize_all(media_by_path, progress_callback):
+            media_id = media_by_path[path]
+            if result.get('error'):
+                results['failed'] += 1
+                results['errors'].append({'media_id': media_id, 'error': result['error']})
+                continue
                 
-                # Write file
-                with open(filepath, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        f.write(chunk)
-                        
-                results['downloaded'] += 1
-                logger.info(f"Downloaded: {filepath}")
+            results[result['status']] += 1
+            optimized.append(result)
+            results['items'].append({
+                'media_id': media_id,
+                'file': os.path.basename(path),
+                'original_bytes': result['original_bytes'],
+                'variants': result['variants']
+            })
+            
+        if upload:
+            self._upload_variants(results, progress_callback)
+            
+        results['items'].sort(key=lambda item: item['media_id'])
+        results['totals'] = ImageOptimizer.summarize(optimized)
+        logger.info(
+            f"Optimised {results['totals']['images']} images: "
+            f"{results['totals']['original_bytes']} -> {results['totals']['optimized_bytes']} bytes "
+            f"({results['totals']['saved_percent']}% saved)"
+        )
+        
+        if report_path:
+            with open(report_path, 'w') as f:
+                json.dump({'generated': datetime.now().isoformat(), **results}, f, indent=2)
                 
+        return results
+        
+    def _upload_variants(self, results: Dict, progress_callback: Optional[Callable]):
+        """Upload every output smaller than its original, recording the new attachment"""
+        uploads = []
+        for item in results['items']:
+            for key, variant in item['variants'].items():
+                if variant['saved_bytes'] <= 0:
+                    continue
+                record = self._read_upload_record(variant['path'])
+                if record:
+                    # Uploaded by an earlier run and unchanged since
+                    results['already_uploaded'] += 1
+                    variant['uploaded_id'] = record['id']
+                    variant['uploaded_url'] = record.get('source_url')
+                else:
+                    uploads.append((item, key, variant))
+                    
+
+        def upload(entry):
+            item, key, variant = entry
+            try:
+                return self.client.upload_media(variant['path'], mime_type=MIME_TYPES[key]), None
             except Exception as e:
-                logger.error(f"Error downloading media {item['id']}: {e}")
-                results['failed'] += 1
-                results['errors'].append({
-                    'media_id': item['id'],
-                    'title': item.get('title', 'Unknown'),
-                    'error': str(e)
-                })
+                logger.error(f"Error uploading {variant['path']}: {e}")
+                return None, e
                 
-        return results
+        with ThreadPoolExecutor(max_workers=self.client.max_workers) as executor:
+            for done, ((item, key, variant), (response, error)) in enumerate(
+                    zip(uploads, executor.map(upload, uploads)), 1):
+                if error is None:
+                    results['uploaded'] += 1
+                    variant['uploaded_id'] = response.get('id')
+                    variant['uploaded_url'] = response.get('source_url')
+                    self._write_upload_record(variant['path'], response)
+                else:
+                    results['errors'].append({'media_id': item['media_id'], 'error': str(error)})
+                if progress_callback:
+                    progress_callback(done, len(uploads), f"Uploaded {os.path.basename(variant['path'])}")
+                    
+    @staticmethod
+    def _read_upload_record(path: str) -> Optional[Dict]:
+        """The attachment a variant was uploaded as, if the file hasn't changed since"""
+        try:
+            with open(path + UPLOAD_RECORD_SUFFIX) as f:
+                record = json.load(f)
+            stat = os.stat(path)
+        except (OSError, ValueError):
+            return None
+        if record.get('id') is None or record.get('mtime_ns') != stat.st_mtime_ns or \
+                record.get('bytes') != stat.st_size:
+            # Regenerated since: the new output hasn't been uploaded yet
+            return None
+        return record
         
-    def bulk_update_media_metadata(self, updates: List[Dict]) -> Dict:
+    @staticmethod
+    def _write_upload_record(path: str, response: Dict):
+        """Remember the attachment a variant was uploaded as"""
+        stat = os.stat(path)
+        with open(path + UPLOAD_RECORD_SUFFIX, 'w') as f:
+            json.dump({
+                'id': response.get('id'),
+                'source_url': response.get('source_url'),
+                'bytes': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns
+            }, f)
+            
+    def bulk_update_media_metadata(self, updates: List[Dict], batch_size: int = 50,
+                                   dry_run: bool = False,
+                                   progress_callback: Optional[Callable] = None,
+                                   write_concurrency: Optional[int] = None,
+                                   rate_limit: float = 0) -> Dict:
         """
         Bulk update media metadata
         
+        Updates are sent through /media/bulk in batches, several batches
+        at once; sites without the bulk endpoint get concurrent per-item
+        PUTs instead. Each item's outcome is reported under its ID.
+        
         Args:
             updates: List of dicts with 'id' and metadata fields
+                (title, caption, description, alt_text)
+            batch_size: Updates per /media/bulk request
+            dry_run: Only report which fields would change, from and to
+            progress_callback: Callback for progress updates
+            write_concurrency: Requests in flight at once (default: client.max_workers)
+            rate_limit: Maximum requests started per second (0 = unlimited)
             
         Returns:
             Update results
@@ -147,78 +351,273 @@ class MediaOperations:
             'total': len(updates),
             'updated': 0,
             'failed': 0,
+            'items': {},
             'errors': []
         }
         
+        pending = {}
+        written = 0
         for update in updates:
             media_id = update.get('id')
             if not media_id:
                 continue
                 
-            try:
-                # Remove 'id' from update data
-                update_data = {k: v for k, v in update.items() if k != 'id'}
-                
-                # Update media
-                self.client.put(f'/media/{media_id}', update_data)
+            # Remove 'id' from update data
+            update_data = {k: v for k, v in update.items() if k != 'id'}
+            unknown = sorted(set(update_data) - set(MEDIA_FIELDS))
+            if unknown:
+                results['failed'] += 1
+                results['items'][media_id] = 'failed'
+                results['errors'].append({
+                    'media_id': media_id,
+                    'error': f"Unknown media fields: {', '.join(unknown)}"
+                })
+                continue
+            # A media item listed twice gets its later values
+            pending.setdefault(media_id, {}).update(update_data)
+            
+        if dry_run:
+            return self._preview_media_updates(pending, results, progress_callback)
+            
+        def record(media_id, result, error):
+            nonlocal written
+            written += 1
+            if error is None:
                 results['updated'] += 1
-                
-            except Exception as e:
-                logger.error(f"Error updating media {media_id}: {e}")
+                results['items'][media_id] = 'updated'
+            else:
                 results['failed'] += 1
+                results['items'][media_id] = 'failed'
                 results['errors'].append({
                     'media_id': media_id,
-                    'error': str(e)
+                    'error': str(error)
                 })
+            if progress_callback:
+                progress_callback(written, len(pending),
+                                  f"Updated media {media_id}")
+                
+        writer = BatchWriter(self.client, 'media', max_items=batch_size,
+                             max_concurrency=write_concurrency, rate_limit=rate_limit)
+        with writer:
+            for media_id, update_data in pending.items():
+                writer.submit(media_id, update_data, record)
                 
+        results['requests'] = dict(writer.stats)
+        logger.info(
+            f"Updated {results['updated']} media items "
+            f"({writer.stats['bulk_requests']} bulk, {writer.stats['item_requests']} single requests)"
+        )
         return results
         
-    def find_unused_media(self) -> List[Dict]:
+    def _preview_media_updates(self, pending: Dict[int, Dict], results: Dict,
+                               progress_callback: Optional[Callable]) -> Dict:
+        """Dry run: compare updates with the live media and report field diffs"""
+        results['changes'] = []
+        results['unchanged'] = 0
+        
+        for done, (media_id, live) in enumerate(self._fetch_media(list(pending)), 1):
+            if progress_callback:
+                progress_callback(done, len(pending), f"Comparing media {media_id}")
+            if live is None:
+                results['failed'] += 1
+                results['items'][media_id] = 'failed'
+                results['errors'].append({'media_id': media_id, 'error': 'Media not found'})
+                continue
+                
+            diff = {}
+            for field, value in pending[media_id].items():
+                current = self._media_field(live, field)
+                if current != value:
+                    diff[field] = {'from': current, 'to': value}
+                    
+            if diff:
+                results['items'][media_id] = 'would_update'
+                results['changes'].append({
+                    'id': media_id,
+                    'title': self._media_field(live, 'title'),
+                    'fields': diff
+                })
+            else:
+                results['items'][media_id] = 'unchanged'
+                results['unchanged'] += 1
+                
+        return results
+        
+    def _fetch_media(self, media_ids: List[int]) -> Iterator[tuple]:
+        """Yield (media_id, live item or None), listing the library if that takes fewer requests"""
+        total = self.client.get('/media', params={'limit': 1}, use_cache=False)
+        total = total.get('total') if isinstance(total, dict) else None
+        
+        if total is not None and math.ceil(total / 100) < len(media_ids):
+            wanted = set(media_ids)
+            for item in self.client.iter_media(use_cache=False):
+                if item['id'] in wanted:
+                    wanted.discard(item['id'])
+                    yield item['id'], item
+                    if not wanted:
+                        return
+            for media_id in wanted:
+                yield media_id, None
+            return
+            
+        def fetch(media_id):
+            try:
+                return self.client.get(f'/media/{media_id}', use_cache=False)
+            except Exception as e:
+                logger.error(f"Error fetching media {media_id}: {e}")
+                return None
+                
+        with ThreadPoolExecutor(max_workers=self.client.max_workers) as executor:
+            yield from zip(media_ids, executor.map(fetch, media_ids))
+            
+    @staticmethod
+    def _media_field(media: Dict, field: str) -> Any:
+        """Plain value of a media field ('rendered' for title, caption and description)"""
+        value = media.get(field)
+        if isinstance(value, dict):
+            value = value.get('raw', value.get('rendered'))
+        return value if value is not None else ''
+        
+    def build_reference_index(self, posts: Optional[Iterable[Dict]] = None) -> MediaReferenceIndex:
         """
-        Find media items that are not used in any posts/pages
+        Index every media reference in the site's content in one pass
         
+        Args:
+            posts: Posts to scan, e.g. ContentStore.iter_posts() after a
+                sync (default: stream all posts and pages from the site)
+                
         Returns:
-            List of unused media items
+            Reference index
         """
-        # Get all media
-        all_media = self.list_media(limit=1000)
+        # Stream all content rather than materialising every post
+        all_content = posts if posts is not None else (
+            post for post_type in ['post', 'page']
+            for post in self.client.iter_content(content_type=post_type, full=1)
+        )
+        return MediaReferenceIndex.build(all_content)
         
-        # Get all content
-        all_content = []
-        for post_type in ['post', 'page']:
-            all_content.extend(self.client.get_content(content_type=post_type))
-            
-        # Build set of used media IDs
-        used_media_ids = set()
+    def find_unused_media(self, posts: Optional[Iterable[Dict]] = None,
+                          index: Optional[MediaReferenceIndex] = None) -> List[Dict]:
+        """
+        Find media items that are not used in any posts/pages
         
-        for post in all_content:
-            content = post.get('content', '')
-            
-            # Look for wp:image blocks
-            import re
-            image_blocks = re.findall(r'wp:image[^}]+?"id":(\d+)', content)
-            used_media_ids.update(int(id) for id in image_blocks)
-            
-            # Look for attachment URLs
-            for media in all_media:
-                if media.get('source_url') and media['source_url'] in content:
-                    used_media_ids.add(media['id'])
-                    
-            # Check featured image
-            if post.get('featured_media'):
-                used_media_ids.add(post['featured_media'])
+        Args:
+            posts: Posts to scan, e.g. ContentStore.iter_posts() after a
+                sync (default: stream all posts and pages from the site)
+            index: Reference index already built from the content
                 
-        # Find unused media
+        Returns:
+            List of unused media items
+        """
+        index = index or self.build_reference_index(posts)
+        
+        # Check the whole library page by page against the index
+        total = 0
         unused = []
-        for media in all_media:
-            if media['id'] not in used_media_ids:
+        for media in self.iter_media():
+            total += 1
+            if not index.is_used(media):
+                title = media.get('title')
                 unused.append({
                     'id': media['id'],
-                    'title': media.get('title', {}).get('rendered', 'Untitled'),
+                    'title': title.get('rendered', 'Untitled') if isinstance(title, dict) else title or 'Untitled',
                     'url': media.get('source_url'),
                     'mime_type': media.get('mime_type'),
                     'file_size': media.get('media_details', {}).get('filesize', 0)
                 })
                 
-        logger.info(f"Found {len(unused)} unused media items out of {len(all_media)} total")
-        return unused
\ No newline at end of file
+        logger.info(f"Found {len(unused)} unused media items out of {total} total")
+        return unused
+        
+    def find_duplicate_media(self, media_ids: List[int] = None,
+                             download_dir: str = './media_downloads',
+                             max_distance: int = 5,
+                             posts: Optional[Iterable[Dict]] = None,
+                             index: Optional[MediaReferenceIndex] = None,
+                             progress_callback: Optional[Callable] = None,
+                             max_workers: Optional[int] = None) -> Dict:
+        """
+        Find media uploaded more than once, byte for byte or visually
+        
+        Media is downloaded (or reused from download_dir) with
+        bulk_download_media and hashed in worker processes. Each cluster
+        lists every copy with the posts that reference it and suggests
+        the copy to keep: the most referenced, then the largest.
+        
+        Args:
+            media_ids: Specific media IDs to check (None for all)
+            download_dir: Directory holding the downloaded files
+            max_distance: Largest perceptual hash distance counted as a
+                duplicate (0 = byte-identical only)
+            posts: Posts to scan for references (default: stream all posts and pages)
+            index: Reference index already built from the content
+            progress_callback: Callback for progress updates
+            max_workers: Worker processes for hashing (default: available cores)
+            
+        Returns:
+            Dictionary with clusters, duplicate count and wasted bytes
+        """
+        detector = DuplicateDetector(max_distance=max_distance, max_workers=max_workers)
+        
+        downloads = self.bulk_download_media(media_ids, download_dir, progress_callback)
+        media_by_path = {entry['path']: entry['media_id'] for entry in downloads['files']}
+        
+        results = {
+            'total': len(media_by_path),
+            'clusters': [],
+            'duplicates': 0,
+            'wasted_bytes': 0,
+            'errors': list(downloads['errors'])
+        }
+        
+        hashes = []
+        for entry in detector.hash_all(media_by_path, progress_callback):
+            if entry.get('error'):
+                results['errors'].append({'media_id': media_by_path[entry['path']], 'error': entry['error']})
+            else:
+                hashes.append(entry)
+                
+        clusters = detector.clusters(hashes)
+        if not clusters:
+            return results
+            
+        # Media items for the clustered IDs (listings come from the cache when fresh)
+        clustered = {media_by_path[entry['path']] for cluster in clusters for entry in cluster['files']}
+        items = {item['id']: item for item in self.iter_media() if item['id'] in clustered}
+        index = index or self.build_reference_index(posts)
+        
+        for cluster in clusters:
+            copies = []
+            for entry in cluster['files']:
+                media_id = media_by_path[entry['path']]
+                item = items.get(media_id, {'id': media_id})
+                copies.append({
+                    'media_id': media_id,
+                    'file': os.path.basename(entry['path']),
+                    'url': item.get('source_url'),
+                    'bytes': entry['bytes'],
+                    'width': entry['width'],
+                    'height': entry['height'],
+                    'distance': entry['distance'],
+                    'references': sorted(index.references(item))
+                })
+                
+            copies.sort(key=lambda copy: (-len(copy['references']),
+                                          -((copy['width'] or 0) * (copy['height'] or 0)),
+                                          copy['media_id']))
+            wasted = sum(copy['bytes'] for copy in copies[1:])
+            results['clusters'].append({
+                'kind': cluster['kind'],
+                'keep': copies[0]['media_id'],
+                'wasted_bytes': wasted,
+                'copies': copies
+            })
+            results['duplicates'] += len(copies) - 1
+            results['wasted_bytes'] += wasted
+            
+        results['clusters'].sort(key=lambda cluster: -cluster['wasted_bytes'])
+        logger.info(
+            f"Found {results['duplicates']} duplicate media items in {len(results['clusters'])} clusters, "
+            f"{results['wasted_bytes']} bytes wasted"
+        )
+        return results
\ No newline at end of file
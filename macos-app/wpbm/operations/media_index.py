@@ -0,0 +1,178 @@
+"""
+Media reference index for WP Bulk Manager
+"""
+from typing import Dict, Iterable, List, Optional, Set
+from urllib.parse import unquote
+import json
+import re
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Everything that can point at an attachment, matched in one scan:
+# block attributes, wp-image-N classes, gallery data-id attributes,
+# [gallery ids="..."] shortcodes and any /uploads/ path (src, href,
+# srcset entries, CSS url(), block attribute URLs)
+_REFERENCES = re.compile(
+    r'<!--\s+wp:[a-z0-9/-]+\s+(?P<attrs>\{.*?\})\s+/?-->'
+    r'|\bwp-image-(?P<class_id>\d+)'
+    r'|\bdata-id=["\']?(?P<data_id>\d+)'
+    r'|\[gallery\b[^\]]*?\bids\s*=\s*["\']?(?P<gallery>[\d,\s]+)'
+    r'|/uploads/(?P<path>[^\s"\'<>()\\,?#]+)',
+    re.IGNORECASE | re.DOTALL
+)
+
+_UPLOAD_PATH = re.compile(r'/uploads/([^\s"\'<>()\\,?#]+)')
+_ID_SEPARATOR = re.compile(r'[,\s]+')
+
+# Block attributes holding attachment IDs
+_ID_ATTRIBUTES = ('id', 'mediaId', 'ids')
+
+# Suffixes WordPress adds to derived files: -300x200 sizes, -e1700000000000
+# edits, -scaled/-rotated originals
+_SIZE_SUFFIX = re.compile(r'-\d+x\d+$')
+_DERIVED_SUFFIX = re.compile(r'-(?:scaled|rotated|e\d{10,13})$')
+
+
+def upload_key(url: str) -> Optional[str]:
+    """
+    Key shared by an upload and all its derived files
+    
+    'https://site/wp-content/uploads/2024/01/photo-300x200.jpg' and
+    '/wp-content/uploads/2024/01/photo-scaled.jpg' both give
+    '2024/01/photo.jpg'.
+    """
+    if not url:
+        return None
+    path = unquote(url.split('?', 1)[0].split('#', 1)[0])
+    if '/uploads/' in path:
+        path = path.rsplit('/uploads/', 1)[1]
+    path = path.lstrip('/')
+    
+    stem, dot, extension = path.rpartition('.')
+    if not dot or '/' in extension:
+        return path or None
+    stem = _SIZE_SUFFIX.sub('', stem)
+    stem = _DERIVED_SUFFIX.sub('', stem)
+    return f"{stem}.{extension.lower()}"
+
+
+class MediaReferenceIndex:
+    """
+    Which posts reference which attachments, by ID and by file
+    
+    Built in one pass over the content: each post is scanned once with a
+    single combined pattern, recording attachment IDs (blocks, classes,
+    galleries, featured images) and upload files (any size variant, srcset
+    entries included, reduced to a shared key). Checking a media item is
+    then a few set lookups, so finding unused media is linear in posts
+    plus media instead of their product.
+    """
+    
+    def __init__(self):
+        self.ids: Dict[int, Set[int]] = {}
+        self.files: Dict[str, Set[int]] = {}
+        self.posts_indexed = 0
+        
+    @classmethod
+    def build(cls, posts: Iterable[Dict]) -> 'MediaReferenceIndex':
+        """Index every post from an iterable, e.g. a content stream"""
+        index = cls()
+        for post in posts:
+            index.add_post(post)
+        logger.info(
+            f"Indexed {index.posts_indexed} posts: {len(index.ids)} attachment IDs, "
+            f"{len(index.files)} upload files referenced"
+        )
+        return index
+        
+    def add_post(self, post: Dict):
+        """Record the media references in one post"""
+        post_id = post.get('id')
+        self.posts_indexed += 1
+        
+        if post.get('featured_media'):
+            self._add_id(post['featured_media'], post_id)
+            
+        texts = [post.get('content') or '', post.get('excerpt') or '']
+        texts.extend(value for value in (post.get('meta') or {}).values() if isinstance(value, str))
+        
+        for text in texts:
+            if '/uploads/' in text or 'wp-' in text or 'data-id' in text or '[gallery' in text:
+                self._scan(text.replace('\\/', '/'), post_id)
+                
+    def _scan(self, text: str, post_id: int):
+        for match in _REFERENCES.finditer(text):
+            kind = match.lastgroup
+            value = match.group(kind)
+            
+            if kind == 'path':
+                key = upload_key(value)
+                if key:
+                    self.files.setdefault(key, set()).add(post_id)
+            elif kind == 'attrs':
+                self._add_block_ids(value, post_id)
+                # URLs inside the attributes (e.g. cover blocks) are scanned too
+                for path in _UPLOAD_PATH.findall(value):
+                    key = upload_key(path)
+                    if key:
+                        self.files.setdefault(key, set()).add(post_id)
+            elif kind == 'gallery':
+                for media_id in _ID_SEPARATOR.split(value.strip()):
+                    if media_id:
+                        self._add_id(media_id, post_id)
+            else:
+                self._add_id(value, post_id)
+                
+    def _add_block_ids(self, attrs: str, post_id: int):
+        try:
+            attributes = json.loads(attrs)
+        except ValueError:
+            return
+        if not isinstance(attributes, dict):
+            return
+            
+        for name in _ID_ATTRIBUTES:
+            value = attributes.get(name)
+            for media_id in value if isinstance(value, list) else [value]:
+                if isinstance(media_id, (int, str)) and str(media_id).isdigit():
+                    self._add_id(media_id, post_id)
+                    
+    def _add_id(self, media_id, post_id: int):
+        self.ids.setdefault(int(media_id), set()).add(post_id)
+        
+    @staticmethod
+    def media_keys(media: Dict) -> Set[str]:
+        """Upload keys for a media item's original and every size"""
+        details = media.get('media_details') or {}
+        urls = [media.get('source_url'), details.get('file'), details.get('original_image')]
+        urls.extend(size.get('source_url') or size.get('file') for size in (details.get('sizes') or {}).values())
+        
+        keys = set()
+        source_key = upload_key(media.get('source_url') or '')
+        for url in urls:
+            if not url:
+                continue
+            key = upload_key(url)
+            if key and '/' not in key and source_key and '/' in source_key:
+                # Bare size filenames live in the original's folder
+                key = source_key.rsplit('/', 1)[0] + '/' + key
+            if key:
+                keys.add(key)
+        return keys
+        
+    def references(self, media: Dict) -> Set[int]:
+        """IDs of posts that reference a media item"""
+        posts = set(self.ids.get(media['id'], ()))
+        for key in self.media_keys(media):
+            posts |= self.files.get(key, set())
+        return posts
+        
+    def is_used(self, media: Dict) -> bool:
+        """Whether any indexed post references a media item"""
+        return media['id'] in self.ids or any(key in self.files for key in self.media_keys(media))
+        
+    def find_unused(self, media_items: Iterable[Dict]) -> List[Dict]:
+        """Media items no indexed post references"""
+        return [media for media in media_items if not self.is_used(media)]
@@ -9,6 +9,7 @@ import tempfile
 
 from ..api.client import WPBMClient
 from ..utils.logger import get_logger
+from .journal import JobJournal
 
 logger = get_logger(__name__)
 
@@ -254,30 +255,55 @@ class PluginOperations:
         
         return [p for p in all_plugins if p.get('update_available', False)]
         
-    def update_all_plugins(self, progress_callback: Optional[callable] = None) -> Dict:
+    def update_all_plugins(self, progress_callback: Optional[callable] = None,
+                           journal: Optional[JobJournal] = None) -> Dict:
         """
         Update all plugins that have updates available
         
+        With a journal, the plan and each plugin's outcome are recorded as
+        they happen. A rerun after an interruption retries the plugins that
+        hadn't finished along with any updates released since, and the job
+        is closed once every plugin has been tried, even if some failed.
+        
         Args:
             progress_callback: Callback for progress updates
+            journal: Record the job so an interrupted run can be resumed
             
         Returns:
             Update results
         """
-        plugins_to_update = self.get_plugins_with_updates()
+        job = journal.resume_or_start('update_plugins', self.client.site_url, {}) if journal else None
         
+        plugins_to_update = self.get_plugins_with_updates()
+        if job:
+            if job.resumed:
+                # Retry last run's unfinished plugins even if no longer listed, so the job can close
+                listed = {plugin['plugin_file'] for plugin in plugins_to_update}
+                plugins_to_update = [plugin for _, plugin, _ in job.unfinished()
+                                     if plugin['plugin_file'] not in listed] + plugins_to_update
+            job.plan((plugin['plugin_file'], {
+                'plugin_file': plugin['plugin_file'],
+                'name': plugin.get('name', plugin['plugin_file'])
+            }) for plugin in plugins_to_update)
+            job.set_scan_complete()
+            
         results = {
             'total': len(plugins_to_update),
             'success': 0,
             'failed': 0,
             'results': []
         }
-        
+        if job:
+            results['job_id'] = job.id
+            
         for i, plugin in enumerate(plugins_to_update):
             if progress_callback:
                 plugin_name = plugin.get('name', 'Unknown')
                 progress_callback(i + 1, len(plugins_to_update), f"Updating {plugin_name}")
                 
+            if job:
+                job.mark(plugin['plugin_file'], 'running')
+                
             try:
                 result = self.update_plugin(plugin['plugin_file'])
                 
@@ -290,7 +316,10 @@ class PluginOperations:
                     'plugin': plugin['name'],
                     'result': result
                 })
-                
+                if job:
+                    job.mark(plugin['plugin_file'], 'done' if result.get('success') else 'failed',
+                             result=result, error=result.get('message') if not result.get('success') else None)
+                    
             except Exception as e:
                 logger.error(f"Error updating plugin {plugin['name']}: {e}")
                 results['failed'] += 1
@@ -298,7 +327,12 @@ class PluginOperations:
                     'plugin': plugin['name'],
                     'error': str(e)
                 })
-                
+                if job:
+                    job.mark(plugin['plugin_file'], 'failed', error=str(e))
+                    
+        if job:
+            job.finish()
+            
         return results
         
     def export_plugin_list(self) -> Dict:
@@ -0,0 +1,318 @@
+"""
+Multi-pattern search/replace rules for WP Bulk Manager
+"""
+from typing import Dict, Iterator, List, Optional, Tuple
+import re
+
+
+def _match_case(original: str, replacement: str) -> str:
+    """Give the replacement the case pattern of the matched text"""
+    if original.isupper() and len(original) > 1:
+        return replacement.upper()
+    if original[:1].isupper():
+        return replacement[:1].upper() + replacement[1:]
+    return replacement
+
+
+class ReplaceRule:
+    """A single literal or regex search/replace pair"""
+    
+    def __init__(self, search: str, replace: str, regex: bool = False,
+                 whole_word: bool = False, ignore_case: bool = False,
+                 preserve_case: bool = False, name: Optional[str] = None):
+        """
+        Initialize rule
+        
+        Args:
+            search: Literal text, or a pattern if regex
+            replace: Replacement text (may use \\1 / \\g<name> if regex)
+            regex: Treat search as a regular expression
+            whole_word: Only match at word boundaries, like \\b...\\b
+            ignore_case: Case-insensitive matching
+            preserve_case: Match the case of each replaced occurrence
+                (UPPER, Capitalised or lower)
+            name: Key for this rule's match counts (default: search)
+        """
+        if not search:
+            raise ValueError("Search text cannot be empty")
+            
+        self.search = search
+        self.replace = replace
+        self.regex = regex
+        self.whole_word = whole_word
+        self.ignore_case = ignore_case
+        self.preserve_case = preserve_case
+        self.name = name or search
+        
+        pattern = search if regex else re.escape(search)
+        if whole_word:
+            pattern = rf'\b(?:{pattern})\b'
+        self.pattern = pattern
+        # Compiled on its own to validate the rule and expand group references
+        self.compiled = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+        
+    def replacement(self, text: str, start: int, end: int) -> str:
+        """Replacement for the match at text[start:end]"""
+        if self.regex:
+            match = self.compiled.match(text, start)
+            value = match.expand(self.replace) if match and match.end() == end else self.replace
+        else:
+            value = self.replace
+            
+        if self.preserve_case:
+            value = _match_case(text[start:end], value)
+        return value
+        
+    def __repr__(self) -> str:
+        kind = 'regex' if self.regex else 'literal'
+        return f"ReplaceRule({kind} {self.search!r} -> {self.replace!r})"
+
+
+class ReplaceRuleSet:
+    """
+    Apply many search/replace rules in one scan of the text
+    
+    Literal rules are compiled into plain regex alternations, longest
+    pattern first (one for case-sensitive rules, one run over lowercased
+    text for ignore_case rules), and regex rules into a third; all are
+    built once and reused for every post, and re's C matcher does the
+    scanning. A set holding a single plain literal (no case or word
+    options) goes straight through str.replace. Matches never overlap: the leftmost match wins, then the
+    longest, then the rule added first. Rules are applied to the original
+    text, so one rule's replacement is never rewritten by another.
+    
+    Regex rules share one pattern, so refer to groups by name rather than
+    number and keep group names unique across rules.
+    """
+    
+    def __init__(self, rules: Optional[List[ReplaceRule]] = None):
+        """
+        Initialize rule set
+        
+        Args:
+            rules: Initial rules, in priority order
+        """
+        self.rules: List[ReplaceRule] = []
+        self._compiled = False
+        for rule in rules or []:
+            self.add_rule(rule)
+            
+    @classmethod
+    def from_mapping(cls, mapping: Dict[str, str], **options) -> 'ReplaceRuleSet':
+        """
+        Build a rule set from a {search: replace} dictionary
+        
+        Args:
+            mapping: Search/replace pairs
+            **options: ReplaceRule options applied to every pair
+            
+        Returns:
+            Compiled rule set
+        """
+        rule_set = cls([ReplaceRule(search, replace, **options) for search, replace in mapping.items()])
+        rule_set.compile()
+        return rule_set
+        
+    def add(self, search: str, replace: str, **options) -> ReplaceRule:
+        """Add a rule; options as for ReplaceRule"""
+        return self.add_rule(ReplaceRule(search, replace, **options))
+        
+    def add_rule(self, rule: ReplaceRule) -> ReplaceRule:
+        """Add an existing rule"""
+        if any(existing.name == rule.name for existing in self.rules):
+            raise ValueError(f"Duplicate rule name: {rule.name}")
+        self.rules.append(rule)
+        self._compiled = False
+        return rule
+        
+    def __len__(self) -> int:
+        return len(self.rules)
+        
+    def describe(self) -> List[Dict]:
+        """JSON-friendly description of the rules, e.g. to identify a job"""
+        return [{
+            'search': rule.search,
+            'replace': rule.replace,
+            'regex': rule.regex,
+            'whole_word': rule.whole_word,
+            'ignore_case': rule.ignore_case,
+            'preserve_case': rule.preserve_case
+        } for rule in self.rules]
+        
+    def compile(self):
+        """Build the combined literal and regex patterns"""
+        # Longest literal first, so at one position the longest match wins
+        literals = sorted(
+            ((index, rule) for index, rule in enumerate(self.rules) if not rule.regex),
+            key=lambda item: (-len(item[1].search), item[0])
+        )
+        self._literals = [
+            stream for stream in (
+                self._literal_stream([item for item in literals if not item[1].ignore_case], fold=False),
+                self._literal_stream([item for item in literals if item[1].ignore_case], fold=True)
+            ) if stream
+        ]
+        
+        alternatives = [
+            f'(?P<_r{index}>{"(?i:" if rule.ignore_case else "(?:"}{rule.pattern}))'
+            for index, rule in enumerate(self.rules) if rule.regex
+        ]
+        try:
+            self._regex = re.compile('|'.join(alternatives)) if alternatives else None
+        except re.error as e:
+            raise ValueError(f"Regex rules cannot be combined: {e}")
+            
+        only = self.rules[0] if len(self.rules) == 1 else None
+        self._plain = only if only and not (only.regex or only.whole_word or only.ignore_case
+                                            or only.preserve_case) else None
+        self._compiled = True
+        
+    def _literal_stream(self, literals: List[Tuple[int, ReplaceRule]],
+                        fold: bool) -> Optional[Tuple[re.Pattern, bool, Dict[str, List[int]]]]:
+        """
+        One alternation over literal rules, and the rules each matched text can belong to
+        
+        The alternation has no groups: named groups per rule would stop re
+        from using its fast literal-prefix scan, so the rule is looked up
+        from the matched text instead.
+        """
+        if not literals:
+            return None
+        lookup: Dict[str, List[int]] = {}
+        for index, rule in sorted(literals):
+            key = self._fold(rule.search) if fold else rule.search
+            lookup.setdefault(key, []).append(index)
+            
+        patterns = []
+        for _, rule in literals:
+            pattern = re.escape(self._fold(rule.search) if fold else rule.search)
+            patterns.append(rf'\b{pattern}\b' if rule.whole_word else pattern)
+        return re.compile('|'.join(patterns)), fold, lookup
+        
+    @staticmethod
+    def _fold(text: str) -> str:
+        """Lowercase text without changing its length, so offsets line up"""
+        folded = text.lower()
+        if len(folded) == len(text):
+            return folded
+        return ''.join(char.lower() if len(char.lower()) == 1 else char for char in text)
+        
+    def _next_literal(self, stream: Tuple[re.Pattern, bool, Dict[str, List[int]]],
+                      text: str, folded: str, position: int) -> Optional[Tuple[int, int, int]]:
+        """Next match of a literal stream at or after position"""
+        pattern, fold, lookup = stream
+        match = pattern.search(folded if fold else text, position)
+        if not match:
+            return None
+            
+        start, end = match.span()
+        indexes = lookup[match.group()]
+        return start, end, indexes[0] if len(indexes) == 1 else self._pick(indexes, text, start, end)
+        
+    def _pick(self, indexes: List[int], text: str, start: int, end: int) -> int:
+        """Rules sharing a search text differ in options: first one that matches here wins"""
+        for index in indexes:
+            rule_match = self.rules[index].compiled.match(text, start)
+            if rule_match and rule_match.end() == end:
+                return index
+        return indexes[0]
+        
+    def _regex_match(self, text: str, position: int) -> Optional[Tuple[int, int, int]]:
+        """Next non-empty regex match at or after position"""
+        while self._regex and position <= len(text):
+            match = self._regex.search(text, position)
+            if not match:
+                return None
+            if match.end() > match.start():
+                return match.start(), match.end(), int(match.lastgroup[2:])
+            position = match.start() + 1
+        return None
+        
+    def finditer(self, text: str) -> Iterator[Tuple[int, int, ReplaceRule]]:
+        """
+        Yield the non-overlapping matches in text, in order
+        
+        Yields:
+            (start, end, rule) for each match
+        """
+        if not self._compiled:
+            self.compile()
+        if not text:
+            return
+            
+        folded = self._fold(text) if any(fold for _, fold, _ in self._literals) else text
+        if len(self._literals) == 1 and not self._regex:
+            # One stream: re's own non-overlapping scan is already the answer
+            pattern, fold, lookup = self._literals[0]
+            for match in pattern.finditer(folded if fold else text):
+                start, end = match.span()
+                indexes = lookup[match.group()]
+                index = indexes[0] if len(indexes) == 1 else self._pick(indexes, text, start, end)
+                yield start, end, self.rules[index]
+            return
+            
+        literals = [self._next_literal(stream, text, folded, 0) for stream in self._literals]
+        regex_match = self._regex_match(text, 0)
+        end = 0
+        
+        while True:
+            # Look again past candidates overlapping the last accepted match
+            for position, literal in enumerate(literals):
+                if literal and literal[0] < end:
+                    literals[position] = self._next_literal(self._literals[position], text, folded, end)
+            if regex_match and regex_match[0] < end:
+                regex_match = self._regex_match(text, end)
+                
+            candidates = [match for match in literals + [regex_match] if match]
+            if not candidates:
+                return
+                
+            start, end, index = min(candidates, key=lambda match: (match[0], match[0] - match[1], match[2]))
+            yield start, end, self.rules[index]
+            
+    def apply(self, text: str) -> Tuple[str, Dict[str, int]]:
+        """
+        Apply every rule to text in one pass
+        
+        Args:
+            text: Text to rewrite
+            
+        Returns:
+            Tuple of (new text, {rule name: matches}) for rules that matched
+        """
+        if not self._compiled:
+            self.compile()
+        if self._plain and text:
+            count = text.count(self._plain.search)
+            if not count:
+                return text, {}
+            return text.replace(self._plain.search, self._plain.replace), {self._plain.name: count}
+            
+        parts = []
+        counts: Dict[str, int] = {}
+        position = 0
+        
+        for start, end, rule in self.finditer(text or ''):
+            parts.append(text[position:start])
+            parts.append(rule.replacement(text, start, end))
+            counts[rule.name] = counts.get(rule.name, 0) + 1
+            position = end
+            
+        if not counts:
+            return text, counts
+            
+        parts.append(text[position:])
+        return ''.join(parts), counts
+        
+    def count(self, text: str) -> Dict[str, int]:
+        """Matches per rule name, without building the new text"""
+        if not self._compiled:
+            self.compile()
+        if self._plain and text:
+            count = text.count(self._plain.search)
+            return {self._plain.name: count} if count else {}
+            
+        counts: Dict[str, int] = {}
+        for _, _, rule in self.finditer(text or ''):
+            counts[rule.name] = counts.get(rule.name, 0) + 1
+        return counts
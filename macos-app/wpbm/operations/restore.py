@@ -0,0 +1,327 @@
+"""
+Restore operations for WP Bulk Manager
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import difflib
+import hashlib
+import json
+import math
+
+from ..api.client import WPBMClient
+from ..utils.backup_store import BackupStore
+from ..utils.logger import get_logger
+from .batch_writer import BatchWriter
+from .writer import SiteLimiter
+
+logger = get_logger(__name__)
+
+# Fields /content/{id} and /bulk/content can write back
+CONTENT_FIELDS = ('title', 'content', 'status')
+
+
+def field_hash(value: Any) -> str:
+    """SHA-256 of a field value's canonical JSON"""
+    canonical = json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class RestoreOperations:
+    """
+    Restore posts from backup snapshots, change-sets and revisions
+    
+    A restore first works out which posts actually differ from the live
+    site. Posts whose modified time still matches the backup are skipped
+    using the content manifest alone; the rest are fetched (by listing or
+    by ID, whichever takes fewer requests) and compared field by field by
+    hash. Only the differing fields of differing posts are written back,
+    batched through /bulk/content and /seo/bulk.
+    """
+    
+    def __init__(self, client: WPBMClient, store: Optional[BackupStore] = None):
+        """
+        Initialize restore operations
+        
+        Args:
+            client: API client for the site
+            store: Backup store holding snapshots and change-sets (default: ~/.wpbm/backups)
+        """
+        self.client = client
+        self.store = store or BackupStore()
+        
+    def restore_snapshot(self, snapshot_id: str, post_ids: Optional[List[int]] = None,
+                         fields: Tuple[str, ...] = CONTENT_FIELDS, include_seo: bool = False,
+                         dry_run: bool = True, progress_callback: Optional[Callable] = None,
+                         batch_size: int = 50, write_concurrency: Optional[int] = None,
+                         rate_limit: float = 0) -> Dict:
+        """
+        Restore posts to how they were in a snapshot
+        
+        Args:
+            snapshot_id: Snapshot to restore from
+            post_ids: Only restore these posts (None for every post in the snapshot)
+            fields: Content fields to restore
+            include_seo: Also restore SEO fields (snapshots taken with full content)
+            dry_run: Only report what would change, with a diff per field
+            progress_callback: Callback for progress updates
+            batch_size: Updates per bulk request
+            write_concurrency: Requests in flight at once (default: client.max_workers)
+            rate_limit: Maximum requests started per second (0 = unlimited)
+            
+        Returns:
+            Dictionary with results
+        """
+        wanted = set(post_ids) if post_ids else None
+        targets = {}
+        
+        entries = self.store.read_manifest(snapshot_id)
+        next(entries, None)  # header
+        for entry in entries:
+            if wanted is not None and entry['id'] not in wanted:
+                continue
+            post = self.store.get_object(entry['hash'])
+            values = {field: post[field] for field in fields if field in post}
+            if include_seo and post.get('seo'):
+                values['seo'] = post['seo']
+            targets[entry['id']] = {
+                'type': entry.get('type') or post.get('type'),
+                'modified': entry.get('modified'),
+                'fields': values
+            }
+            
+        return self._restore(targets, dry_run, progress_callback, batch_size,
+                             write_concurrency, rate_limit)
+        
+    def restore_changeset(self, changeset_id: str, post_ids: Optional[List[int]] = None,
+                          dry_run: bool = True, progress_callback: Optional[Callable] = None,
+                          batch_size: int = 50, write_concurrency: Optional[int] = None,
+                          rate_limit: float = 0) -> Dict:
+        """
+        Roll back the fields recorded in a change-set
+        
+        Args:
+            changeset_id: Change-set written before a bulk operation
+            post_ids: Only restore these posts (None for every recorded post)
+            dry_run: Only report what would change, with a diff per field
+            progress_callback: Callback for progress updates
+            batch_size: Updates per bulk request
+            write_concurrency: Requests in flight at once (default: client.max_workers)
+            rate_limit: Maximum requests started per second (0 = unlimited)
+            
+        Returns:
+            Dictionary with results
+        """
+        wanted = set(post_ids) if post_ids else None
+        targets = {}
+        
+        entries = self.store.read_changeset(changeset_id)
+        next(entries, None)  # header
+        for entry in entries:
+            if wanted is not None and entry['id'] not in wanted:
+                continue
+            target = targets.setdefault(entry['id'], {
+                'type': entry.get('type'),
+                'modified': entry.get('modified'),
+                'fields': {}
+            })
+            # A post recorded twice (e.g. by a resumed job) keeps its earliest values
+            for field, value in entry['fields'].items():
+                target['fields'].setdefault(field, value)
+                
+        return self._restore(targets, dry_run, progress_callback, batch_size,
+                             write_concurrency, rate_limit)
+        
+    def restore_revisions(self, revisions: Dict[int, int],
+                          progress_callback: Optional[Callable] = None,
+                          write_concurrency: Optional[int] = None,
+                          rate_limit: float = 0) -> Dict:
+        """
+        Restore many posts to revisions concurrently
+        
+        Args:
+            revisions: Revision ID to restore, by post ID
+            progress_callback: Callback for progress updates
+            write_concurrency: Requests in flight at once (default: client.max_workers)
+            rate_limit: Maximum requests started per second (0 = unlimited)
+            
+        Returns:
+            Dictionary with results
+        """
+        results = {
+            'total_posts': len(revisions),
+            'restored': 0,
+            'errors': []
+        }
+        max_concurrency = write_concurrency or self.client.max_workers
+        limiter = SiteLimiter.for_site(self.client.site_url, max_concurrency, rate_limit)
+        
+        def restore(item: Tuple[int, int]) -> Tuple[int, Optional[Exception]]:
+            post_id, revision_id = item
+            try:
+                with limiter:
+                    self.client.restore_revision(post_id, revision_id)
+                return post_id, None
+            except Exception as e:
+                logger.error(f"Error restoring revision {revision_id} for post {post_id}: {e}")
+                return post_id, e
+                
+        try:
+            with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+                for done, (post_id, error) in enumerate(executor.map(restore, revisions.items()), 1):
+                    if error is None:
+                        results['restored'] += 1
+                    else:
+                        results['errors'].append({'post_id': post_id, 'error': str(error)})
+                    if progress_callback:
+                        progress_callback(done, len(revisions), f"Restored revision of post {post_id}")
+        finally:
+            limiter.release()
+            
+        return results
+        
+    def _restore(self, targets: Dict[int, Dict], dry_run: bool,
+                 progress_callback: Optional[Callable], batch_size: int,
+                 write_concurrency: Optional[int], rate_limit: float) -> Dict:
+        """Diff targets against the live site and write back what differs"""
+        results = {
+            'total_posts': len(targets),
+            'unchanged': 0,
+            'missing': [],
+            'posts_restored': 0,
+            'changes': [],
+            'errors': []
+        }
+        
+        updates = []
+        for done, (post_id, live) in enumerate(self._iter_live(targets, results), 1):
+            if progress_callback:
+                progress_callback(done, len(targets), f"Comparing post {post_id}")
+            if live is None:
+                results['unchanged'] += 1
+                continue
+                
+            target = targets[post_id]['fields']
+            changed = self._changed_fields(target, live)
+            if not changed:
+                results['unchanged'] += 1
+                continue
+                
+            change = {
+                'id': post_id,
+                'title': live.get('title', ''),
+                'fields': sorted(changed)
+            }
+            if dry_run:
+                change['diff'] = {field: self._diff(field, live.get(field), target[field])
+                                  for field in sorted(changed)}
+            results['changes'].append(change)
+            updates.append((post_id, {field: target[field] for field in changed}))
+            
+        if dry_run or not updates:
+            return results
+            
+        def record(post_id, response, error):
+            if error is None:
+                restored.add(post_id)
+            else:
+                results['errors'].append({'post_id': post_id, 'error': str(error)})
+            if progress_callback:
+                progress_callback(len(restored), len(updates), f"Restored post {post_id}")
+                
+        restored = set()
+        content_writer = BatchWriter(self.client, 'content', max_items=batch_size,
+                                     max_concurrency=write_concurrency, rate_limit=rate_limit)
+        seo_writer = BatchWriter(self.client, 'seo', max_items=batch_size,
+                                 max_concurrency=write_concurrency, rate_limit=rate_limit)
+        try:
+            for post_id, data in updates:
+                seo = data.pop('seo', None)
+                if data:
+                    content_writer.submit(post_id, data, record)
+                if seo:
+                    seo_writer.submit(post_id, seo, record)
+        finally:
+            content_writer.close()
+            seo_writer.close()
+            
+        failed = {error['post_id'] for error in results['errors']}
+        results['posts_restored'] = len(restored - failed)
+        logger.info(f"Restored {results['posts_restored']} of {len(updates)} changed posts")
+        
+        return results
+        
+    def _iter_live(self, targets: Dict[int, Dict], results: Dict) -> Iterator[Tuple[int, Optional[Dict]]]:
+        """
+        Yield (post_id, live post) for each target, or None when it's unchanged since the backup
+        
+        Posts gone from the site are added to results['missing'] instead.
+        """
+        by_type: Dict[str, List[int]] = {}
+        for post_id, target in targets.items():
+            by_type.setdefault(target['type'] or 'post', []).append(post_id)
+            
+        for post_type, post_ids in by_type.items():
+            manifest = {int(item[0]): item[1] for item in self.client.get_content_manifest(post_type)}
+            to_fetch = []
+            
+            for post_id in post_ids:
+                if post_id not in manifest:
+                    results['missing'].append(post_id)
+                elif targets[post_id]['modified'] and manifest[post_id] == targets[post_id]['modified']:
+                    # Not edited since the backup, so nothing to restore
+                    yield post_id, None
+                else:
+                    to_fetch.append(post_id)
+                    
+            if not to_fetch:
+                continue
+                
+            # List the whole type if that takes fewer requests than fetching by ID
+            pages = math.ceil(len(manifest) / 100)
+            if pages < len(to_fetch):
+                wanted = set(to_fetch)
+                for post in self.client.iter_content(content_type=post_type, use_cache=False, full=1):
+                    if post['id'] in wanted:
+                        wanted.discard(post['id'])
+                        yield post['id'], post
+                for post_id in wanted:
+                    results['missing'].append(post_id)
+            else:
+                with ThreadPoolExecutor(max_workers=self.client.max_workers) as executor:
+                    for post_id, post in zip(to_fetch, executor.map(self._fetch_post, to_fetch)):
+                        if post is None:
+                            results['missing'].append(post_id)
+                        else:
+                            yield post_id, post
+                            
+    def _fetch_post(self, post_id: int) -> Optional[Dict]:
+        """Live copy of a post, bypassing the cache"""
+        try:
+            return self.client.get_content_by_id(post_id, use_cache=False)
+        except Exception as e:
+            logger.error(f"Error fetching post {post_id}: {e}")
+            return None
+            
+    @staticmethod
+    def _changed_fields(target: Dict[str, Any], live: Dict[str, Any]) -> List[str]:
+        """Target fields whose value differs from the live post"""
+        changed = []
+        for field, value in target.items():
+            live_value = live.get(field)
+            if field == 'seo' and isinstance(value, dict):
+                # Only compare the SEO fields the backup has
+                live_value = {key: (live_value or {}).get(key) for key in value}
+            if field_hash(value) != field_hash(live_value):
+                changed.append(field)
+        return changed
+        
+    @staticmethod
+    def _diff(field: str, live: Any, target: Any) -> str:
+        """Unified diff from the live value to the restored one"""
+        if not isinstance(live, str) or not isinstance(target, str):
+            live = json.dumps(live, indent=1, sort_keys=True)
+            target = json.dumps(target, indent=1, sort_keys=True)
+        return ''.join(difflib.unified_diff(
+            live.splitlines(True), target.splitlines(True),
+            fromfile=f'live/{field}', tofile=f'backup/{field}'
+        ))
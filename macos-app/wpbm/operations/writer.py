@@ -0,0 +1,204 @@
+"""
+Concurrent write-back for WP Bulk Manager bulk operations
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+import threading
+import time
+
+from ..api.client import WPBMClient
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class SiteLimiter:
+    """
+    Concurrency cap and rate limit shared by every writer for one site
+    
+    Limiters are registered per site URL, so two bulk jobs against the
+    same site share its budget instead of doubling the load on it. Each
+    job joins with its own limits through for_site() and releases them
+    when it is done; the site runs at the strictest limits of the jobs
+    currently using it, and is forgotten once none are.
+    """
+    
+    _registry: Dict[str, 'SiteLimiter'] = {}
+    _registry_lock = threading.Lock()
+    
+    def __init__(self, max_concurrency: int = 4, rate_limit: float = 0):
+        """
+        Initialize limiter
+        
+        Args:
+            max_concurrency: Writes in flight at once
+            rate_limit: Maximum writes started per second (0 = unlimited)
+        """
+        self.max_concurrency = max_concurrency
+        self.rate_limit = rate_limit
+        self._in_flight = 0
+        self._slots = threading.Condition()
+        self._rate_lock = threading.Lock()
+        self._next_start = 0.0
+        self._jobs: Dict[int, Tuple[int, float]] = {}
+        
+    @classmethod
+    def for_site(cls, site_url: str, max_concurrency: int = 4,
+                 rate_limit: float = 0) -> 'SiteLimit':
+        """Join a site's shared limiter with one job's limits; release() the result when done"""
+        site_url = site_url.rstrip('/')
+        with cls._registry_lock:
+            limiter = cls._registry.get(site_url)
+            if limiter is None:
+                limiter = cls._registry[site_url] = cls(max_concurrency, rate_limit)
+            lease = SiteLimit(limiter, site_url)
+            limiter._jobs[id(lease)] = (max_concurrency, rate_limit)
+            limiter._apply_limits()
+            
+        if (limiter.max_concurrency, limiter.rate_limit) != (max_concurrency, rate_limit):
+            logger.info(
+                f"Another job is writing to {site_url}: using concurrency "
+                f"{limiter.max_concurrency}, rate {limiter.rate_limit or 'unlimited'}/s"
+            )
+        return lease
+        
+    @classmethod
+    def _release(cls, lease: 'SiteLimit'):
+        with cls._registry_lock:
+            limiter = lease.limiter
+            if limiter._jobs.pop(id(lease), None) is None:
+                return
+            if limiter._jobs:
+                limiter._apply_limits()
+            elif cls._registry.get(lease.site_url) is limiter:
+                del cls._registry[lease.site_url]
+                
+    def _apply_limits(self):
+        """Run at the strictest limits of the jobs using the site"""
+        limits = list(self._jobs.values())
+        rates = [rate for _, rate in limits if rate > 0]
+        with self._slots:
+            self.max_concurrency = min(concurrency for concurrency, _ in limits)
+            # A job leaving may raise the cap: wake writers waiting for a slot
+            self._slots.notify_all()
+        with self._rate_lock:
+            self.rate_limit = min(rates) if rates else 0
+            
+    def __enter__(self):
+        with self._slots:
+            while self._in_flight >= self.max_concurrency:
+                self._slots.wait()
+            self._in_flight += 1
+            
+        if self.rate_limit > 0:
+            # Reserve the next start time, then wait for it outside the lock
+            with self._rate_lock:
+                now = time.monotonic()
+                start = max(now, self._next_start)
+                self._next_start = start + 1.0 / self.rate_limit
+            if start > now:
+                time.sleep(start - now)
+        return self
+        
+    def __exit__(self, *exc):
+        with self._slots:
+            self._in_flight -= 1
+            self._slots.notify()
+        return False
+
+
+class SiteLimit:
+    """One job's use of a SiteLimiter: enter it around each request"""
+    
+    def __init__(self, limiter: SiteLimiter, site_url: str):
+        self.limiter = limiter
+        self.site_url = site_url
+        
+    def __enter__(self):
+        self.limiter.__enter__()
+        return self
+        
+    def __exit__(self, *exc):
+        return self.limiter.__exit__(*exc)
+        
+    def release(self):
+        """Stop counting this job's limits for the site"""
+        SiteLimiter._release(self)
+
+
+class ParallelWriter:
+    """
+    Bounded pool that writes content updates while the caller keeps scanning
+    
+    The scan loop submits updates and moves on; a small pool of workers
+    PUTs them concurrently within the site's limits. Submitting blocks once
+    max_pending updates are queued, so memory stays bounded when writes are
+    slower than the scan. Completion callbacks run one at a time, so they
+    can update a shared results dictionary without their own locking.
+    """
+    
+    def __init__(self, client: WPBMClient, max_concurrency: Optional[int] = None,
+                 rate_limit: float = 0, max_pending: Optional[int] = None):
+        """
+        Initialize writer
+        
+        Args:
+            client: API client for the site
+            max_concurrency: Writes in flight at once (default: client.max_workers)
+            rate_limit: Maximum writes started per second (0 = unlimited)
+            max_pending: Queued writes before submit() blocks (default: 4x concurrency)
+        """
+        self.client = client
+        max_concurrency = max_concurrency or client.max_workers
+        self.limiter = SiteLimiter.for_site(client.site_url, max_concurrency, rate_limit)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix='wpbm-writer'
+        )
+        self._pending = threading.BoundedSemaphore(max_pending or max_concurrency * 4)
+        self._callback_lock = threading.Lock()
+        self.submitted = 0
+        
+    def submit(self, content_id: int, data: Dict[str, Any],
+               callback: Optional[Callable[[int, Optional[Dict], Optional[Exception]], None]] = None):
+        """
+        Queue a content update
+        
+        Args:
+            content_id: Post ID to update
+            data: Fields to update
+            callback: Called as callback(content_id, response, error) when done
+        """
+        self._pending.acquire()
+        self.submitted += 1
+        self._executor.submit(self._write, content_id, data, callback)
+        
+    def _write(self, content_id: int, data: Dict[str, Any], callback: Optional[Callable]):
+        """Worker: PUT one update within the site limits and report it"""
+        response, error = None, None
+        try:
+            with self.limiter:
+                response = self.client.update_content(content_id, data)
+        except Exception as e:
+            logger.error(f"Error updating post {content_id}: {e}")
+            error = e
+        finally:
+            self._pending.release()
+            
+        if callback:
+            with self._callback_lock:
+                try:
+                    callback(content_id, response, error)
+                except Exception as e:
+                    logger.error(f"Write callback failed for post {content_id}: {e}")
+                    
+    def close(self):
+        """Wait for every queued write to finish"""
+        self._executor.shutdown(wait=True)
+        self.limiter.release()
+        
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, *exc):
+        self.close()
+        return False
@@ -0,0 +1,9 @@
+"""
+WP Bulk Manager Sync Module
+"""
+
+from .store import ContentStore
+from .content_sync import ContentSync
+from .mirror import ContentMirror
+
+__all__ = ['ContentStore', 'ContentSync', 'ContentMirror']
@@ -0,0 +1,153 @@
+"""
+Incremental content sync for WP Bulk Manager
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+from ..api.client import WPBMClient
+from ..utils.logger import get_logger
+from .store import ContentStore, post_cursor
+
+logger = get_logger(__name__)
+
+# Cursor used for a first sync, so the server pages oldest-first from the start
+EPOCH = ('1970-01-01 00:00:00', 0)
+
+
+class ContentSync:
+    """
+    Keep a ContentStore up to date with a site
+    
+    Each run asks /content only for posts modified at or after the stored
+    cursor, oldest first, and advances the cursor page by page, so an
+    interrupted run resumes where it stopped. Deletions (and any change
+    the cursor missed) are found by comparing the site's ID/modified
+    manifest with the store.
+    """
+    
+    def __init__(self, client: WPBMClient, store: Optional[ContentStore] = None,
+                 page_size: int = 100):
+        """
+        Initialize sync
+        
+        Args:
+            client: API client for the site
+            store: Local content store (default: ~/.wpbm/content.db)
+            page_size: Posts per /content request
+        """
+        self.client = client
+        self.store = store or ContentStore()
+        self.page_size = page_size
+        self.site = client.site_url
+        
+    def sync(self, content_types: List[str] = None, status: str = 'any',
+             detect_deletions: bool = True,
+             progress_callback: Optional[Callable] = None) -> Dict:
+        """
+        Bring the local copy of the site's content up to date
+        
+        Args:
+            content_types: Post types to sync (default: post, page)
+            status: Post status filter
+            detect_deletions: Reconcile against the site's manifest
+            progress_callback: Callback for progress updates
+            
+        Returns:
+            Dictionary with per-type and overall counts
+        """
+        content_types = content_types or ['post', 'page']
+        results = {
+            'fetched': 0,
+            'deleted': 0,
+            'repaired': 0,
+            'types': {},
+            'errors': []
+        }
+        
+        for content_type in content_types:
+            type_results = {'fetched': 0, 'deleted': 0, 'repaired': 0}
+            results['types'][content_type] = type_results
+            
+            try:
+                type_results['fetched'] = self._pull_changes(content_type, status, progress_callback)
+                if detect_deletions:
+                    self._reconcile(content_type, status, type_results)
+                type_results['total'] = self.store.count(self.site, content_type)
+            except Exception as e:
+                logger.error(f"Error syncing {content_type} for {self.site}: {e}")
+                results['errors'].append({
+                    'content_type': content_type,
+                    'error': str(e)
+                })
+                
+            for key in ('fetched', 'deleted', 'repaired'):
+                results[key] += type_results[key]
+                
+        logger.info(
+            f"Synced {self.site}: {results['fetched']} fetched, "
+            f"{results['deleted']} deleted, {results['repaired']} repaired"
+        )
+        return results
+        
+    def _pull_changes(self, content_type: str, status: str,
+                      progress_callback: Optional[Callable]) -> int:
+        """Fetch posts changed since the cursor and store them page by page"""
+        cursor = self.store.get_cursor(self.site, content_type) or EPOCH
+        fetched = 0
+        
+        pages = self.client.iter_content_pages(
+            content_type=content_type, limit=self.page_size, status=status,
+            use_cache=False, modified_after=cursor[0], full=1
+        )
+        for page in pages:
+            # The filter is inclusive, so drop what the cursor already covers
+            posts = [post for post in page.get('posts', []) if post_cursor(post) > cursor]
+            if not posts:
+                continue
+                
+            self.store.upsert_posts(self.site, content_type, posts)
+            fetched += len(posts)
+            
+            # Pages arrive oldest-first, so the cursor can move after each one
+            newest = max(post_cursor(post) for post in posts)
+            if newest > cursor:
+                cursor = newest
+                self.store.set_cursor(self.site, content_type, cursor)
+                
+            if progress_callback:
+                total = int(page.get('total') or 0) or fetched
+                progress_callback(fetched, total, f"Synced {fetched} {content_type} items")
+                
+        return fetched
+        
+    def _reconcile(self, content_type: str, status: str, type_results: Dict):
+        """Drop posts gone from the site and refetch any the cursor missed"""
+        try:
+            manifest = self.client.get_content_manifest(content_type, status)
+        except requests.exceptions.HTTPError as e:
+            # Older client plugins have no manifest endpoint
+            logger.warning(f"Skipping deletion check for {content_type}: {e}")
+            return
+            
+        remote = {int(post_id): modified for post_id, modified in manifest}
+        local = self.store.get_manifest(self.site, content_type)
+        
+        deleted = [post_id for post_id in local if post_id not in remote]
+        type_results['deleted'] = self.store.delete_posts(self.site, deleted)
+        
+        missing = [post_id for post_id, modified in remote.items() if local.get(post_id) != modified]
+        if not missing:
+            return
+            
+        def fetch(post_id: int) -> Optional[Dict]:
+            try:
+                return self.client.get(f'/content/{post_id}', use_cache=False)
+            except requests.exceptions.RequestException as e:
+                logger.warning(f"Error fetching content {post_id}: {e}")
+                return None
+                
+        with ThreadPoolExecutor(max_workers=self.client.max_workers) as executor:
+            posts = [post for post in executor.map(fetch, missing) if post]
+        type_results['repaired'] = self.store.upsert_posts(self.site, content_type, posts)
@@ -0,0 +1,262 @@
+"""
+Local content mirror queries for WP Bulk Manager
+"""
+import re
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..api.client import WPBMClient
+from ..utils.logger import get_logger
+from .content_sync import ContentSync
+from .store import ContentStore, post_text
+
+logger = get_logger(__name__)
+
+# Relative weight of each indexed column in search ranking
+# (title, content, excerpt, seo_title, seo_description)
+SEARCH_WEIGHTS = (10.0, 1.0, 2.0, 5.0, 3.0)
+
+
+class ContentMirror:
+    """
+    Search, preview and audit synced content without touching the sites
+    
+    Content comes from a ContentStore kept current by ContentSync; every
+    query runs against the local SQLite copy, across one site or all.
+    """
+    
+    def __init__(self, store: Optional[ContentStore] = None):
+        """
+        Initialize mirror
+        
+        Args:
+            store: Local content store (default: ~/.wpbm/content.db)
+        """
+        self.store = store or ContentStore()
+        
+    def sync(self, client: WPBMClient, content_types: List[str] = None,
+             progress_callback: Optional[Callable] = None) -> Dict:
+        """Pull changes for one site into the mirror"""
+        return ContentSync(client, self.store).sync(content_types, progress_callback=progress_callback)
+        
+    @staticmethod
+    def _filters(site: Optional[str], content_type: Optional[str],
+                 status: Optional[str] = None, alias: str = 'p') -> Tuple[str, List[Any]]:
+        """SQL conditions for the optional site/type/status filters"""
+        conditions = []
+        args: List[Any] = []
+        for column, value in (('site', site and site.rstrip('/')), ('type', content_type),
+                              ('status', status)):
+            if value:
+                conditions.append(f'{alias}.{column} = ?')
+                args.append(value)
+        return ''.join(f' AND {condition}' for condition in conditions), args
+        
+    def search(self, query: str, site: Optional[str] = None, type: Optional[str] = None,
+               status: Optional[str] = None, limit: int = 50, raw: bool = False) -> List[Dict]:
+        """
+        Full-text search over title, content, excerpt and SEO fields
+        
+        Args:
+            query: Words to find (all must match), or an FTS5 query if raw
+            site: Limit to one site URL
+            type: Limit to one post type
+            status: Limit to one post status
+            limit: Maximum results
+            raw: Pass query to FTS5 unchanged (phrases, OR, NEAR, prefix*)
+            
+        Returns:
+            Best matches first, with a highlighted snippet
+        """
+        if not raw:
+            words = re.findall(r'\w+', query)
+            if not words:
+                return []
+            query = ' '.join(f'"{word}"' for word in words)
+            
+        where, args = self._filters(site, type, status)
+        rows = self.store.query(f'''
+            SELECT p.site, p.id, p.type, p.status, posts_fts.title,
+                   json_extract(p.data, '$.link'),
+                   snippet(posts_fts, 1, '[', ']', '...', 12),
+                   bm25(posts_fts, {', '.join(str(weight) for weight in SEARCH_WEIGHTS)}) AS rank
+            FROM posts_fts JOIN posts p ON p.rowid = posts_fts.rowid
+            WHERE posts_fts MATCH ?{where}
+            ORDER BY rank
+            LIMIT ?
+        ''', [query, *args, limit])
+        
+        return [{
+            'site': row[0],
+            'id': row[1],
+            'type': row[2],
+            'status': row[3],
+            'title': row[4],
+            'link': row[5],
+            'permalink': row[5],
+            'snippet': row[6],
+            'score': -row[7]
+        } for row in rows]
+        
+    def preview_replace(self, search: str, replace: str, site: Optional[str] = None,
+                        type: Optional[str] = None) -> Dict:
+        """
+        Dry-run a search/replace against the mirror
+        
+        Counts exact, case-sensitive matches the way the live operation
+        does, so results match ContentOperations.search_replace_content
+        with dry_run=True.
+        
+        Returns:
+            Dictionary with results, including the site of each change
+        """
+        results = {
+            'total_posts': 0,
+            'posts_modified': 0,
+            'total_replacements': 0,
+            'changes': [],
+            'errors': []
+        }
+        if not search:
+            return results
+            
+        where, args = self._filters(site, type)
+        results['total_posts'] = self.store.query(
+            f'SELECT COUNT(*) FROM posts p WHERE 1 = 1{where}', args
+        )[0][0]
+        
+        # instr() on the decoded fields narrows candidates without Python-side scans
+        rows = self.store.query(f'''
+            SELECT p.site, p.id, json_extract(p.data, '$.title'), json_extract(p.data, '$.content'),
+                   json_extract(p.data, '$.link')
+            FROM posts p
+            WHERE (instr(json_extract(p.data, '$.content'), ?) > 0
+                   OR instr(json_extract(p.data, '$.title'), ?) > 0){where}
+            ORDER BY p.site, p.id
+        ''', [search, search, *args])
+        
+        for post_site, post_id, title, content, link in rows:
+            title = post_text(title)
+            content = post_text(content)
+            content_matches = content.count(search)
+            title_matches = title.count(search)
+            if not content_matches and not title_matches:
+                continue
+                
+            results['changes'].append({
+                'site': post_site,
+                'id': post_id,
+                'title': title,
+                'new_title': title.replace(search, replace) if title_matches else title,
+                'url': link,
+                'content_replacements': content_matches,
+                'title_replacements': title_matches
+            })
+            results['total_replacements'] += content_matches + title_matches
+            results['posts_modified'] += 1
+            
+        return results
+        
+    def seo_audit(self, site: Optional[str] = None, type: Optional[str] = None,
+                  status: Optional[str] = 'publish') -> List[Dict]:
+        """
+        Check SEO titles and descriptions for every mirrored post
+        
+        Applies the same length rules as the assistant's SEO analysis and
+        also flags titles shared by more than one post on a site.
+        
+        Returns:
+            Posts with at least one issue, each with a list of issues
+        """
+        where, args = self._filters(site, type, status)
+        rows = self.store.query(f'''
+            SELECT p.site, p.id, p.type, json_extract(p.data, '$.title'),
+                   json_extract(p.data, '$.link'), s.title, s.description
+            FROM posts p JOIN post_seo s ON s.site = p.site AND s.id = p.id
+            WHERE 1 = 1{where}
+            ORDER BY p.site, p.id
+        ''', args)
+        
+        title_counts: Dict[Tuple[str, str], int] = defaultdict(int)
+        for row in rows:
+            if row[5]:
+                title_counts[(row[0], row[5])] += 1
+                
+        report = []
+        for post_site, post_id, post_type, title, link, seo_title, seo_description in rows:
+            issues = []
+            
+            if not seo_title:
+                issues.append({'type': 'missing_title', 'severity': 'high',
+                               'message': "No custom SEO title set"})
+            elif len(seo_title) > 60:
+                issues.append({'type': 'title_too_long', 'severity': 'medium',
+                               'message': f"Title is {len(seo_title)} chars (recommended: 50-60)"})
+            elif len(seo_title) < 30:
+                issues.append({'type': 'title_too_short', 'severity': 'medium',
+                               'message': f"Title is {len(seo_title)} chars (recommended: 30-60)"})
+                               
+            if seo_title and title_counts[(post_site, seo_title)] > 1:
+                issues.append({'type': 'duplicate_title', 'severity': 'medium',
+                               'message': f"SEO title used by {title_counts[(post_site, seo_title)]} posts"})
+                               
+            if not seo_description:
+                issues.append({'type': 'missing_description', 'severity': 'high',
+                               'message': "No custom SEO description set"})
+            elif len(seo_description) > 160:
+                issues.append({'type': 'description_too_long', 'severity': 'medium',
+                               'message': f"Description is {len(seo_description)} chars (recommended: 120-160)"})
+            elif len(seo_description) < 120:
+                issues.append({'type': 'description_too_short', 'severity': 'medium',
+                               'message': f"Description is {len(seo_description)} chars (recommended: 120-160)"})
+                               
+            if issues:
+                report.append({
+                    'site': post_site,
+                    'id': post_id,
+                    'type': post_type,
+                    'title': post_text(title),
+                    'url': link,
+                    'seo_title': seo_title,
+                    'seo_description': seo_description,
+                    'issues': issues
+                })
+                
+        return report
+        
+    def block_usage(self, site: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+        """Count posts and instances of each block type"""
+        where, args = self._filters(site, None, alias='b')
+        rows = self.store.query(f'''
+            SELECT b.block, COUNT(*), SUM(b.count)
+            FROM post_blocks b
+            WHERE 1 = 1{where}
+            GROUP BY b.block
+            ORDER BY COUNT(*) DESC
+        ''', args)
+        return {block: {'posts': posts, 'instances': instances} for block, posts, instances in rows}
+        
+    def find_block(self, block: str, site: Optional[str] = None,
+                   type: Optional[str] = None) -> List[Dict]:
+        """Posts that use a block, e.g. 'core/gallery' or 'image'"""
+        # Core blocks are serialized without their namespace
+        if block.startswith('core/'):
+            block = block[len('core/'):]
+            
+        where, args = self._filters(site, type)
+        rows = self.store.query(f'''
+            SELECT p.site, p.id, p.type, json_extract(p.data, '$.title'),
+                   json_extract(p.data, '$.link'), b.count
+            FROM post_blocks b JOIN posts p ON p.site = b.site AND p.id = b.id
+            WHERE b.block = ?{where}
+            ORDER BY p.site, p.id
+        ''', [block, *args])
+        
+        return [{
+            'site': row[0],
+            'id': row[1],
+            'type': row[2],
+            'title': post_text(row[3]),
+            'url': row[4],
+            'count': row[5]
+        } for row in rows]
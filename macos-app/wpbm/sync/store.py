@@ -0,0 +1,321 @@
+"""
+Local content store for WP Bulk Manager sync
+"""
+import os
+import re
+import html
+import json
+import time
+import sqlite3
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+BLOCK_PATTERN = re.compile(r'<!--\s+wp:([a-z][a-z0-9_-]*(?:/[a-z][a-z0-9_-]*)?)')
+COMMENT_PATTERN = re.compile(r'<!--.*?-->', re.DOTALL)
+TAG_PATTERN = re.compile(r'<[^>]+>')
+
+# Where SEO plugins keep their fields, for posts synced without a 'seo' section
+SEO_META_KEYS = {
+    'title': ('_yoast_wpseo_title', 'rank_math_title'),
+    'description': ('_yoast_wpseo_metadesc', 'rank_math_description'),
+    'focus_keyword': ('_yoast_wpseo_focuskw', 'rank_math_focus_keyword')
+}
+
+
+def post_cursor(post: Dict[str, Any]) -> Tuple[str, int]:
+    """Sync position of a post: (modified GMT timestamp, ID)"""
+    return (post.get('modified_gmt') or post.get('modified') or '', int(post['id']))
+
+
+def post_text(value: Any) -> str:
+    """Title/content fields may be plain strings or REST-style {'rendered': ...}"""
+    if isinstance(value, dict):
+        value = value.get('rendered') or value.get('raw') or ''
+    return value if isinstance(value, str) else ''
+
+
+def strip_markup(content: str) -> str:
+    """Plain text of post content, without block comments or tags"""
+    text = TAG_PATTERN.sub(' ', COMMENT_PATTERN.sub(' ', content))
+    return ' '.join(html.unescape(text).split())
+
+
+def seo_fields(post: Dict[str, Any]) -> Dict[str, str]:
+    """SEO title/description/keyword from the post's 'seo' section or its meta"""
+    seo = post.get('seo') if isinstance(post.get('seo'), dict) else {}
+    meta = post.get('meta') if isinstance(post.get('meta'), dict) else {}
+    fields = {}
+    
+    for field, keys in SEO_META_KEYS.items():
+        value = seo.get(field) or next((meta[key] for key in keys if meta.get(key)), '')
+        fields[field] = value if isinstance(value, str) else ''
+        
+    return fields
+
+
+class ContentStore:
+    """
+    SQLite copy of site content, keyed by site URL and post ID
+    
+    Alongside the posts it keeps one sync cursor per site and content type,
+    the (modified, id) of the newest change already stored. Every write
+    also maintains, in the same transaction, an FTS5 index over title,
+    plain-text content, excerpt and SEO fields, plus SEO and block-usage
+    tables, so the copy can be searched and audited without the site.
+    """
+    
+    SCHEMA = [
+        '''
+        CREATE TABLE IF NOT EXISTS posts (
+            site TEXT NOT NULL,
+            id INTEGER NOT NULL,
+            type TEXT NOT NULL,
+            status TEXT,
+            modified_gmt TEXT NOT NULL,
+            data TEXT NOT NULL,
+            synced_at REAL NOT NULL,
+            PRIMARY KEY (site, id)
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_posts_site_type ON posts(site, type)',
+        '''
+        CREATE TABLE IF NOT EXISTS sync_state (
+            site TEXT NOT NULL,
+            content_type TEXT NOT NULL,
+            cursor_modified TEXT NOT NULL,
+            cursor_id INTEGER NOT NULL,
+            last_sync REAL NOT NULL,
+            PRIMARY KEY (site, content_type)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS post_seo (
+            site TEXT NOT NULL,
+            id INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            description TEXT NOT NULL,
+            focus_keyword TEXT NOT NULL,
+            PRIMARY KEY (site, id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS post_blocks (
+            site TEXT NOT NULL,
+            id INTEGER NOT NULL,
+            block TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (site, id, block)
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_post_blocks_block ON post_blocks(block)'
+    ]
+    
+    # Full-text index; its rowids are the rowids of the posts table
+    FTS_SCHEMA = '''
+        CREATE VIRTUAL TABLE posts_fts USING fts5(
+            title, content, excerpt, seo_title, seo_description,
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+    '''
+    
+    def __init__(self, db_path: str = "~/.wpbm/content.db"):
+        self.db_path = os.path.expanduser(db_path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        with self._lock:
+            for statement in self.SCHEMA:
+                self._conn.execute(statement)
+            has_index = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'posts_fts'"
+            ).fetchone()
+            if not has_index:
+                self._conn.execute(self.FTS_SCHEMA)
+                
+        if not has_index:
+            self._rebuild_index()
+            
+    def _rebuild_index(self):
+        """Index posts stored before the search index existed"""
+        with self._lock:
+            rows = self._conn.execute('SELECT rowid, site, id, data FROM posts').fetchall()
+            if not rows:
+                return
+            self._conn.execute('BEGIN')
+            for rowid, site, post_id, data in rows:
+                self._index_post(rowid, site, post_id, json.loads(data))
+            self._conn.execute('COMMIT')
+        logger.info(f"Indexed {len(rows)} stored posts for search")
+        
+    def _index_post(self, rowid: int, site: str, post_id: int, post: Dict[str, Any]):
+        """Refresh search, SEO and block rows for a post; caller must hold the lock"""
+        content = post_text(post.get('content'))
+        seo = seo_fields(post)
+        
+        self._conn.execute('DELETE FROM posts_fts WHERE rowid = ?', (rowid,))
+        self._conn.execute(
+            'INSERT INTO posts_fts (rowid, title, content, excerpt, seo_title, seo_description) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (rowid, post_text(post.get('title')), strip_markup(content),
+             strip_markup(post_text(post.get('excerpt'))), seo['title'], seo['description'])
+        )
+        
+        self._conn.execute('''
+            INSERT OR REPLACE INTO post_seo (site, id, title, description, focus_keyword)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (site, post_id, seo['title'], seo['description'], seo['focus_keyword']))
+        
+        self._conn.execute('DELETE FROM post_blocks WHERE site = ? AND id = ?', (site, post_id))
+        blocks = Counter(BLOCK_PATTERN.findall(content))
+        self._conn.executemany(
+            'INSERT INTO post_blocks (site, id, block, count) VALUES (?, ?, ?, ?)',
+            [(site, post_id, block, count) for block, count in blocks.items()]
+        )
+        
+    def _unindex_post(self, rowid: int, site: str, post_id: int):
+        """Drop search, SEO and block rows for a post; caller must hold the lock"""
+        self._conn.execute('DELETE FROM posts_fts WHERE rowid = ?', (rowid,))
+        self._conn.execute('DELETE FROM post_seo WHERE site = ? AND id = ?', (site, post_id))
+        self._conn.execute('DELETE FROM post_blocks WHERE site = ? AND id = ?', (site, post_id))
+        
+    def upsert_posts(self, site: str, content_type: str, posts: Iterable[Dict[str, Any]]) -> int:
+        """Insert or replace posts in one transaction and return how many"""
+        now = time.time()
+        posts = list(posts)
+        if not posts:
+            return 0
+            
+        with self._lock:
+            self._conn.execute('BEGIN')
+            for post in posts:
+                post_id = int(post['id'])
+                # Upsert rather than REPLACE so the rowid (the index key) is kept
+                rowid = self._conn.execute('''
+                    INSERT INTO posts (site, id, type, status, modified_gmt, data, synced_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(site, id) DO UPDATE SET
+                        type = excluded.type,
+                        status = excluded.status,
+                        modified_gmt = excluded.modified_gmt,
+                        data = excluded.data,
+                        synced_at = excluded.synced_at
+                    RETURNING rowid
+                ''', (site, post_id, post.get('type') or content_type, post.get('status'),
+                      post_cursor(post)[0], json.dumps(post), now)).fetchone()[0]
+                self._index_post(rowid, site, post_id, post)
+            self._conn.execute('COMMIT')
+        return len(posts)
+        
+    def delete_posts(self, site: str, post_ids: Iterable[int]) -> int:
+        """Delete posts by ID and return how many"""
+        post_ids = [int(post_id) for post_id in post_ids]
+        if not post_ids:
+            return 0
+            
+        deleted = 0
+        with self._lock:
+            self._conn.execute('BEGIN')
+            for post_id in post_ids:
+                row = self._conn.execute(
+                    'DELETE FROM posts WHERE site = ? AND id = ? RETURNING rowid', (site, post_id)
+                ).fetchone()
+                if row:
+                    self._unindex_post(row[0], site, post_id)
+                    deleted += 1
+            self._conn.execute('COMMIT')
+        return deleted
+        
+    def get_manifest(self, site: str, content_type: str) -> Dict[int, str]:
+        """Map of post ID to modified timestamp for stored posts"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT id, modified_gmt FROM posts WHERE site = ? AND type = ?',
+                (site, content_type)
+            ).fetchall()
+        return dict(rows)
+        
+    def get_post(self, site: str, post_id: int) -> Optional[Dict[str, Any]]:
+        """Get one stored post"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT data FROM posts WHERE site = ? AND id = ?', (site, int(post_id))
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+        
+    def iter_posts(self, site: str, content_type: Optional[str] = None,
+                   batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """Yield stored posts for a site, optionally of one type, in ID order"""
+        last_id = -1
+        while True:
+            query = 'SELECT id, data FROM posts WHERE site = ? AND id > ?'
+            args: List[Any] = [site, last_id]
+            if content_type:
+                query += ' AND type = ?'
+                args.append(content_type)
+            query += ' ORDER BY id LIMIT ?'
+            args.append(batch_size)
+            
+            with self._lock:
+                rows = self._conn.execute(query, args).fetchall()
+            if not rows:
+                return
+                
+            for post_id, data in rows:
+                yield json.loads(data)
+            last_id = rows[-1][0]
+            
+    def count(self, site: str, content_type: Optional[str] = None) -> int:
+        """Number of stored posts for a site"""
+        query = 'SELECT COUNT(*) FROM posts WHERE site = ?'
+        args: List[Any] = [site]
+        if content_type:
+            query += ' AND type = ?'
+            args.append(content_type)
+        with self._lock:
+            return self._conn.execute(query, args).fetchone()[0]
+            
+    def query(self, sql: str, args: Iterable[Any] = ()) -> List[Tuple]:
+        """Run a read-only query, e.g. against posts_fts, post_seo or post_blocks"""
+        with self._lock:
+            return self._conn.execute(sql, tuple(args)).fetchall()
+            
+    def get_cursor(self, site: str, content_type: str) -> Optional[Tuple[str, int]]:
+        """Get the sync cursor for a site and content type"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT cursor_modified, cursor_id FROM sync_state WHERE site = ? AND content_type = ?',
+                (site, content_type)
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+        
+    def set_cursor(self, site: str, content_type: str, cursor: Tuple[str, int]):
+        """Record the newest change stored for a site and content type"""
+        with self._lock:
+            self._conn.execute('''
+                INSERT OR REPLACE INTO sync_state
+                    (site, content_type, cursor_modified, cursor_id, last_sync)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (site, content_type, cursor[0], cursor[1], time.time()))
+            
+    def reset(self, site: str):
+        """Forget everything stored for a site so the next sync starts over"""
+        with self._lock:
+            self._conn.execute('BEGIN')
+            self._conn.execute(
+                'DELETE FROM posts_fts WHERE rowid IN (SELECT rowid FROM posts WHERE site = ?)', (site,)
+            )
+            for table in ('posts', 'post_seo', 'post_blocks', 'sync_state'):
+                self._conn.execute(f'DELETE FROM {table} WHERE site = ?', (site,))
+            self._conn.execute('COMMIT')
+            
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
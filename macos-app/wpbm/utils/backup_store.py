@@ -0,0 +1,408 @@
+"""
+Content-addressed, compressed backup storage for WP Bulk Manager
+"""
+import os
+import re
+import gzip
+import json
+import hashlib
+import tempfile
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+MANIFEST_SUFFIX = '.jsonl.gz'
+CHANGESET_SUFFIX = '.changes.jsonl.gz'
+
+
+def post_hash(post: Dict[str, Any]) -> str:
+    """SHA-256 of a post's canonical JSON, so equal posts share one object"""
+    canonical = json.dumps(post, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def site_slug(site: str) -> str:
+    """Directory-safe name for a site URL or name"""
+    parsed = urlparse(site if '://' in site else f'//{site}')
+    name = (parsed.netloc + parsed.path).strip('/') or site
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', name).strip('_').lower()
+
+
+class BackupStore:
+    """
+    Store content snapshots as gzip JSONL manifests over shared post objects
+    
+    Each post is written once under objects/ by the hash of its JSON, so
+    a snapshot only adds the posts that changed since any earlier one.
+    A snapshot itself is a small manifest (one line per post: id, type,
+    modified and hash) under snapshots/<site>/, written while the posts
+    stream in and renamed into place only when complete.
+    
+    Change-sets (see ChangeSet) hold just the original values of the
+    fields a bulk operation is about to change, under changesets/<site>/.
+    """
+    
+    def __init__(self, root: str = "~/.wpbm/backups", compresslevel: int = 6):
+        """
+        Initialize backup store
+        
+        Args:
+            root: Directory holding objects/ and snapshots/
+            compresslevel: gzip level for objects and manifests
+        """
+        self.root = os.path.expanduser(str(root))
+        self.compresslevel = compresslevel
+        self.objects_dir = os.path.join(self.root, 'objects')
+        self.snapshots_dir = os.path.join(self.root, 'snapshots')
+        self.changesets_dir = os.path.join(self.root, 'changesets')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.snapshots_dir, exist_ok=True)
+        os.makedirs(self.changesets_dir, exist_ok=True)
+        
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest[2:] + '.json.gz')
+        
+    def _manifest_path(self, snapshot_id: str) -> str:
+        return os.path.join(self.snapshots_dir, snapshot_id + MANIFEST_SUFFIX)
+        
+    def _changeset_path(self, changeset_id: str) -> str:
+        return os.path.join(self.changesets_dir, changeset_id + CHANGESET_SUFFIX)
+        
+    def _new_id(self, directory: str, suffix: str, site: str, created: datetime) -> str:
+        """Unused <site>/<timestamp> ID under directory"""
+        slug = site_slug(site)
+        os.makedirs(os.path.join(directory, slug), exist_ok=True)
+        
+        new_id = f"{slug}/{created.strftime('%Y%m%d_%H%M%S')}"
+        counter = 1
+        while os.path.exists(os.path.join(directory, new_id + suffix)):
+            counter += 1
+            new_id = f"{slug}/{created.strftime('%Y%m%d_%H%M%S')}_{counter}"
+        return new_id
+        
+    def put_object(self, post: Dict[str, Any]) -> Tuple[str, int]:
+        """
+        Store a post unless an identical one is already stored
+        
+        Returns:
+            Tuple of (hash, bytes written; 0 when deduplicated)
+        """
+        digest = post_hash(post)
+        path = self._object_path(digest)
+        if os.path.exists(path):
+            return digest, 0
+            
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb',
+                                                           compresslevel=self.compresslevel, mtime=0) as f:
+                f.write(json.dumps(post, ensure_ascii=False).encode('utf-8'))
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return digest, os.path.getsize(path)
+        
+    def get_object(self, digest: str) -> Dict[str, Any]:
+        """Load a stored post by hash"""
+        with gzip.open(self._object_path(digest), 'rt', encoding='utf-8') as f:
+            return json.load(f)
+            
+    def snapshot(self, site: str, posts: Iterable[Dict[str, Any]], label: Optional[str] = None,
+                 progress_callback: Optional[Callable] = None) -> Dict[str, Any]:
+        """
+        Write a snapshot while posts stream in
+        
+        Args:
+            site: Site URL (or name) the posts come from
+            posts: Posts to back up, e.g. client.iter_content(...)
+            label: Optional note stored in the manifest header
+            progress_callback: Callback for progress updates
+            
+        Returns:
+            Snapshot information: stored_bytes is the size of everything the
+            snapshot needs (manifest and every post object it references),
+            bytes_written only what this snapshot added to the store
+        """
+        created = datetime.now()
+        timestamp = created.strftime('%Y%m%d_%H%M%S')
+        snapshot_id = self._new_id(self.snapshots_dir, MANIFEST_SUFFIX, site, created)
+        manifest_path = self._manifest_path(snapshot_id)
+        
+        post_count = 0
+        new_objects = 0
+        bytes_written = 0
+        stored_bytes = 0
+        referenced: Set[str] = set()
+        
+        tmp_path = manifest_path + '.tmp'
+        try:
+            with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=self.compresslevel) as manifest:
+                manifest.write(json.dumps({
+                    'snapshot': snapshot_id,
+                    'site': site,
+                    'created': created.isoformat(),
+                    'label': label
+                }) + '\n')
+                
+                for post in posts:
+                    digest, size = self.put_object(post)
+                    manifest.write(json.dumps({
+                        'id': post.get('id'),
+                        'type': post.get('type'),
+                        'modified': post.get('modified_gmt') or post.get('modified'),
+                        'hash': digest
+                    }) + '\n')
+                    post_count += 1
+                    if size:
+                        new_objects += 1
+                        bytes_written += size
+                    if digest not in referenced:
+                        referenced.add(digest)
+                        stored_bytes += size or os.path.getsize(self._object_path(digest))
+                        
+                    if progress_callback:
+                        progress_callback(post_count, post_count, f"Backed up {post_count} posts")
+                        
+            os.replace(tmp_path, manifest_path)
+        except BaseException:
+            # An interrupted snapshot leaves its objects for the next one to reuse
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+            
+        manifest_bytes = os.path.getsize(manifest_path)
+        bytes_written += manifest_bytes
+        stored_bytes += manifest_bytes
+        logger.info(
+            f"Snapshot {snapshot_id}: {post_count} posts, {new_objects} new, "
+            f"{bytes_written / 1024:.1f} KB written of {stored_bytes / 1024:.1f} KB"
+        )
+        
+        return {
+            'snapshot_id': snapshot_id,
+            'manifest': manifest_path,
+            'timestamp': timestamp,
+            'post_count': post_count,
+            'new_objects': new_objects,
+            'stored_bytes': stored_bytes,
+            'bytes_written': bytes_written
+        }
+        
+    def read_manifest(self, snapshot_id: str) -> Iterator[Dict[str, Any]]:
+        """Yield a snapshot's header line, then one entry per post"""
+        with gzip.open(self._manifest_path(snapshot_id), 'rt', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+                    
+    def iter_posts(self, snapshot_id: str) -> Iterator[Dict[str, Any]]:
+        """Yield the full posts of a snapshot, one at a time"""
+        entries = self.read_manifest(snapshot_id)
+        next(entries, None)  # header
+        for entry in entries:
+            yield self.get_object(entry['hash'])
+            
+    def get_post(self, snapshot_id: str, post_id: int) -> Optional[Dict[str, Any]]:
+        """A single post as it was in a snapshot"""
+        entries = self.read_manifest(snapshot_id)
+        next(entries, None)
+        for entry in entries:
+            if entry.get('id') == post_id:
+                return self.get_object(entry['hash'])
+        return None
+        
+    def list_snapshots(self, site: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Snapshots, newest first, optionally for one site"""
+        slugs = [site_slug(site)] if site else sorted(os.listdir(self.snapshots_dir))
+        snapshots = []
+        
+        for slug in slugs:
+            site_dir = os.path.join(self.snapshots_dir, slug)
+            if not os.path.isdir(site_dir):
+                continue
+            for name in os.listdir(site_dir):
+                if not name.endswith(MANIFEST_SUFFIX):
+                    continue
+                snapshot_id = f"{slug}/{name[:-len(MANIFEST_SUFFIX)]}"
+                header = next(self.read_manifest(snapshot_id), {})
+                snapshots.append({
+                    'snapshot_id': snapshot_id,
+                    'site': header.get('site'),
+                    'created': header.get('created'),
+                    'label': header.get('label'),
+                    'size_bytes': os.path.getsize(self._manifest_path(snapshot_id))
+                })
+                
+        snapshots.sort(key=lambda snapshot: snapshot['created'] or '', reverse=True)
+        return snapshots
+        
+    def changeset(self, site: str, label: Optional[str] = None) -> 'ChangeSet':
+        """
+        Open a new change-set for a bulk operation on site
+        
+        Args:
+            site: Site URL (or name) the posts come from
+            label: Optional note stored in the change-set header
+            
+        Returns:
+            ChangeSet to record original values into; close() it when done
+        """
+        created = datetime.now()
+        changeset_id = self._new_id(self.changesets_dir, CHANGESET_SUFFIX, site, created)
+        return ChangeSet(self._changeset_path(changeset_id), changeset_id, site, created,
+                         label, self.compresslevel)
+        
+    def read_changeset(self, changeset_id: str) -> Iterator[Dict[str, Any]]:
+        """
+        Yield a change-set's header line, then one entry per recorded post
+        
+        A change-set cut short by a crash is read up to its last flush.
+        """
+        with gzip.open(self._changeset_path(changeset_id), 'rt', encoding='utf-8') as f:
+            try:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+            except (EOFError, json.JSONDecodeError):
+                logger.warning(f"Change-set {changeset_id} is incomplete; read up to its last flush")
+                
+    def changeset_originals(self, changeset_id: str) -> Dict[int, Dict[str, Any]]:
+        """Original field values by post ID; the first recording of a post wins"""
+        originals: Dict[int, Dict[str, Any]] = {}
+        entries = self.read_changeset(changeset_id)
+        next(entries, None)  # header
+        for entry in entries:
+            fields = originals.setdefault(entry['id'], {})
+            for field, value in entry['fields'].items():
+                fields.setdefault(field, value)
+        return originals
+        
+    def list_changesets(self, site: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Change-sets, newest first, optionally for one site"""
+        slugs = [site_slug(site)] if site else sorted(os.listdir(self.changesets_dir))
+        changesets = []
+        
+        for slug in slugs:
+            site_dir = os.path.join(self.changesets_dir, slug)
+            if not os.path.isdir(site_dir):
+                continue
+            for name in os.listdir(site_dir):
+                if not name.endswith(CHANGESET_SUFFIX):
+                    continue
+                changeset_id = f"{slug}/{name[:-len(CHANGESET_SUFFIX)]}"
+                header = next(self.read_changeset(changeset_id), {})
+                changesets.append({
+                    'changeset_id': changeset_id,
+                    'site': header.get('site'),
+                    'created': header.get('created'),
+                    'label': header.get('label'),
+                    'size_bytes': os.path.getsize(self._changeset_path(changeset_id))
+                })
+                
+        changesets.sort(key=lambda changeset: changeset['created'] or '', reverse=True)
+        return changesets
+        
+    def delete_snapshot(self, snapshot_id: str):
+        """Delete a snapshot's manifest; run gc() to drop unreferenced objects"""
+        os.unlink(self._manifest_path(snapshot_id))
+        
+    def gc(self) -> int:
+        """
+        Delete objects no snapshot refers to and return how many
+        
+        Don't run while a snapshot is being written: its objects aren't
+        referenced until its manifest is complete.
+        """
+        referenced: Set[str] = set()
+        for snapshot in self.list_snapshots():
+            entries = self.read_manifest(snapshot['snapshot_id'])
+            next(entries, None)
+            referenced.update(entry['hash'] for entry in entries)
+            
+        removed = 0
+        for prefix in os.listdir(self.objects_dir):
+            prefix_dir = os.path.join(self.objects_dir, prefix)
+            for name in os.listdir(prefix_dir):
+                if prefix + name.split('.', 1)[0] not in referenced:
+                    os.unlink(os.path.join(prefix_dir, name))
+                    removed += 1
+                    
+        logger.info(f"Removed {removed} unreferenced backup objects")
+        return removed
+
+
+class ChangeSet:
+    """
+    Original values of the fields a bulk operation changes, keyed by post ID
+    
+    Record each post before its update is sent and flush() before sending
+    a batch: the change-set is then a write-ahead log of exactly what the
+    operation touched, and its size scales with the change rather than the
+    site. Open one with BackupStore.changeset().
+    """
+    
+    def __init__(self, path: str, changeset_id: str, site: str, created: datetime,
+                 label: Optional[str] = None, compresslevel: int = 6):
+        self.path = path
+        self.changeset_id = changeset_id
+        self.site = site
+        self.post_count = 0
+        self._file = gzip.open(path, 'wt', encoding='utf-8', compresslevel=compresslevel)
+        self._file.write(json.dumps({
+            'changeset': changeset_id,
+            'site': site,
+            'created': created.isoformat(),
+            'label': label
+        }) + '\n')
+        self._file.flush()
+        
+    def record(self, post: Dict[str, Any], fields: Iterable[str]):
+        """
+        Record a post's current values for the fields about to change
+        
+        Args:
+            post: Post as fetched, before the update
+            fields: Fields the update will change
+        """
+        self._file.write(json.dumps({
+            'id': post.get('id'),
+            'type': post.get('type'),
+            'modified': post.get('modified_gmt') or post.get('modified'),
+            'fields': {field: post.get(field) for field in fields}
+        }, ensure_ascii=False) + '\n')
+        self.post_count += 1
+        
+    def flush(self):
+        """Make everything recorded so far durable"""
+        self._file.flush()
+        os.fsync(self._file.buffer.fileobj.fileno())
+        
+    def close(self) -> Dict[str, Any]:
+        """
+        Finish the change-set
+        
+        Returns:
+            Change-set information
+        """
+        if not self._file.closed:
+            self._file.close()
+        return {
+            'changeset_id': self.changeset_id,
+            'path': self.path,
+            'post_count': self.post_count,
+            'bytes_written': os.path.getsize(self.path)
+        }
+        
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, *exc):
+        self.close()
+        return False
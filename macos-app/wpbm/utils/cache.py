@@ -5,38 +5,199 @@ import os
 import json
 import time
 import hashlib
-from typing import Any, Optional, Dict
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Optional, Dict, Tuple, Union
+from urllib.parse import quote
 import logging
 import tempfile
-import shutil
 
+from .cache_store import CacheStore, FileCacheStore, SQLiteCacheStore, EVICTION_POLICIES
 from .logger import get_logger
 
 logger = get_logger(__name__)
 
+# Writes to these endpoints change resources other than the one written;
+# each listed path is invalidated along with everything below it
+WRITE_INVALIDATIONS = {
+    'search-replace': ['/content'],
+    'seo/bulk': ['/seo', '/content'],
+    'bulk/content': ['/content'],
+    'media/bulk': ['/media'],
+}
+
+
+class MemoryCache:
+    """In-process LRU cache bounded by entry count and total bytes"""
+    
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 32 * 1024 * 1024):
+        """
+        Initialize memory tier
+        
+        Args:
+            max_entries: Maximum number of entries held
+            max_bytes: Maximum serialized size of all entries held
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        
+    def get(self, key: str, ttl: int) -> Optional[Any]:
+        """Get value if present and younger than ttl, marking it recently used"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+                
+            value, stored_at, size = entry
+            if time.time() - stored_at > ttl:
+                self._remove(key)
+                self.misses += 1
+                return None
+                
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+            
+    def set(self, key: str, value: Any, size: int, stored_at: Optional[float] = None):
+        """Store value, evicting least recently used entries to stay in budget"""
+        with self._lock:
+            self._remove(key)
+            
+            if size > self.max_bytes:
+                # Too large for this tier; it is served from disk only
+                return
+                
+            self._entries[key] = (value, stored_at or time.time(), size)
+            self._bytes += size
+            
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+                
+    def delete(self, key: str):
+        """Delete entry if present"""
+        with self._lock:
+            self._remove(key)
+            
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            
+    def delete_prefix(self, prefix: str) -> int:
+        """Delete entries whose key starts with prefix"""
+        with self._lock:
+            victims = [key for key in self._entries if key.startswith(prefix)]
+            for key in victims:
+                self._remove(key)
+            return len(victims)
+            
+    def _remove(self, key: str):
+        """Remove entry; caller must hold the lock"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+            
+    def get_stats(self) -> Dict[str, Any]:
+        """Get memory tier statistics"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'size_bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
 
 class CacheManager:
-    """Simple file-based cache with TTL support"""
+    """
+    Two-tier cache with TTL support
+    
+    Lookups are answered from an in-process LRU tier when possible and
+    fall through to a persistent store otherwise: one JSON file per key
+    ('file') or a single SQLite database ('sqlite'). Writes go to both tiers
+    (write-through), so entries evicted from memory are still served from
+    disk and promoted back on their next hit. The persistent tier can be
+    bounded by entries and bytes, in which case set() evicts incrementally
+    according to the chosen policy. Values returned from the memory tier
+    are shared objects and must not be mutated by callers.
+    
+    Keys built with resource_key() are namespaced by site and tagged with
+    the resource path ("{site}!content+12+!{hash}"), so one site's entries,
+    one resource, or a resource and everything below it can be invalidated
+    by key prefix without touching other sites.
+    
+    With stale_ttl set, entries outlive their TTL by that long so that
+    callers holding validators (ETag/Last-Modified, see get_entry()) can
+    revalidate a stale copy and touch() it instead of refetching it.
+    """
     
-    def __init__(self, cache_dir: str = None, ttl: int = 300):
+    def __init__(self, cache_dir: str = None, ttl: int = 300,
+                 memory_entries: int = 1024, memory_bytes: int = 32 * 1024 * 1024,
+                 backend: Union[str, CacheStore] = 'file',
+                 max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+                 eviction_policy: str = 'lru', stale_ttl: int = 0):
         """
         Initialize cache manager
         
         Args:
             cache_dir: Directory for cache files (default: system temp)
             ttl: Time to live in seconds (default: 5 minutes)
+            memory_entries: Entry limit for the in-process tier (0 disables it)
+            memory_bytes: Byte limit for the in-process tier
+            backend: 'file', 'sqlite' or a CacheStore instance
+            max_entries: Entry limit for the persistent tier (None for unlimited)
+            max_bytes: Byte limit for the persistent tier (None for unlimited)
+            eviction_policy: 'lru', 'lfu' or 'ttl' (evict soonest-expiring first)
+            stale_ttl: How long expired entries are kept for revalidation
         """
+        if eviction_policy not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy: {eviction_policy}")
+            
         if cache_dir is None:
             cache_dir = os.path.join(tempfile.gettempdir(), 'wpbm_cache')
             
         self.cache_dir = os.path.expanduser(cache_dir)
         self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.memory = MemoryCache(memory_entries, memory_bytes) if memory_entries > 0 else None
+        self.disk_hits = 0
+        self.disk_misses = 0
+        self.disk_evictions = 0
+        self.revalidations = 0
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.eviction_policy = eviction_policy
         self._ensure_cache_dir()
+        self.store = self._create_store(backend)
         
     def _ensure_cache_dir(self):
         """Ensure cache directory exists"""
         os.makedirs(self.cache_dir, exist_ok=True)
         
+    def _create_store(self, backend: Union[str, CacheStore]) -> CacheStore:
+        """Create the persistent storage tier"""
+        if isinstance(backend, CacheStore):
+            return backend
+        if backend == 'file':
+            return FileCacheStore(self.cache_dir, self.ttl + self.stale_ttl)
+        if backend == 'sqlite':
+            return SQLiteCacheStore(os.path.join(self.cache_dir, 'cache.db'))
+        raise ValueError(f"Unknown cache backend: {backend}")
+        
     def generate_key(self, *args, **kwargs) -> str:
         """Generate cache key from arguments"""
         key_data = {
@@ -46,121 +207,276 @@ class CacheManager:
         key_str = json.dumps(key_data, sort_keys=True)
         return hashlib.md5(key_str.encode()).hexdigest()
         
-    def _get_cache_path(self, key: str) -> str:
-        """Get full path for cache file"""
-        return os.path.join(self.cache_dir, f"{key}.json")
+    @staticmethod
+    def _namespace_prefix(namespace: str) -> str:
+        """Key prefix shared by every entry in a namespace"""
+        return hashlib.md5(namespace.rstrip('/').encode()).hexdigest()[:12] + '!'
+        
+    @staticmethod
+    def _resource_tag(path: str) -> str:
+        """Encode a resource path so that descendants share its prefix"""
+        segments = path.split('?', 1)[0].strip('/').split('/')
+        return ''.join(quote(segment, safe='') + '+' for segment in segments if segment)
+        
+    def resource_key(self, namespace: str, path: str, params: Optional[Dict] = None) -> str:
+        """
+        Generate a cache key scoped to a site and a resource path
+        
+        Args:
+            namespace: Site URL the resource belongs to
+            path: API path, e.g. '/content/12'
+            params: Query parameters, hashed into the key
+        """
+        return (self._namespace_prefix(namespace) + self._resource_tag(path) + '!' +
+                self.generate_key(path, params))
+        
+    def invalidate(self, namespace: str, path: str, descendants: bool = False) -> int:
+        """
+        Invalidate cached responses for a resource
+        
+        Args:
+            namespace: Site URL the resource belongs to
+            path: API path; all query variants of it are dropped
+            descendants: Also drop every path below it
+            
+        Returns:
+            Number of persistent entries removed
+        """
+        prefix = self._namespace_prefix(namespace) + self._resource_tag(path)
+        if not descendants:
+            prefix += '!'
+        return self._delete_prefix(prefix)
+        
+    def invalidate_after_write(self, namespace: str, method: str, path: str) -> int:
+        """
+        Invalidate what a write to path may have changed
+        
+        The written resource is dropped together with every collection
+        above it, so PUT /content/12 evicts /content/12 (and anything
+        below it such as its revisions) plus every /content list page.
+        Endpoints in WRITE_INVALIDATIONS also drop the resources they
+        affect indirectly.
+        """
+        segments = [segment for segment in path.split('?', 1)[0].strip('/').split('/') if segment]
+        removed = 0
+        
+        # The resource itself; creating an item only changes its collection
+        removed += self.invalidate(namespace, path, descendants=method.upper() != 'POST')
+        
+        for depth in range(len(segments) - 1, 0, -1):
+            removed += self.invalidate(namespace, '/'.join(segments[:depth]))
+            
+        for related in WRITE_INVALIDATIONS.get('/'.join(segments), []):
+            removed += self.invalidate(namespace, related, descendants=True)
+            
+        if removed:
+            logger.debug(f"Invalidated {removed} cache entries after {method} {path}")
+        return removed
+        
+    def _delete_prefix(self, prefix: str) -> int:
+        """Delete entries by key prefix from both tiers"""
+        if self.memory:
+            self.memory.delete_prefix(prefix)
+            
+        try:
+            return self.store.delete_prefix(prefix)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Error invalidating cache prefix {prefix}: {e}")
+            return 0
         
     def get(self, key: str) -> Optional[Any]:
         """Get value from cache if not expired"""
-        cache_path = self._get_cache_path(key)
+        entry = self.get_entry(key)
+        if entry is None or not entry[2]:
+            return None
+        return entry[0]
+        
+    def get_entry(self, key: str, use_memory: bool = True) -> Optional[Tuple[Any, Dict[str, Any], bool]]:
+        """
+        Get a cached value together with its metadata and freshness
+        
+        The memory tier holds no metadata, so callers that need it even for
+        fresh entries pass use_memory=False to read the persistent tier.
+        
+        Returns:
+            (value, meta, fresh), or None if there is nothing usable. Stale
+            entries are only returned when they carry metadata (validators)
+            to revalidate them with.
+        """
+        if self.memory and use_memory:
+            value = self.memory.get(key, self.ttl)
+            if value is not None:
+                logger.debug(f"Memory cache hit for key: {key}")
+                return value, {}, True
+                
+        try:
+            entry = self.store.get(key)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Error reading cache for key {key}: {e}")
+            entry = None
+            
+        if entry is None:
+            self.disk_misses += 1
+            return None
+            
+        payload, expires_at, meta = entry
+        fresh_until = expires_at - self.stale_ttl
+        now = time.time()
         
-        if not os.path.exists(cache_path):
+        # Check if expired
+        if now > expires_at:
+            logger.debug(f"Cache expired for key: {key}")
+            self.delete(key)
+            self.disk_misses += 1
             return None
             
-        try:
-            # Check if expired
-            mtime = os.path.getmtime(cache_path)
-            if time.time() - mtime > self.ttl:
-                logger.debug(f"Cache expired for key: {key}")
-                os.remove(cache_path)
+        fresh = now <= fresh_until
+        if not fresh:
+            self.disk_misses += 1
+            if not meta:
                 return None
                 
-            # Load cached data
-            with open(cache_path, 'r') as f:
-                data = json.load(f)
-                logger.debug(f"Cache hit for key: {key}")
-                return data
-                
-        except (json.JSONDecodeError, OSError) as e:
+        try:
+            data = json.loads(payload)
+            meta = json.loads(meta) if meta else {}
+        except json.JSONDecodeError as e:
             logger.warning(f"Error reading cache for key {key}: {e}")
-            # Remove corrupted cache file
-            try:
-                os.remove(cache_path)
-            except OSError:
-                pass
+            # Remove corrupted entry
+            self.delete(key)
+            if fresh:
+                self.disk_misses += 1
             return None
             
-    def set(self, key: str, value: Any):
-        """Set value in cache"""
-        cache_path = self._get_cache_path(key)
+        if not fresh:
+            logger.debug(f"Stale cache entry for key: {key}")
+            return data, meta, False
+            
+        logger.debug(f"Cache hit for key: {key}")
+        self.disk_hits += 1
         
+        # Promote to the memory tier, keeping the original age
+        if self.memory:
+            self.memory.set(key, data, len(payload), stored_at=fresh_until - self.ttl)
+        return data, meta, True
+        
+    def set(self, key: str, value: Any, meta: Optional[Dict[str, Any]] = None):
+        """
+        Set value in both tiers
+        
+        Args:
+            key: Cache key
+            value: JSON-serializable value
+            meta: Small JSON-serializable metadata kept with the persistent
+                entry, e.g. HTTP validators for revalidation
+        """
         try:
-            # Write to temp file first for atomicity
-            temp_fd, temp_path = tempfile.mkstemp(dir=self.cache_dir)
-            with os.fdopen(temp_fd, 'w') as f:
-                json.dump(value, f)
-                
-            # Move temp file to final location
-            shutil.move(temp_path, cache_path)
+            payload = json.dumps(value)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Error caching value for key {key}: {e}")
+            return
+            
+        if self.memory:
+            self.memory.set(key, value, len(payload))
+            
+        try:
+            self.store.set(key, payload, time.time() + self.ttl + self.stale_ttl,
+                           json.dumps(meta) if meta else None)
             logger.debug(f"Cached value for key: {key}")
             
-        except (OSError, json.JSONDecodeError) as e:
+            if self.max_entries or self.max_bytes:
+                evicted = self.store.evict(self.max_entries, self.max_bytes,
+                                           self.eviction_policy)
+                if evicted:
+                    self.disk_evictions += evicted
+                    logger.debug(f"Evicted {evicted} cache entries ({self.eviction_policy})")
+        except (OSError, sqlite3.Error) as e:
             logger.warning(f"Error caching value for key {key}: {e}")
             
+    def touch(self, key: str, value: Any = None, meta: Optional[Dict[str, Any]] = None):
+        """
+        Mark an entry as fresh again for another TTL, e.g. after a 304
+        
+        Args:
+            key: Cache key
+            value: The entry's value, to put back in the memory tier
+            meta: Replacement metadata for the entry
+        """
+        try:
+            self.store.touch(key, time.time() + self.ttl + self.stale_ttl,
+                             json.dumps(meta) if meta else None)
+            self.revalidations += 1
+            logger.debug(f"Revalidated cache for key: {key}")
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Error refreshing cache for key {key}: {e}")
+            return
+            
+        if self.memory and value is not None:
+            self.memory.set(key, value, len(json.dumps(value)))
+            
     def delete(self, key: str):
         """Delete specific cache entry"""
-        cache_path = self._get_cache_path(key)
-        
+        if self.memory:
+            self.memory.delete(key)
+            
         try:
-            os.remove(cache_path)
+            self.store.delete(key)
             logger.debug(f"Deleted cache for key: {key}")
-        except OSError:
+        except (OSError, sqlite3.Error):
             pass
             
-    def clear(self):
-        """Clear all cache entries"""
+    def clear(self, namespace: Optional[str] = None):
+        """Clear all cache entries, or only those for one site"""
+        if namespace:
+            removed = self._delete_prefix(self._namespace_prefix(namespace))
+            logger.info(f"Cleared {removed} cache entries for {namespace}")
+            return
+            
+        if self.memory:
+            self.memory.clear()
+            
         try:
-            for filename in os.listdir(self.cache_dir):
-                if filename.endswith('.json'):
-                    os.remove(os.path.join(self.cache_dir, filename))
+            self.store.clear()
             logger.info("Cleared all cache")
-        except OSError as e:
+        except (OSError, sqlite3.Error) as e:
             logger.warning(f"Error clearing cache: {e}")
             
     def cleanup_expired(self):
         """Remove expired cache entries"""
-        current_time = time.time()
-        cleaned = 0
-        
         try:
-            for filename in os.listdir(self.cache_dir):
-                if not filename.endswith('.json'):
-                    continue
-                    
-                filepath = os.path.join(self.cache_dir, filename)
-                mtime = os.path.getmtime(filepath)
-                
-                if current_time - mtime > self.ttl:
-                    os.remove(filepath)
-                    cleaned += 1
-                    
+            cleaned = self.store.delete_expired(time.time())
             if cleaned > 0:
                 logger.info(f"Cleaned up {cleaned} expired cache entries")
                 
-        except OSError as e:
+        except (OSError, sqlite3.Error) as e:
             logger.warning(f"Error cleaning up cache: {e}")
             
     def get_stats(self) -> Dict[str, Any]:
-        """Get cache statistics"""
+        """Get cache statistics, including hit/miss counts for each tier"""
+        tiers = {
+            'memory': self.memory.get_stats() if self.memory else None,
+            'disk': {
+                'hits': self.disk_hits,
+                'misses': self.disk_misses,
+                'evictions': self.disk_evictions,
+                'revalidations': self.revalidations,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'eviction_policy': self.eviction_policy
+            }
+        }
+        
         try:
-            files = [f for f in os.listdir(self.cache_dir) if f.endswith('.json')]
-            total_size = sum(
-                os.path.getsize(os.path.join(self.cache_dir, f)) 
-                for f in files
-            )
+            store_stats = self.store.stats()
+        except (OSError, sqlite3.Error):
+            store_stats = {'entries': 0, 'size_bytes': 0}
             
-            return {
-                'entries': len(files),
-                'size_bytes': total_size,
-                'size_mb': round(total_size / 1024 / 1024, 2),
-                'cache_dir': self.cache_dir,
-                'ttl_seconds': self.ttl
-            }
-        except OSError:
-            return {
-                'entries': 0,
-                'size_bytes': 0,
-                'size_mb': 0,
-                'cache_dir': self.cache_dir,
-                'ttl_seconds': self.ttl
-            }
\ No newline at end of file
+        return {
+            'entries': store_stats['entries'],
+            'size_bytes': store_stats['size_bytes'],
+            'size_mb': round(store_stats['size_bytes'] / 1024 / 1024, 2),
+            'cache_dir': self.cache_dir,
+            'backend': self.store.name,
+            'ttl_seconds': self.ttl,
+            'stale_ttl_seconds': self.stale_ttl,
+            'tiers': tiers
+        }
@@ -0,0 +1,513 @@
+"""
+Disk storage backends for the WP Bulk Manager cache
+"""
+import os
+import time
+import heapq
+import sqlite3
+import tempfile
+import shutil
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+EVICTION_POLICIES = ('lru', 'lfu', 'ttl')
+
+# When a budget is exceeded, evict down to this fraction of it so that
+# eviction work is amortised over many writes instead of every set()
+EVICTION_LOW_WATERMARK = 0.9
+
+
+def _eviction_target(current: int, limit: Optional[int]) -> int:
+    """How many units must go to bring current under the low watermark"""
+    if not limit or current <= limit:
+        return 0
+    return current - max(int(limit * EVICTION_LOW_WATERMARK), 1)
+
+
+class CacheStore:
+    """Interface for persistent cache storage used behind CacheManager"""
+    
+    name = 'base'
+    
+    def get(self, key: str) -> Optional[Tuple[str, float, Optional[str]]]:
+        """Return (payload, expires_at, meta) for key, or None if absent"""
+        raise NotImplementedError
+        
+    def set(self, key: str, payload: str, expires_at: float, meta: Optional[str] = None):
+        """Store serialized payload for key, with optional serialized metadata"""
+        raise NotImplementedError
+        
+    def touch(self, key: str, expires_at: float, meta: Optional[str] = None):
+        """Move the expiry of an existing entry, replacing its metadata if given"""
+        raise NotImplementedError
+        
+    def delete(self, key: str):
+        """Delete entry for key if present"""
+        raise NotImplementedError
+        
+    def clear(self):
+        """Delete all entries"""
+        raise NotImplementedError
+        
+    def delete_prefix(self, prefix: str) -> int:
+        """Delete entries whose key starts with prefix and return how many"""
+        raise NotImplementedError
+        
+    def delete_expired(self, now: float) -> int:
+        """Delete entries that expired before now and return how many"""
+        raise NotImplementedError
+        
+    def evict(self, max_entries: Optional[int], max_bytes: Optional[int],
+              policy: str = 'lru') -> int:
+        """
+        Evict entries until the store is within budget
+        
+        Args:
+            max_entries: Entry limit (None for unlimited)
+            max_bytes: Byte limit (None for unlimited)
+            policy: 'lru' (least recently used), 'lfu' (least frequently
+                used) or 'ttl' (soonest to expire)
+                
+        Returns:
+            Number of entries evicted
+        """
+        raise NotImplementedError
+        
+    def stats(self) -> Dict[str, Any]:
+        """Return at least 'entries' and 'size_bytes'"""
+        raise NotImplementedError
+        
+    def close(self):
+        """Release any resources held by the store"""
+
+
+class FileCacheStore(CacheStore):
+    """
+    One JSON file per key in a flat directory, expiring by file mtime
+    
+    Metadata, when present, follows the payload after a newline; serialized
+    JSON never contains a raw newline, so files without metadata are
+    unchanged.
+    
+    The directory is scanned once on start-up to build an in-memory index
+    of sizes and access statistics; after that, eviction, statistics and
+    prefix invalidation work from the index instead of listing the
+    directory. The directory mtime is remembered after each of this
+    store's own changes, so a directory another process has written to
+    is rescanned before the index is trusted for invalidation.
+    """
+    
+    name = 'file'
+    
+    def __init__(self, cache_dir: str, ttl: int):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        # key -> [size, mtime, last_access, hits]
+        self._index: Dict[str, List[float]] = {}
+        self._bytes = 0
+        self._dir_mtime = None
+        self._load_index()
+        
+    def _load_index(self):
+        """Index existing cache files, keeping access statistics of known keys"""
+        dir_mtime = self._dir_stamp()
+        index = {}
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.json') and entry.is_file():
+                stat = entry.stat()
+                key = entry.name[:-5]
+                known = self._index.get(key)
+                index[key] = [stat.st_size, stat.st_mtime,
+                              known[2] if known else stat.st_mtime, known[3] if known else 0]
+                
+        with self._lock:
+            self._index = index
+            self._bytes = sum(entry[0] for entry in index.values())
+            self._dir_mtime = dir_mtime
+            
+    def _dir_stamp(self) -> Optional[int]:
+        try:
+            return os.stat(self.cache_dir).st_mtime_ns
+        except OSError:
+            return None
+            
+    @contextmanager
+    def _own_change(self):
+        """Wrap a change to the directory so it doesn't look like another process's"""
+        before = self._dir_stamp()
+        yield
+        after = self._dir_stamp()
+        with self._lock:
+            # If the directory had already moved on, leave it marked as changed
+            if before == self._dir_mtime:
+                self._dir_mtime = after
+                
+    def _forget(self, key: str):
+        """Drop key from the index; caller must hold the lock"""
+        entry = self._index.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[0]
+            
+    def _get_cache_path(self, key: str) -> str:
+        """Get full path for cache file"""
+        return os.path.join(self.cache_dir, f"{key}.json")
+        
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        cache_path = self._get_cache_path(key)
+        
+        try:
+            mtime = os.path.getmtime(cache_path)
+            with open(cache_path, 'r') as f:
+                content = f.read()
+        except FileNotFoundError:
+            with self._lock:
+                self._forget(key)
+            return None
+            
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                # Written by another process since the index was built
+                self._index[key] = [len(content), mtime, time.time(), 1]
+                self._bytes += len(content)
+            else:
+                entry[2] = time.time()
+                entry[3] += 1
+                
+        payload, _, meta = content.partition('\n')
+        return payload, mtime + self.ttl, meta or None
+        
+    def set(self, key: str, payload: str, expires_at: float, meta: Optional[str] = None):
+        if meta:
+            payload = f"{payload}\n{meta}"
+            
+        with self._own_change():
+            # Write to temp file first for atomicity
+            temp_fd, temp_path = tempfile.mkstemp(dir=self.cache_dir)
+            with os.fdopen(temp_fd, 'w') as f:
+                f.write(payload)
+                
+            # Move temp file to final location
+            shutil.move(temp_path, self._get_cache_path(key))
+        
+        now = time.time()
+        with self._lock:
+            self._forget(key)
+            self._index[key] = [len(payload), now, now, 0]
+            self._bytes += len(payload)
+            
+    def touch(self, key: str, expires_at: float, meta: Optional[str] = None):
+        cache_path = self._get_cache_path(key)
+        if meta:
+            with open(cache_path, 'r') as f:
+                payload = f.read().partition('\n')[0]
+            self.set(key, payload, expires_at, meta)
+            
+        # Expiry is mtime + ttl, so move mtime to where that lands on expires_at
+        mtime = expires_at - self.ttl
+        os.utime(cache_path, (time.time(), mtime))
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is not None:
+                entry[1] = mtime
+                
+    def delete(self, key: str):
+        with self._lock:
+            self._forget(key)
+        with self._own_change():
+            try:
+                os.remove(self._get_cache_path(key))
+            except OSError:
+                pass
+                
+    def clear(self):
+        with self._own_change():
+            for filename in os.listdir(self.cache_dir):
+                if filename.endswith('.json'):
+                    os.remove(os.path.join(self.cache_dir, filename))
+        with self._lock:
+            self._index.clear()
+            self._bytes = 0
+            
+    def delete_prefix(self, prefix: str) -> int:
+        if self._dir_stamp() != self._dir_mtime:
+            # Other clients sharing the directory have written entries this index hasn't seen
+            self._load_index()
+            
+        with self._lock:
+            keys = [key for key in self._index if key.startswith(prefix)]
+            for key in keys:
+                self._forget(key)
+                
+        removed = 0
+        with self._own_change():
+            for key in keys:
+                try:
+                    os.remove(self._get_cache_path(key))
+                    removed += 1
+                except OSError:
+                    pass
+                    
+        return removed
+        
+    def delete_expired(self, now: float) -> int:
+        cleaned = 0
+        
+        for filename in os.listdir(self.cache_dir):
+            if not filename.endswith('.json'):
+                continue
+                
+            filepath = os.path.join(self.cache_dir, filename)
+            if now - os.path.getmtime(filepath) > self.ttl:
+                self.delete(filename[:-5])
+                cleaned += 1
+                
+        return cleaned
+        
+    def evict(self, max_entries: Optional[int], max_bytes: Optional[int],
+              policy: str = 'lru') -> int:
+        with self._lock:
+            excess_entries = _eviction_target(len(self._index), max_entries)
+            excess_bytes = _eviction_target(self._bytes, max_bytes)
+            if not excess_entries and not excess_bytes:
+                return 0
+                
+            if policy == 'lfu':
+                rank = lambda item: (item[1][3], item[1][2])
+            elif policy == 'ttl':
+                rank = lambda item: item[1][1]
+            else:
+                rank = lambda item: item[1][2]
+                
+            # Rank a batch of candidates, widening it until enough bytes are covered
+            batch = max(excess_entries, 64)
+            while True:
+                candidates = heapq.nsmallest(batch, self._index.items(), key=rank)
+                freed = sum(entry[0] for _, entry in candidates)
+                if freed >= excess_bytes or len(candidates) == len(self._index):
+                    break
+                batch *= 2
+                
+            victims = []
+            freed = 0
+            for key, entry in candidates:
+                if len(victims) >= excess_entries and freed >= excess_bytes:
+                    break
+                victims.append(key)
+                freed += entry[0]
+                
+            for key in victims:
+                self._forget(key)
+                
+        with self._own_change():
+            for key in victims:
+                try:
+                    os.remove(self._get_cache_path(key))
+                except OSError:
+                    pass
+                    
+        return len(victims)
+        
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'entries': len(self._index), 'size_bytes': self._bytes}
+
+
+class SQLiteCacheStore(CacheStore):
+    """
+    Single-file SQLite store in WAL mode
+    
+    Entries are indexed by key, expiry and access statistics so expired
+    rows can be removed in one statement and eviction candidates come
+    straight off an index. Entry/byte counters are maintained by triggers
+    so statistics never scan the table.
+    """
+    
+    name = 'sqlite'
+    
+    SCHEMA = [
+        '''
+        CREATE TABLE IF NOT EXISTS cache_entries (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            expires_at REAL NOT NULL,
+            created_at REAL NOT NULL
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_cache_entries_expires ON cache_entries(expires_at)',
+        '''
+        CREATE TABLE IF NOT EXISTS cache_counters (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            entries INTEGER NOT NULL DEFAULT 0,
+            size_bytes INTEGER NOT NULL DEFAULT 0
+        )
+        ''',
+        'INSERT OR IGNORE INTO cache_counters (id, entries, size_bytes) VALUES (1, 0, 0)',
+        '''
+        CREATE TRIGGER IF NOT EXISTS cache_entries_insert AFTER INSERT ON cache_entries
+        BEGIN
+            UPDATE cache_counters SET entries = entries + 1, size_bytes = size_bytes + NEW.size
+            WHERE id = 1;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS cache_entries_delete AFTER DELETE ON cache_entries
+        BEGIN
+            UPDATE cache_counters SET entries = entries - 1, size_bytes = size_bytes - OLD.size
+            WHERE id = 1;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS cache_entries_update AFTER UPDATE OF size ON cache_entries
+        BEGIN
+            UPDATE cache_counters SET size_bytes = size_bytes - OLD.size + NEW.size
+            WHERE id = 1;
+        END
+        '''
+    ]
+    
+    # Columns added after the first schema version
+    MIGRATIONS = {
+        'last_access': 'ALTER TABLE cache_entries ADD COLUMN last_access REAL NOT NULL DEFAULT 0',
+        'hits': 'ALTER TABLE cache_entries ADD COLUMN hits INTEGER NOT NULL DEFAULT 0',
+        'meta': 'ALTER TABLE cache_entries ADD COLUMN meta TEXT'
+    }
+    
+    INDEXES = [
+        'CREATE INDEX IF NOT EXISTS idx_cache_entries_access ON cache_entries(last_access)',
+        'CREATE INDEX IF NOT EXISTS idx_cache_entries_hits ON cache_entries(hits, last_access)'
+    ]
+    
+    ORDER_BY = {
+        'lru': 'last_access',
+        'lfu': 'hits, last_access',
+        'ttl': 'expires_at'
+    }
+    
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        with self._lock:
+            for statement in self.SCHEMA:
+                self._conn.execute(statement)
+            columns = {row[1] for row in self._conn.execute('PRAGMA table_info(cache_entries)')}
+            for column, statement in self.MIGRATIONS.items():
+                if column not in columns:
+                    self._conn.execute(statement)
+            for statement in self.INDEXES:
+                self._conn.execute(statement)
+                
+    def get(self, key: str) -> Optional[Tuple[str, float, Optional[str]]]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, expires_at, meta FROM cache_entries WHERE key = ?', (key,)
+            ).fetchone()
+            if row:
+                self._conn.execute(
+                    'UPDATE cache_entries SET last_access = ?, hits = hits + 1 WHERE key = ?',
+                    (time.time(), key)
+                )
+        return (row[0], row[1], row[2]) if row else None
+        
+    def set(self, key: str, payload: str, expires_at: float, meta: Optional[str] = None):
+        now = time.time()
+        with self._lock:
+            self._conn.execute('''
+                INSERT INTO cache_entries (key, value, size, expires_at, created_at, last_access, hits, meta)
+                VALUES (?, ?, ?, ?, ?, ?, 0, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    value = excluded.value,
+                    size = excluded.size,
+                    expires_at = excluded.expires_at,
+                    created_at = excluded.created_at,
+                    last_access = excluded.last_access,
+                    meta = excluded.meta
+            ''', (key, payload, len(payload), expires_at, now, now, meta))
+            
+    def touch(self, key: str, expires_at: float, meta: Optional[str] = None):
+        with self._lock:
+            self._conn.execute(
+                'UPDATE cache_entries SET expires_at = ?, meta = COALESCE(?, meta) WHERE key = ?',
+                (expires_at, meta, key)
+            )
+            
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute('DELETE FROM cache_entries WHERE key = ?', (key,))
+            
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM cache_entries')
+            
+    def delete_prefix(self, prefix: str) -> int:
+        # Key range scan on the primary key: prefix <= key < prefix with last char + 1
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        with self._lock:
+            return self._conn.execute(
+                'DELETE FROM cache_entries WHERE key >= ? AND key < ?', (prefix, upper)
+            ).rowcount
+            
+    def delete_expired(self, now: float) -> int:
+        with self._lock:
+            return self._conn.execute(
+                'DELETE FROM cache_entries WHERE expires_at < ?', (now,)
+            ).rowcount
+            
+    def evict(self, max_entries: Optional[int], max_bytes: Optional[int],
+              policy: str = 'lru') -> int:
+        order_by = self.ORDER_BY.get(policy, self.ORDER_BY['lru'])
+        evicted = 0
+        
+        with self._lock:
+            while True:
+                entries, size_bytes = self._conn.execute(
+                    'SELECT entries, size_bytes FROM cache_counters WHERE id = 1'
+                ).fetchone()
+                excess_entries = _eviction_target(entries, max_entries)
+                excess_bytes = _eviction_target(size_bytes, max_bytes)
+                if not excess_entries and not excess_bytes:
+                    return evicted
+                    
+                # Walk the policy index from the bottom until the excess is covered
+                victims = []
+                freed = 0
+                rows = self._conn.execute(
+                    f'SELECT key, size FROM cache_entries ORDER BY {order_by} LIMIT ?',
+                    (max(excess_entries, 64),)
+                )
+                for key, size in rows:
+                    if len(victims) >= excess_entries and freed >= excess_bytes:
+                        break
+                    victims.append((key,))
+                    freed += size
+                    
+                if not victims:
+                    return evicted
+                    
+                self._conn.execute('BEGIN')
+                self._conn.executemany('DELETE FROM cache_entries WHERE key = ?', victims)
+                self._conn.execute('COMMIT')
+                evicted += len(victims)
+                
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, size_bytes = self._conn.execute(
+                'SELECT entries, size_bytes FROM cache_counters WHERE id = 1'
+            ).fetchone()
+        return {'entries': entries, 'size_bytes': size_bytes, 'db_path': self.db_path}
+        
+    def close(self):
+        with self._lock:
+            self._conn.close()
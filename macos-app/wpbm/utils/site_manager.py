@@ -3,12 +3,14 @@ Site Manager - Handles folder structure and site setup
 """
 
 import os
+import gzip
 import json
 from pathlib import Path
 from typing import Dict, Optional
 from datetime import datetime
 
 from ..database.mysql_manager import MySQLManager
+from ..utils.backup_store import BackupStore
 from ..utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -305,7 +307,7 @@ Place your content templates in the `/templates` folder with descriptive names:
     
     def create_backup(self, site_name: str, backup_data: Dict, 
                      backup_type: str = 'content') -> Optional[str]:
-        """Create a backup in the site's backup folder"""
+        """Create a gzip-compressed JSON backup in the site's backup folder"""
         site_folder = self.get_site_folder(site_name)
         if not site_folder:
             return None
@@ -314,13 +316,22 @@ Place your content templates in the `/templates` folder with descriptive names:
         backup_dir.mkdir(exist_ok=True)
         
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        backup_file = backup_dir / f"{backup_type}_{timestamp}.json"
+        backup_file = backup_dir / f"{backup_type}_{timestamp}.json.gz"
         
-        with open(backup_file, 'w') as f:
+        # Stream compact JSON through gzip rather than building an indented string
+        with gzip.open(backup_file, 'wt', encoding='utf-8') as f:
             json.dump({
                 'timestamp': datetime.now().isoformat(),
                 'type': backup_type,
                 'data': backup_data
-            }, f, indent=2)
+            }, f, separators=(',', ':'))
         
-        return str(backup_file)
\ No newline at end of file
+        return str(backup_file)
+    
+    def get_backup_store(self, site_name: str) -> Optional[BackupStore]:
+        """Content snapshot store in the site's backup folder"""
+        site_folder = self.get_site_folder(site_name)
+        if not site_folder:
+            return None
+        
+        return BackupStore(site_folder / 'backups')
\ No newline at end of file
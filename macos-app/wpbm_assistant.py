@@ -5,6 +5,7 @@ Designed for Claude to help manage WordPress sites
 """
 
 from wpbm_cli_enhanced import EnhancedWPBulkManager
+from wpbm.operations.batch_writer import BatchWriter
 import requests
 import json
 from datetime import datetime
@@ -228,17 +229,21 @@ class WPBulkAssistant:
         )
     
     def bulk_seo_update(self, updates: List[Dict]) -> List[Dict]:
-        """Perform bulk SEO updates"""
-        results = []
+        """Perform bulk SEO updates, batched through /seo/bulk"""
+        client = self.manager.get_api_client(self.current_site_id) if self.current_site_id else None
+        if not client:
+            return [{"page_id": update['page_id'], "success": False} for update in updates]
         
-        for update in updates:
-            success = self.update_page_seo(update['page_id'], update['seo_data'])
-            results.append({
-                "page_id": update['page_id'],
-                "success": success
-            })
+        outcomes = {}
+        with BatchWriter(client, 'seo') as writer:
+            for update in updates:
+                writer.submit(update['page_id'], update['seo_data'],
+                              lambda page_id, result, error: outcomes.__setitem__(page_id, error is None))
         
-        return results
+        return [{
+            "page_id": update['page_id'],
+            "success": outcomes.get(update['page_id'], False)
+        } for update in updates]
     
     def select_site(self, site_name: str = None) -> bool:
         """Select a site to work with"""
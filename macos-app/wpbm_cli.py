@@ -192,8 +192,10 @@ def bulk_create_with_variables(manager):
     results = manager.bulk_create_with_variables(
         selected_site_ids,
         template,
-        {'location': locations, 'service': services}
+        {'location': locations, 'service': services},
+        progress_callback=lambda done, total, message: print(f"\r[{done}/{total}] {message}", end='', flush=True)
     )
+    print()
     
     success_count = sum(1 for r in results if r['success'])
     print(f"\n✅ Created {success_count}/{len(results)} pages successfully!")
@@ -7,12 +7,61 @@ from wpbm_manager import WPBulkManager, ContentProcessor
 import json
 import requests
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional
 import textwrap
 
+from wpbm.api.client import WPBMClient
+from wpbm.sync import ContentMirror
+
 class EnhancedWPBulkManager(WPBulkManager):
     """Enhanced manager with additional API methods"""
     
+    _mirror = None
+    
+    @property
+    def mirror(self) -> ContentMirror:
+        """Local content mirror shared by all sites (~/.wpbm/content.db)"""
+        if self._mirror is None:
+            self._mirror = ContentMirror()
+        return self._mirror
+    
+    def get_api_client(self, site_id: int) -> Optional[WPBMClient]:
+        """Uncached wpbm API client for a site, or None if it can't be reached"""
+        site = self.get_site(site_id)
+        if not site:
+            return None
+        
+        api_key = self.get_site_api_key(site_id)
+        if not api_key:
+            return None
+        
+        return WPBMClient(site['url'], api_key, cache_enabled=False)
+    
+    def sync_mirror(self, site_id: int) -> Dict:
+        """Pull a site's content changes into the local mirror"""
+        client = self.get_api_client(site_id)
+        if not client:
+            return {'error': 'Site or API key not found'}
+        
+        return self.mirror.sync(client)
+    
+    def has_mirror(self, site_id: int) -> bool:
+        """Whether the site has been synced into the local mirror"""
+        site = self.get_site(site_id)
+        return bool(site) and self.mirror.store.count(site['url'].rstrip('/')) > 0
+    
+    def search_mirror(self, search: str, site_id: int = None, content_type: str = None,
+                      limit: int = 100) -> List[Dict]:
+        """Search the local mirror; all mirrored sites when site_id is None"""
+        site_url = None
+        if site_id:
+            site = self.get_site(site_id)
+            if not site:
+                return []
+            site_url = site['url']
+        
+        return self.mirror.search(search, site=site_url, type=content_type, limit=limit)
+    
     def list_all_content(self, site_id: int, content_type: str = 'any', limit: int = 100, search: str = None) -> List[Dict]:
         """List all content from a site"""
         site = self.get_site(site_id)
@@ -561,8 +610,12 @@ def search_content(manager):
     if not search_term:
         return
     
-    print(f"\nSearching for '{search_term}'...")
-    content = manager.list_all_content(site['id'], 'any', 100, search_term)
+    if manager.has_mirror(site['id']):
+        print(f"\nSearching local mirror for '{search_term}'...")
+        content = manager.search_mirror(search_term, site['id'])
+    else:
+        print(f"\nSearching for '{search_term}'...")
+        content = manager.list_all_content(site['id'], 'any', 100, search_term)
     
     if not content:
         print("No results found.")
@@ -5,12 +5,17 @@ Manage multiple WordPress sites with bulk content and SEO updates
 """
 
 import os
+import re
 import json
+import random
 import sqlite3
+import threading
 import requests
 import keyring
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 import hashlib
 import hmac
 from urllib.parse import urlparse
@@ -27,6 +32,7 @@ class WPBulkManager:
         
         self.db_path = db_path
         self.init_database()
+        self._fleet = None
     
     def init_database(self):
         """Initialize SQLite database"""
@@ -207,63 +213,24 @@ class WPBulkManager:
             return keyring.get_password("WPBulkManager", result[0])
         return None
     
+    @property
+    def fleet(self) -> 'FleetExecutor':
+        """Shared executor for fanning work out across sites"""
+        if self._fleet is None:
+            self._fleet = FleetExecutor(self)
+        return self._fleet
+    
     def create_content(self, site_ids: List[int], content_data: Dict) -> List[Dict]:
         """Create content on multiple sites"""
-        results = []
-        
-        for site_id in site_ids:
-            site = self.get_site(site_id)
-            if not site:
-                results.append({
-                    'site_id': site_id,
-                    'success': False,
-                    'error': 'Site not found'
-                })
-                continue
-            
-            api_key = self.get_site_api_key(site_id)
-            if not api_key:
-                results.append({
-                    'site_id': site_id,
-                    'success': False,
-                    'error': 'API key not found'
-                })
-                continue
-            
-            try:
-                response = requests.post(
-                    f"{site['url']}/wp-json/wpbm/v1/content",
-                    headers={'X-API-Key': api_key},
-                    json=content_data,
-                    timeout=30
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    results.append({
-                        'site_id': site_id,
-                        'site_name': site['name'],
-                        'success': True,
-                        'post_id': data.get('post_id'),
-                        'permalink': data.get('permalink')
-                    })
-                else:
-                    results.append({
-                        'site_id': site_id,
-                        'site_name': site['name'],
-                        'success': False,
-                        'error': f'HTTP {response.status_code}'
-                    })
-            except Exception as e:
-                results.append({
-                    'site_id': site_id,
-                    'site_name': site['name'],
-                    'success': False,
-                    'error': str(e)
-                })
-        
+        order = {site_id: index for index, site_id in enumerate(site_ids)}
+        results = list(self.iter_create_content(site_ids, content_data))
+        results.sort(key=lambda result: order.get(result['site_id'], len(order)))
         return results
     
+    def iter_create_content(self, site_ids: List[int], content_data: Dict) -> Iterator[Dict]:
+        """Create content on multiple sites concurrently, yielding each result as its site finishes"""
+        return self.fleet.run([(site_id, content_data) for site_id in site_ids], _post_content)
+    
     def update_seo(self, site_id: int, post_id: int, seo_data: Dict) -> bool:
         """Update SEO data for a post"""
         site = self.get_site(site_id)
@@ -286,47 +253,74 @@ class WPBulkManager:
             return False
     
     def bulk_create_with_variables(self, site_ids: List[int], template: str, 
-                                 variable_values: Dict[str, List[str]]) -> List[Dict]:
+                                 variable_values: Dict[str, List[str]],
+                                 progress_callback: Optional[Callable] = None) -> List[Dict]:
         """Create content with variable replacement across multiple sites"""
-        results = []
-        
-        # Generate content variations
-        content_processor = ContentProcessor()
+        return list(self.iter_bulk_create_with_variables(
+            site_ids, template, variable_values, progress_callback=progress_callback
+        ))
+    
+    def iter_bulk_create_with_variables(self, site_ids: List[int], template: str,
+                                        variable_values: Dict[str, List[str]],
+                                        batch_size: int = 50,
+                                        progress_callback: Optional[Callable] = None) -> Iterator[Dict]:
+        """
+        Render every variation, then upload them in batches across sites
+        
+        The template is compiled once and each variation rendered from it.
+        Each site's pages go to /bulk/content in batches of batch_size, with
+        sites handled concurrently by the fleet executor. One result per
+        variation is yielded as its batch finishes.
+        """
+        compiled = ContentProcessor().compile(template, ['location', 'service', 'service_plural'])
+        tasks = []
         
         for site_id in site_ids:
-            # Generate unique content for each site
-            for location in variable_values.get('location', ['']):
-                for service_key, service_data in variable_values.get('service', {}).items():
-                    replacements = {
-                        'location': location,
-                        'service': service_data['singular'],
-                        'service_plural': service_data['plural']
-                    }
-                    
-                    # Process template with variables
-                    processed_content = content_processor.process(template, replacements)
-                    
-                    # Extract title from content (assuming first H1)
-                    import re
-                    title_match = re.search(r'<h1[^>]*>(.*?)</h1>', processed_content, re.IGNORECASE)
-                    title = title_match.group(1) if title_match else f"{service_data['singular']} in {location}"
-                    
-                    # Create content
-                    content_data = {
-                        'title': re.sub(r'<[^>]+>', '', title),  # Strip HTML from title
-                        'content': processed_content,
-                        'type': 'page',
-                        'status': 'draft',
-                        'seo': {
-                            'title': f"{service_data['singular'].title()} in {location} - Professional Services",
-                            'description': f"Looking for {service_data['singular']} in {location}? We provide professional {service_data['plural']} with experienced technicians."
-                        }
-                    }
-                    
-                    result = self.create_content([site_id], content_data)
-                    results.extend(result)
+            # Render per site so spintax gives each site unique content
+            pages = [
+                self._render_variation(compiled, location, service_data)
+                for location in variable_values.get('location', [''])
+                for service_data in variable_values.get('service', {}).values()
+            ]
+            tasks.extend((site_id, batch) for batch in _chunk_pages(pages, batch_size))
+        
+        total = sum(len(batch) for _, batch in tasks)
+        done = 0
+        
+        for result in self.fleet.run(tasks, _post_content_batch):
+            for page_result in result.pop('results', []):
+                done += 1
+                yield {**result, **page_result}
+            
+            if progress_callback:
+                progress_callback(done, total, f"Uploaded batch to {result.get('site_name', result['site_id'])}")
+    
+    @staticmethod
+    def _render_variation(compiled: 'CompiledTemplate', location: str, service_data: Dict) -> Tuple[Dict, Dict]:
+        """Render one location/service page: (variation, content data)"""
+        processed_content = compiled.render({
+            'location': location,
+            'service': service_data['singular'],
+            'service_plural': service_data['plural']
+        })
+        
+        # Extract title from content (assuming first H1)
+        title_match = _H1.search(processed_content)
+        title = title_match.group(1) if title_match else f"{service_data['singular']} in {location}"
+        title = _TAGS.sub('', title)  # Strip HTML from title
         
-        return results
+        content_data = {
+            'title': title,
+            'content': processed_content,
+            'type': 'page',
+            'status': 'draft',
+            'seo': {
+                'title': f"{service_data['singular'].title()} in {location} - Professional Services",
+                'description': f"Looking for {service_data['singular']} in {location}? We provide professional {service_data['plural']} with experienced technicians."
+            }
+        }
+        
+        return {'title': title, 'location': location, 'service': service_data['singular']}, content_data
     
     def get_site(self, site_id: int) -> Optional[Dict]:
         """Get site by ID"""
@@ -369,29 +363,335 @@ class WPBulkManager:
         return templates
 
 
+def _post_content(site: Dict, session: requests.Session, content_data: Dict) -> Dict:
+    """Fleet task: create one post on a site"""
+    response = session.post(f"{site['url']}/wp-json/wpbm/v1/content", json=content_data)
+    
+    if response.status_code != 200:
+        return {'success': False, 'error': f'HTTP {response.status_code}'}
+    
+    data = response.json()
+    return {
+        'success': True,
+        'post_id': data.get('post_id', data.get('id')),
+        'permalink': data.get('permalink', data.get('link'))
+    }
+
+
+def _chunk_pages(pages: List[Tuple[Dict, Dict]], max_items: int,
+                 max_bytes: int = 512 * 1024) -> Iterator[List[Tuple[Dict, Dict]]]:
+    """Split rendered pages into batches bounded by count and JSON size"""
+    batch, size = [], 0
+    for page in pages:
+        page_size = len(json.dumps(page[1]))
+        if batch and (len(batch) >= max_items or size + page_size > max_bytes):
+            yield batch
+            batch, size = [], 0
+        batch.append(page)
+        size += page_size
+    if batch:
+        yield batch
+
+
+def _post_content_batch(site: Dict, session: requests.Session,
+                        pages: List[Tuple[Dict, Dict]]) -> Dict:
+    """
+    Fleet task: create a batch of posts on a site through /bulk/content
+    
+    Creating posts isn't idempotent, so pages are only re-sent one by one
+    when the bulk request certainly created nothing: the endpoint is
+    missing (404/405) or it rejected every item (older plugins only
+    update by ID). Any other failure is reported, not retried.
+    """
+    def fail_all(error: str) -> Dict:
+        return {'success': False, 'results': [
+            {**variation, 'success': False, 'error': error} for variation, _ in pages
+        ]}
+    
+    try:
+        response = session.post(
+            f"{site['url']}/wp-json/wpbm/v1/bulk/content",
+            json={'updates': [content_data for _, content_data in pages]}
+        )
+    except Exception as e:
+        # A timeout may still have created the posts on the server
+        return fail_all(str(e))
+    
+    if response.status_code in (404, 405):
+        results = None
+    elif response.status_code != 200:
+        return fail_all(f'HTTP {response.status_code}')
+    else:
+        try:
+            results = response.json().get('results')
+        except ValueError:
+            results = None
+        if not isinstance(results, list):
+            return fail_all('Unrecognised bulk response; pages may have been created')
+        if len(results) == len(pages) and not any(item.get('success') for item in results):
+            results = None
+    
+    if results is None:
+        page_results = []
+        for variation, content_data in pages:
+            try:
+                page_results.append({**variation, **_post_content(site, session, content_data)})
+            except Exception as e:
+                page_results.append({**variation, 'success': False, 'error': str(e)})
+    else:
+        # Results come back in request order; pages past a short response are unconfirmed
+        page_results = [
+            {**variation, 'success': True, 'post_id': item.get('id'), 'permalink': item.get('link')}
+            if item.get('success') else
+            {**variation, 'success': False, 'error': item.get('error') or 'Create failed'}
+            for (variation, _), item in zip(pages, results)
+        ]
+        page_results.extend(
+            {**variation, 'success': False, 'error': 'No result in bulk response; page may have been created'}
+            for variation, _ in pages[len(results):]
+        )
+    
+    return {'success': all(item['success'] for item in page_results), 'results': page_results}
+
+
+class _FleetSession(requests.Session):
+    """Session that applies a default timeout to every request"""
+    
+    def __init__(self, timeout: int):
+        super().__init__()
+        self.timeout = timeout
+    
+    def request(self, *args, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(*args, **kwargs)
+
+
+class FleetExecutor:
+    """
+    Run work against many sites at once
+    
+    Site records and API keys are resolved in one pass (one database query
+    and one keychain lookup per site), then tasks are queued per site and
+    dispatched round-robin to a thread pool. A task is only handed to the
+    pool when its site has one of its per_site_concurrency slots free, so
+    a site with many queued tasks never ties up workers that other sites
+    could use. Each site gets its own keep-alive session, and publishing
+    to 20 sites takes about as long as the slowest site rather than the
+    sum of them all.
+    """
+    
+    def __init__(self, manager: WPBulkManager, max_concurrency: int = 20,
+                 per_site_concurrency: int = 2, timeout: int = 30):
+        """
+        Initialize fleet executor
+        
+        Args:
+            manager: Manager whose site database and keychain to use
+            max_concurrency: Requests in flight across all sites
+            per_site_concurrency: Requests in flight per site
+            timeout: Request timeout in seconds
+        """
+        self.manager = manager
+        self.max_concurrency = max_concurrency
+        self.per_site_concurrency = per_site_concurrency
+        self.timeout = timeout
+        self._sessions: Dict[int, requests.Session] = {}
+        self._lock = threading.Lock()
+    
+    def resolve(self, site_ids: Iterable[int]) -> Dict[int, Dict]:
+        """
+        Load site records and API keys for many sites at once
+        
+        Returns:
+            Site records by ID, each with an 'api_key' (None if not in the keychain)
+        """
+        site_ids = sorted(set(site_ids))
+        if not site_ids:
+            return {}
+        
+        conn = sqlite3.connect(self.manager.db_path)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            f"SELECT * FROM sites WHERE id IN ({','.join('?' * len(site_ids))})",
+            site_ids
+        )
+        sites = {row['id']: dict(row) for row in cursor.fetchall()}
+        conn.close()
+        
+        for site in sites.values():
+            site['api_key'] = keyring.get_password("WPBulkManager", site['api_key_id'])
+        
+        return sites
+    
+    def session(self, site: Dict, sessions: Optional[Dict[int, requests.Session]] = None) -> requests.Session:
+        """
+        Keep-alive session for a site, carrying its API key
+        
+        Args:
+            site: Site record with 'id' and 'api_key'
+            sessions: Session map to use (default: the executor's own, closed by close())
+        """
+        with self._lock:
+            sessions = self._sessions if sessions is None else sessions
+            session = sessions.get(site['id'])
+            if session is None:
+                session = _FleetSession(self.timeout)
+                adapter = requests.adapters.HTTPAdapter(pool_maxsize=self.per_site_concurrency)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                sessions[site['id']] = session
+            session.headers['X-API-Key'] = site['api_key']
+            return session
+    
+    def run(self, tasks: Iterable[Tuple[int, Any]],
+            work: Callable[[Dict, requests.Session, Any], Dict]) -> Iterator[Dict]:
+        """
+        Run work(site, session, payload) for each (site_id, payload) task
+        
+        Results are yielded as each task finishes, each with site_id,
+        site_name and success plus whatever work returned. Sites that
+        can't be resolved fail without a request being made. Each run
+        has its own site sessions, closed once its tasks have finished, so
+        runs overlapping on a shared executor don't close each other's.
+        
+        Args:
+            tasks: (site ID, payload) pairs
+            work: Function doing one task; return a result dictionary or raise
+        """
+        tasks = list(tasks)
+        sites = self.resolve(site_id for site_id, _ in tasks)
+        
+        queues: Dict[int, deque] = {}
+        for site_id, payload in tasks:
+            site = sites.get(site_id)
+            if not site:
+                yield {'site_id': site_id, 'success': False, 'error': 'Site not found'}
+                continue
+            if not site['api_key']:
+                yield {'site_id': site_id, 'site_name': site['name'], 'success': False,
+                       'error': 'API key not found'}
+                continue
+            queues.setdefault(site_id, deque()).append(payload)
+        
+        # Sites with queued tasks, in round-robin order
+        pending_sites = deque(queues)
+        in_flight = {site_id: 0 for site_id in queues}
+        running = {}
+        sessions: Dict[int, requests.Session] = {}
+        
+        def dispatch():
+            """Submit queued tasks while there are free overall and per-site slots"""
+            blocked = 0
+            while pending_sites and len(running) < self.max_concurrency and blocked < len(pending_sites):
+                site_id = pending_sites.popleft()
+                if in_flight[site_id] < self.per_site_concurrency:
+                    payload = queues[site_id].popleft()
+                    running[executor.submit(self._run_task, sites[site_id], payload, work, sessions)] = site_id
+                    in_flight[site_id] += 1
+                    blocked = 0
+                else:
+                    blocked += 1
+                if queues[site_id]:
+                    pending_sites.append(site_id)
+        
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+                dispatch()
+                while running:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        in_flight[running.pop(future)] -= 1
+                    # Refill the freed slots before handing results back
+                    dispatch()
+                    for future in done:
+                        yield future.result()
+        finally:
+            self._close_sessions(sessions)
+    
+    def _run_task(self, site: Dict, payload: Any, work: Callable,
+                  sessions: Dict[int, requests.Session]) -> Dict:
+        """Worker: run one task"""
+        session = self.session(site, sessions)
+        result = {'site_id': site['id'], 'site_name': site['name']}
+        
+        try:
+            result.update(work(site, session, payload))
+        except Exception as e:
+            result.update({'success': False, 'error': str(e)})
+        
+        return result
+    
+    def close(self):
+        """Close the site sessions handed out by session() outside a run"""
+        self._close_sessions(self._sessions)
+    
+    def _close_sessions(self, sessions: Dict[int, requests.Session]):
+        with self._lock:
+            for session in sessions.values():
+                session.close()
+            sessions.clear()
+
+
+_SPINTAX = re.compile(r'\{([^{}]+)\}')
+_H1 = re.compile(r'<h1[^>]*>(.*?)</h1>', re.IGNORECASE)
+_TAGS = re.compile(r'<[^>]+>')
+
+_FILTERS = {
+    None: lambda value: value,
+    'upper': str.upper,
+    'lower': str.lower,
+    'capitalize': str.title
+}
+
+
+def _replace_spintax(match) -> str:
+    options = match.group(1).split('|')
+    return random.choice(options).strip()
+
+
+class CompiledTemplate:
+    """A template split into text and variable slots once, for rendering many times"""
+    
+    def __init__(self, template: str, variables: Iterable[str]):
+        names = sorted(variables, key=len, reverse=True)
+        if names:
+            placeholder = re.compile(
+                r'\{(' + '|'.join(map(re.escape, names)) + r')(?:\|(upper|lower|capitalize))?\}'
+            )
+            # Alternating [text, name, filter, text, name, filter, ..., text]
+            self._parts = placeholder.split(template)
+        else:
+            self._parts = [template]
+    
+    def render(self, replacements: Dict[str, str]) -> str:
+        """Fill in the variables, then resolve spintax"""
+        parts = self._parts
+        content = [parts[0]]
+        for index in range(1, len(parts), 3):
+            content.append(_FILTERS[parts[index + 1]](replacements[parts[index]]))
+            content.append(parts[index + 2])
+        return ContentProcessor.spin(''.join(content))
+
+
 class ContentProcessor:
     """Process content with variables and spintax"""
     
     def process(self, content: str, replacements: Dict[str, str]) -> str:
         """Process content with variable replacements"""
-        # Replace variables
-        for key, value in replacements.items():
-            content = content.replace(f'{{{key}}}', value)
-            content = content.replace(f'{{{key}|upper}}', value.upper())
-            content = content.replace(f'{{{key}|lower}}', value.lower())
-            content = content.replace(f'{{{key}|capitalize}}', value.title())
-        
-        # Process spintax
-        import random
-        import re
-        
-        def replace_spintax(match):
-            options = match.group(1).split('|')
-            return random.choice(options).strip()
-        
+        return self.compile(content, replacements.keys()).render(replacements)
+    
+    def compile(self, template: str, variables: Iterable[str]) -> CompiledTemplate:
+        """Parse a template once for rendering with many sets of values"""
+        return CompiledTemplate(template, variables)
+    
+    @staticmethod
+    def spin(content: str) -> str:
+        """Resolve {a|b|c} spintax, innermost first"""
         # Process nested spintax
         while '{' in content and '}' in content:
-            new_content = re.sub(r'\{([^{}]+)\}', replace_spintax, content)
+            new_content = _SPINTAX.sub(_replace_spintax, content)
             if new_content == content:
                 break
             content = new_content
@@ -250,15 +250,11 @@ class WPBulkManagerMySQL:
         site = self.db.get_site(site_name)
         operations = ContentOperations(client)
         
-        # Create backup
-        backup_result = operations.backup_before_bulk_operation()
-        
-        # Save to site folder
-        backup_path = self.site_manager.create_backup(
-            site_name,
-            backup_result,
-            'full_content'
+        # Snapshot into the site folder; unchanged posts are shared with earlier backups
+        backup_result = operations.backup_before_bulk_operation(
+            store=self.site_manager.get_backup_store(site_name)
         )
+        backup_path = backup_result.get('backup_file')
         
         # Record in database
         if backup_path:
@@ -266,7 +262,7 @@ class WPBulkManagerMySQL:
                 site_id=site['id'],
                 backup_type='full_content',
                 backup_location=backup_path,
-                backup_size=os.path.getsize(backup_path),
+                backup_size=backup_result.get('stored_bytes', 0),
                 items_count=backup_result.get('post_count', 0)
             )
             
@@ -275,7 +271,9 @@ class WPBulkManagerMySQL:
         return {
             'success': True,
             'backup_file': backup_path,
-            'post_count': backup_result.get('post_count', 0)
+            'post_count': backup_result.get('post_count', 0),
+            'backup_size': backup_result.get('stored_bytes', 0),
+            'bytes_written': backup_result.get('bytes_written', 0)
         }
 
 
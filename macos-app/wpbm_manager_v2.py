@@ -14,6 +14,9 @@ from wpbm.api.client import WPBMClient
 from wpbm.api.auth import APIKeyManager
 from wpbm.operations.content import ContentOperations
 from wpbm.operations.media import MediaOperations
+from wpbm.operations.restore import RestoreOperations
+from wpbm.sync import ContentStore, ContentSync
+from wpbm.utils.backup_store import BackupStore
 from wpbm.utils.logger import get_logger
 from wpbm.utils.cache import CacheManager
 
@@ -111,11 +114,13 @@ class WPBulkManagerV2:
         def progress(current, total, message):
             print(f"\r[{current}/{total}] {message}", end='', flush=True)
             
+        # Back up the original text of just the posts that change
         results = operations.search_replace_content(
             search=search,
             replace=replace,
             dry_run=dry_run,
-            progress_callback=progress
+            progress_callback=progress,
+            backup_store=None if dry_run else BackupStore()
         )
         
         print()  # New line after progress
@@ -130,6 +135,33 @@ class WPBulkManagerV2:
         operations = ContentOperations(client)
         return operations.backup_before_bulk_operation()
         
+    def restore_site_content(self, site_name: str, backup_id: str,
+                             dry_run: bool = True) -> Dict:
+        """Restore posts that differ from a snapshot or change-set"""
+        client = self.get_client(site_name, cache_enabled=False)
+        if not client:
+            return {'error': 'Site not found'}
+            
+        def progress(current, total, message):
+            print(f"\r[{current}/{total}] {message}", end='', flush=True)
+            
+        restore = RestoreOperations(client)
+        if any(c['changeset_id'] == backup_id for c in restore.store.list_changesets(client.site_url)):
+            results = restore.restore_changeset(backup_id, dry_run=dry_run, progress_callback=progress)
+        else:
+            results = restore.restore_snapshot(backup_id, dry_run=dry_run, progress_callback=progress)
+            
+        print()  # New line after progress
+        return results
+        
+    def sync_site_content(self, site_name: str, store: Optional[ContentStore] = None) -> Dict:
+        """Update the local copy of a site's content with changes since the last sync"""
+        client = self.get_client(site_name, cache_enabled=False)
+        if not client:
+            return {'error': 'Site not found'}
+            
+        return ContentSync(client, store).sync()
+        
     def manage_site_media(self, site_name: str) -> MediaOperations:
         """Get media operations for a site"""
         client = self.get_client(site_name)
@@ -141,8 +173,12 @@ class WPBulkManagerV2:
     def clear_cache(self, site_name: str = None):
         """Clear cache for a site or all sites"""
         if site_name:
+            site = self.auth_manager.get_site(site_name)
+            if not site:
+                logger.error(f"Site not found: {site_name}")
+                return
             cache = CacheManager()
-            cache.clear()
+            cache.clear(namespace=site['url'])
             logger.info(f"Cleared cache for {site_name}")
         else:
             cache = CacheManager()
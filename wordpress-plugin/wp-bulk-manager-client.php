@@ -16,6 +16,9 @@ if (!defined('ABSPATH')) {
 
 class WP_Bulk_Manager_Client_Robust {
     
+    // Upper bound on items in one /bulk/* request
+    const MAX_BULK_ITEMS = 100;
+    
     private $version = '3.0.0';
     private $option_api_key = 'wpbm_api_key';
     private $option_allowed_ips = 'wpbm_allowed_ips';
@@ -355,6 +358,25 @@ class WP_Bulk_Manager_Client_Robust {
                     'status' => [
                         'default' => 'any',
                         'sanitize_callback' => 'sanitize_text_field'
+                    ],
+                    'modified_after' => [
+                        'sanitize_callback' => 'sanitize_text_field'
+                    ],
+                    'after_id' => [
+                        'default' => 0,
+                        'sanitize_callback' => 'absint'
+                    ],
+                    'orderby' => [
+                        'default' => 'date',
+                        'sanitize_callback' => 'sanitize_key'
+                    ],
+                    'order' => [
+                        'default' => 'DESC',
+                        'sanitize_callback' => 'sanitize_text_field'
+                    ],
+                    'full' => [
+                        'default' => false,
+                        'sanitize_callback' => 'rest_sanitize_boolean'
                     ]
                 ]
             ],
@@ -365,6 +387,23 @@ class WP_Bulk_Manager_Client_Robust {
             ]
         ]);
         
+        // ID/modified pairs for sync clients to detect deletions cheaply
+        register_rest_route($namespace, '/content/manifest', [
+            'methods' => WP_REST_Server::READABLE,
+            'callback' => [$this, 'get_content_manifest'],
+            'permission_callback' => [$this, 'verify_api_key'],
+            'args' => [
+                'type' => [
+                    'default' => 'post',
+                    'sanitize_callback' => 'sanitize_text_field'
+                ],
+                'status' => [
+                    'default' => 'any',
+                    'sanitize_callback' => 'sanitize_text_field'
+                ]
+            ]
+        ]);
+        
         register_rest_route($namespace, '/content/(?P<id>\d+)', [
             [
                 'methods' => WP_REST_Server::READABLE,
@@ -390,6 +429,66 @@ class WP_Bulk_Manager_Client_Robust {
             ]
         ]);
         
+        // Batched updates: one request and one auth check for many posts
+        register_rest_route($namespace, '/bulk/content', [
+            'methods' => WP_REST_Server::CREATABLE,
+            'callback' => [$this, 'bulk_update_content'],
+            'permission_callback' => [$this, 'verify_api_key']
+        ]);
+        
+        register_rest_route($namespace, '/seo/bulk', [
+            'methods' => WP_REST_Server::CREATABLE,
+            'callback' => [$this, 'bulk_update_seo'],
+            'permission_callback' => [$this, 'verify_api_key']
+        ]);
+        
+        // Media library, paginated like /content
+        register_rest_route($namespace, '/media', [
+            [
+                'methods' => WP_REST_Server::READABLE,
+                'callback' => [$this, 'get_media'],
+                'permission_callback' => [$this, 'verify_api_key'],
+                'args' => [
+                    'limit' => [
+                        'default' => 100,
+                        'sanitize_callback' => 'absint'
+                    ],
+                    'page' => [
+                        'default' => 1,
+                        'sanitize_callback' => 'absint'
+                    ],
+                    'mime_type' => [
+                        'sanitize_callback' => 'sanitize_text_field'
+                    ]
+                ]
+            ],
+            [
+                // Raw file body named by Content-Disposition, like core's /wp/v2/media
+                'methods' => WP_REST_Server::CREATABLE,
+                'callback' => [$this, 'create_media'],
+                'permission_callback' => [$this, 'verify_api_key']
+            ]
+        ]);
+        
+        register_rest_route($namespace, '/media/(?P<id>\d+)', [
+            [
+                'methods' => WP_REST_Server::READABLE,
+                'callback' => [$this, 'get_single_media'],
+                'permission_callback' => [$this, 'verify_api_key']
+            ],
+            [
+                'methods' => WP_REST_Server::EDITABLE,
+                'callback' => [$this, 'update_media'],
+                'permission_callback' => [$this, 'verify_api_key']
+            ]
+        ]);
+        
+        register_rest_route($namespace, '/media/bulk', [
+            'methods' => WP_REST_Server::CREATABLE,
+            'callback' => [$this, 'bulk_update_media'],
+            'permission_callback' => [$this, 'verify_api_key']
+        ]);
+        
         // Health check endpoint (no auth required)
         register_rest_route($namespace, '/health', [
             'methods' => WP_REST_Server::READABLE,
@@ -860,20 +959,91 @@ class WP_Bulk_Manager_Client_Robust {
             'post_status' => $params['status']
         ];
         
+        // Incremental sync: only posts changed at or after the cursor, oldest
+        // first with ID as tie-breaker so pages stay stable while paging
+        if (!empty($params['modified_after'])) {
+            $args['date_query'] = [[
+                'column' => 'post_modified_gmt',
+                'after' => $params['modified_after'],
+                'inclusive' => true
+            ]];
+            $args['orderby'] = ['modified' => 'ASC', 'ID' => 'ASC'];
+        } elseif (in_array($params['orderby'], ['date', 'modified', 'title', 'id'], true)) {
+            // sanitize_key() lowercases, but WP_Query only accepts 'ID'
+            $args['orderby'] = $params['orderby'] === 'id' ? 'ID' : $params['orderby'];
+            $args['order'] = strtoupper($params['order']) === 'ASC' ? 'ASC' : 'DESC';
+        }
+        
+        // Keyset paging: posts after an ID in ID order, so deletions and status
+        // changes between requests can't shift later posts onto a skipped page
+        $after_id = $params['after_id'];
+        if ($after_id) {
+            $args['orderby'] = 'ID';
+            $args['order'] = 'ASC';
+            $after_where = function($where) use ($after_id) {
+                global $wpdb;
+                return $where . $wpdb->prepare(" AND {$wpdb->posts}.ID > %d", $after_id);
+            };
+            add_filter('posts_where', $after_where);
+        }
+        
         $query = new WP_Query($args);
+        
+        if ($after_id) {
+            remove_filter('posts_where', $after_where);
+        }
+        
         $posts = [];
         
         foreach ($query->posts as $post) {
-            $posts[] = $this->format_post($post);
+            $posts[] = $this->format_post($post, $params['full']);
         }
         
-        return [
+        return $this->conditional_response($request, [
             'posts' => $posts,
             'total' => $query->found_posts,
             'pages' => $query->max_num_pages,
             'page' => $params['page'],
             'limit' => $params['limit']
-        ];
+        ]);
+    }
+    
+    public function get_content_manifest($request) {
+        global $wpdb;
+        
+        $params = $request->get_params();
+        $types = array_filter(array_map('sanitize_key', explode(',', $params['type'])));
+        $statuses = array_filter(array_map('sanitize_key', explode(',', $params['status'])));
+        
+        if (empty($types) || empty($statuses)) {
+            return new WP_Error('invalid_data', 'Type and status are required', ['status' => 400]);
+        }
+        
+        $where = ["post_type IN (" . implode(',', array_fill(0, count($types), '%s')) . ")"];
+        $values = $types;
+        
+        if ($params['status'] === 'any') {
+            // Match WP_Query's 'any': everything except trash and auto-drafts
+            $where[] = "post_status NOT IN ('trash', 'auto-draft', 'inherit')";
+        } else {
+            $where[] = "post_status IN (" . implode(',', array_fill(0, count($statuses), '%s')) . ")";
+            $values = array_merge($values, $statuses);
+        }
+        
+        $rows = $wpdb->get_results($wpdb->prepare(
+            "SELECT ID, post_modified_gmt FROM {$wpdb->posts} WHERE " . implode(' AND ', $where) . " ORDER BY ID",
+            $values
+        ), ARRAY_N);
+        
+        $items = [];
+        foreach ($rows as $row) {
+            $items[] = [(int) $row[0], $row[1]];
+        }
+        
+        return $this->conditional_response($request, [
+            'items' => $items,
+            'total' => count($items)
+        ]);
     }
     
     public function get_single_content($request) {
@@ -884,12 +1054,41 @@ class WP_Bulk_Manager_Client_Robust {
             return new WP_Error('not_found', 'Content not found', ['status' => 404]);
         }
         
-        return $this->format_post($post, true);
+        return $this->conditional_response($request, $this->format_post($post, true), $post->post_modified_gmt);
     }
     
     public function create_content($request) {
-        $params = $request->get_json_params();
+        $post_id = $this->apply_content_create($request->get_json_params());
+        
+        if (is_wp_error($post_id)) {
+            return $post_id;
+        }
         
+        return [
+            'id' => $post_id,
+            'message' => 'Content created successfully',
+            'link' => get_permalink($post_id)
+        ];
+    }
+    
+    public function update_content($request) {
+        $result = $this->apply_content_update($request->get_param('id'), $request->get_json_params());
+        
+        if (is_wp_error($result)) {
+            return $result;
+        }
+        
+        return [
+            'id' => $result,
+            'message' => 'Content updated successfully',
+            'link' => get_permalink($result)
+        ];
+    }
+    
+    /**
+     * Create one post from title/content/type/status/seo params; returns the ID or a WP_Error
+     */
+    private function apply_content_create($params) {
         if (empty($params['title']) && empty($params['content'])) {
             return new WP_Error('invalid_data', 'Title or content is required', ['status' => 400]);
         }
@@ -907,18 +1106,20 @@ class WP_Bulk_Manager_Client_Robust {
             return new WP_Error('create_failed', $post_id->get_error_message(), ['status' => 500]);
         }
         
-        return [
-            'id' => $post_id,
-            'message' => 'Content created successfully',
-            'link' => get_permalink($post_id)
-        ];
+        if (!empty($params['seo']) && is_array($params['seo'])) {
+            $this->update_seo_fields($post_id, $params['seo']);
+        }
+        
+        return $post_id;
     }
     
-    public function update_content($request) {
-        $post_id = $request->get_param('id');
-        $params = $request->get_json_params();
+    /**
+     * Update one post from title/content/status params; returns the ID or a WP_Error
+     */
+    private function apply_content_update($post_id, $params) {
+        $post_id = absint($post_id);
         
-        if (!get_post($post_id)) {
+        if (!$post_id || !get_post($post_id)) {
             return new WP_Error('not_found', 'Content not found', ['status' => 404]);
         }
         
@@ -942,10 +1143,83 @@ class WP_Bulk_Manager_Client_Robust {
             return new WP_Error('update_failed', $result->get_error_message(), ['status' => 500]);
         }
         
+        return $post_id;
+    }
+    
+    public function bulk_update_content($request) {
+        // Items without an ID create new posts, e.g. generated variation pages
+        return $this->run_bulk_updates($request, function($update) {
+            if (empty($update['id'])) {
+                return $this->apply_content_create($update);
+            }
+            return $this->apply_content_update($update['id'], $update);
+        });
+    }
+    
+    public function bulk_update_seo($request) {
+        return $this->run_bulk_updates($request, function($update) {
+            $post_id = absint($update['id'] ?? 0);
+            if (!$post_id || !get_post($post_id)) {
+                return new WP_Error('not_found', 'Content not found', ['status' => 404]);
+            }
+            if (empty($update['seo']) || !is_array($update['seo'])) {
+                return new WP_Error('invalid_data', 'SEO data is required', ['status' => 400]);
+            }
+            
+            $this->update_seo_fields($post_id, $update['seo']);
+            return $post_id;
+        });
+    }
+    
+    /**
+     * Apply each item of an {"updates": [...]} body and report per-item results in order
+     */
+    private function run_bulk_updates($request, $apply) {
+        $params = $request->get_json_params();
+        $updates = $params['updates'] ?? null;
+        
+        if (!is_array($updates) || empty($updates)) {
+            return new WP_Error('invalid_data', 'A non-empty updates array is required', ['status' => 400]);
+        }
+        
+        if (count($updates) > self::MAX_BULK_ITEMS) {
+            return new WP_Error('too_many_items', sprintf('At most %d updates per request', self::MAX_BULK_ITEMS), ['status' => 413]);
+        }
+        
+        $results = [];
+        $errors = [];
+        $updated = 0;
+        
+        // Recount terms once at the end instead of after every post
+        wp_defer_term_counting(true);
+        
+        foreach ($updates as $update) {
+            $id = is_array($update) ? absint($update['id'] ?? 0) : 0;
+            $result = is_array($update) ? $apply($update) : new WP_Error('invalid_data', 'Update must be an object');
+            
+            if (is_wp_error($result)) {
+                $results[] = ['id' => $id, 'success' => false, 'error' => $result->get_error_message()];
+                $errors[] = sprintf('%d: %s', $id, $result->get_error_message());
+            } else {
+                $entry = ['id' => (int) $result, 'success' => true];
+                if (!$id) {
+                    // Created: report where the new post lives
+                    $entry['link'] = get_permalink($result);
+                }
+                $results[] = $entry;
+                $updated++;
+            }
+        }
+        
+        wp_defer_term_counting(false);
+        
+        $this->log_action('bulk_update', ['route' => $request->get_route(), 'updated' => $updated, 'failed' => count($errors)]);
+        
         return [
-            'id' => $post_id,
-            'message' => 'Content updated successfully',
-            'link' => get_permalink($post_id)
+            'updated' => $updated,
+            'failed' => count($errors),
+            'errors' => $errors,
+            'results' => $results
         ];
     }
     
@@ -967,6 +1241,200 @@ class WP_Bulk_Manager_Client_Robust {
         ];
     }
     
+    public function get_media($request) {
+        $params = $request->get_params();
+        
+        $args = [
+            'post_type' => 'attachment',
+            'post_status' => 'inherit',
+            'posts_per_page' => min(max($params['limit'], 1), 500), // Cap at 500
+            'paged' => max($params['page'], 1),
+            'orderby' => 'ID',
+            'order' => 'ASC'
+        ];
+        
+        if (!empty($params['mime_type'])) {
+            // Accept 'image/' as well as 'image' or 'image/jpeg'
+            $args['post_mime_type'] = rtrim($params['mime_type'], '/');
+        }
+        
+        $query = new WP_Query($args);
+        $media = [];
+        
+        foreach ($query->posts as $attachment) {
+            $media[] = $this->format_media($attachment);
+        }
+        
+        return $this->conditional_response($request, [
+            'media' => $media,
+            'total' => $query->found_posts,
+            'pages' => $query->max_num_pages,
+            'page' => $args['paged'],
+            'limit' => $args['posts_per_page']
+        ]);
+    }
+    
+    public function get_single_media($request) {
+        $attachment = get_post($request->get_param('id'));
+        
+        if (!$attachment || $attachment->post_type !== 'attachment') {
+            return new WP_Error('not_found', 'Media not found', ['status' => 404]);
+        }
+        
+        return $this->conditional_response($request, $this->format_media($attachment), $attachment->post_modified_gmt);
+    }
+    
+    public function create_media($request) {
+        $body = $request->get_body();
+        
+        if ($body === '' || $body === null) {
+            return new WP_Error('invalid_data', 'File contents are required', ['status' => 400]);
+        }
+        
+        $disposition = $request->get_header('content_disposition');
+        $filename = '';
+        if ($disposition && preg_match('/filename\*?=["\']?(?:UTF-8\'\')?([^"\';]+)/i', $disposition, $matches)) {
+            $filename = sanitize_file_name(rawurldecode($matches[1]));
+        }
+        
+        if (!$filename) {
+            return new WP_Error('invalid_data', 'A Content-Disposition filename is required', ['status' => 400]);
+        }
+        
+        // Rejects file types the site doesn't allow
+        $upload = wp_upload_bits($filename, null, $body);
+        
+        if (!empty($upload['error'])) {
+            return new WP_Error('upload_failed', $upload['error'], ['status' => 400]);
+        }
+        
+        $filetype = wp_check_filetype($upload['file']);
+        $title = $request->get_param('title');
+        
+        $attachment_id = wp_insert_attachment([
+            'post_mime_type' => $filetype['type'],
+            'post_title' => sanitize_text_field($title ?: pathinfo($filename, PATHINFO_FILENAME)),
+            'post_status' => 'inherit'
+        ], $upload['file'], 0, true);
+        
+        if (is_wp_error($attachment_id)) {
+            wp_delete_file($upload['file']);
+            return new WP_Error('create_failed', $attachment_id->get_error_message(), ['status' => 500]);
+        }
+        
+        require_once ABSPATH . 'wp-admin/includes/image.php';
+        wp_update_attachment_metadata($attachment_id, wp_generate_attachment_metadata($attachment_id, $upload['file']));
+        
+        $this->log_action('create_media', ['id' => $attachment_id, 'file' => $filename]);
+        
+        return $this->format_media(get_post($attachment_id));
+    }
+    
+    public function update_media($request) {
+        $result = $this->apply_media_update($request->get_param('id'), $request->get_json_params());
+        
+        if (is_wp_error($result)) {
+            return $result;
+        }
+        
+        return [
+            'id' => $result,
+            'message' => 'Media updated successfully'
+        ];
+    }
+    
+    public function bulk_update_media($request) {
+        return $this->run_bulk_updates($request, function($update) {
+            return $this->apply_media_update($update['id'] ?? 0, $update);
+        });
+    }
+    
+    /**
+     * Update one attachment from title/caption/description/alt_text params; returns the ID or a WP_Error
+     */
+    private function apply_media_update($attachment_id, $params) {
+        $attachment_id = absint($attachment_id);
+        $attachment = $attachment_id ? get_post($attachment_id) : null;
+        
+        if (!$attachment || $attachment->post_type !== 'attachment') {
+            return new WP_Error('not_found', 'Media not found', ['status' => 404]);
+        }
+        
+        if (!is_array($params)) {
+            return new WP_Error('invalid_data', 'Update must be an object', ['status' => 400]);
+        }
+        
+        $post_data = [];
+        
+        if (isset($params['title'])) {
+            $post_data['post_title'] = sanitize_text_field($params['title']);
+        }
+        
+        if (isset($params['caption'])) {
+            $post_data['post_excerpt'] = wp_kses_post($params['caption']);
+        }
+        
+        if (isset($params['description'])) {
+            $post_data['post_content'] = wp_kses_post($params['description']);
+        }
+        
+        if ($post_data) {
+            $result = wp_update_post(['ID' => $attachment_id] + $post_data, true);
+            
+            if (is_wp_error($result)) {
+                return new WP_Error('update_failed', $result->get_error_message(), ['status' => 500]);
+            }
+        }
+        
+        if (isset($params['alt_text'])) {
+            update_post_meta($attachment_id, '_wp_attachment_image_alt', sanitize_text_field($params['alt_text']));
+        }
+        
+        return $attachment_id;
+    }
+    
+    /**
+     * Attachment in the shape of the core REST API's media objects
+     */
+    private function format_media($attachment) {
+        $source_url = wp_get_attachment_url($attachment->ID);
+        $metadata = wp_get_attachment_metadata($attachment->ID) ?: [];
+        $base_url = trailingslashit(dirname($source_url));
+        
+        $sizes = [];
+        foreach ($metadata['sizes'] ?? [] as $name => $size) {
+            $sizes[$name] = [
+                'file' => $size['file'],
+                'width' => $size['width'] ?? null,
+                'height' => $size['height'] ?? null,
+                'mime_type' => $size['mime-type'] ?? null,
+                'source_url' => $base_url . $size['file']
+            ];
+        }
+        
+        $file = get_attached_file($attachment->ID);
+        
+        return [
+            'id' => $attachment->ID,
+            'title' => ['rendered' => $attachment->post_title],
+            'caption' => ['rendered' => $attachment->post_excerpt],
+            'description' => ['rendered' => $attachment->post_content],
+            'alt_text' => get_post_meta($attachment->ID, '_wp_attachment_image_alt', true),
+            'mime_type' => $attachment->post_mime_type,
+            'source_url' => $source_url,
+            'post' => $attachment->post_parent,
+            'modified_gmt' => $attachment->post_modified_gmt,
+            'media_details' => [
+                'width' => $metadata['width'] ?? null,
+                'height' => $metadata['height'] ?? null,
+                'file' => $metadata['file'] ?? null,
+                'filesize' => $metadata['filesize'] ?? ($file && file_exists($file) ? filesize($file) : null),
+                'original_image' => $metadata['original_image'] ?? null,
+                'sizes' => $sizes
+            ]
+        ];
+    }
+    
     public function health_check($request) {
         return [
             'status' => 'healthy',
@@ -977,6 +1445,39 @@ class WP_Bulk_Manager_Client_Robust {
         ];
     }
     
+    /**
+     * Wrap a read response with validators so clients can revalidate cached copies
+     * 
+     * The ETag is a hash of the response body. A request whose If-None-Match
+     * (or, without one, If-Modified-Since) still matches gets an empty 304.
+     * Listings send no Last-Modified since deletions would not advance it.
+     */
+    private function conditional_response($request, $data, $last_modified_gmt = null) {
+        $etag = '"' . md5(wp_json_encode($data)) . '"';
+        $headers = [
+            'ETag' => $etag,
+            'Cache-Control' => 'private, no-cache'
+        ];
+        
+        if ($last_modified_gmt) {
+            $headers['Last-Modified'] = mysql2date('D, d M Y H:i:s', $last_modified_gmt, false) . ' GMT';
+        }
+        
+        $if_none_match = $request->get_header('if_none_match');
+        if ($if_none_match !== null) {
+            $tags = array_map('trim', explode(',', $if_none_match));
+            $not_modified = in_array('*', $tags, true) || in_array($etag, $tags, true) || in_array('W/' . $etag, $tags, true);
+        } else {
+            $if_modified_since = $request->get_header('if_modified_since');
+            $not_modified = $if_modified_since && $last_modified_gmt
+                && strtotime($if_modified_since) >= strtotime($last_modified_gmt . ' GMT');
+        }
+        
+        $response = new WP_REST_Response($not_modified ? null : $data, $not_modified ? 304 : 200);
+        $response->set_headers($headers);
+        return $response;
+    }
+    
     private function format_post($post, $full = false) {
         $data = [
             'id' => $post->ID,
@@ -986,6 +1487,7 @@ class WP_Bulk_Manager_Client_Robust {
             'status' => $post->post_status,
             'date' => $post->post_date,
             'modified' => $post->post_modified,
+            'modified_gmt' => $post->post_modified_gmt,
             'link' => get_permalink($post->ID)
         ];
         
@@ -994,11 +1496,76 @@ class WP_Bulk_Manager_Client_Robust {
             $data['excerpt'] = $post->post_excerpt;
             $data['author'] = get_the_author_meta('display_name', $post->post_author);
             $data['featured_media'] = get_post_thumbnail_id($post->ID);
+            $data['meta'] = $this->get_public_meta($post->ID);
+            $data['seo'] = $this->get_seo_fields($post->ID);
         }
         
         return $data;
     }
     
+    /**
+     * Public (non-underscore) post meta, single values unwrapped
+     */
+    private function get_public_meta($post_id) {
+        $meta = [];
+        
+        foreach (get_post_meta($post_id) as $key => $values) {
+            if (strpos($key, '_') === 0) {
+                continue;
+            }
+            $values = array_map('maybe_unserialize', $values);
+            $meta[$key] = count($values) === 1 ? $values[0] : $values;
+        }
+        
+        return $meta;
+    }
+    
+    /**
+     * SEO title, description and focus keyword from Yoast or Rank Math
+     */
+    private function get_seo_fields($post_id) {
+        $sources = [
+            'title' => ['_yoast_wpseo_title', 'rank_math_title'],
+            'description' => ['_yoast_wpseo_metadesc', 'rank_math_description'],
+            'focus_keyword' => ['_yoast_wpseo_focuskw', 'rank_math_focus_keyword']
+        ];
+        $seo = [];
+        
+        foreach ($sources as $field => $keys) {
+            $seo[$field] = '';
+            foreach ($keys as $key) {
+                $value = get_post_meta($post_id, $key, true);
+                if ($value !== '') {
+                    $seo[$field] = $value;
+                    break;
+                }
+            }
+        }
+        
+        return $seo;
+    }
+    
+    /**
+     * Write SEO fields to Rank Math when it is the active SEO plugin, otherwise to Yoast
+     */
+    private function update_seo_fields($post_id, $seo) {
+        $use_rank_math = defined('RANK_MATH_VERSION') && !defined('WPSEO_VERSION');
+        $keys = [
+            'title' => $use_rank_math ? 'rank_math_title' : '_yoast_wpseo_title',
+            'description' => $use_rank_math ? 'rank_math_description' : '_yoast_wpseo_metadesc',
+            'focus_keyword' => $use_rank_math ? 'rank_math_focus_keyword' : '_yoast_wpseo_focuskw'
+        ];
+        
+        foreach ($keys as $field => $key) {
+            if (isset($seo[$field])) {
+                update_post_meta($post_id, $key, sanitize_text_field($seo[$field]));
+            }
+        }
+        
+        // Meta writes don't touch the post, so bump its modified time for sync clients
+        wp_update_post(['ID' => $post_id]);
+    }
+    
     // Plugin management endpoint wrappers (load plugin manager on-demand)
     
     public function handle_list_plugins_endpoint($request) {